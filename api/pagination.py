@@ -1,7 +1,16 @@
 """
 custom pagination support
 """
+import base64
+import json
+from collections import OrderedDict
+
+from dateutil.parser import parse
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 # NOTE: this value is set here for v1 api support
 DEFAULT_PAGINATION_SIZE = 20
@@ -24,6 +33,144 @@ def _get_count(queryset):
         return len(queryset)
 
 
+def keyset_order_by(queryset, field, descending=True):
+    """
+    Order `queryset` by `field` (then by 'id'), NULL values of `field` are
+    treated as the most recent, like COALESCE(field, now()) would.
+    """
+    if descending:
+        return queryset.order_by(F(field).desc(nulls_first=True), '-id')
+    return queryset.order_by(F(field).asc(nulls_last=True), 'id')
+
+
+def _keyset_after(field, descending, value, last_id, distinct=False):
+    """
+    Query for the rows that come after (value, last_id) in the order of
+    `keyset_order_by`. With `distinct`, rows are unique on `field` and the
+    'id' tie-breaker is left out.
+    """
+    if descending:
+        if value is None:
+            query = Q(**{field + '__isnull': False})
+            if not distinct:
+                query |= Q(**{field + '__isnull': True, 'id__lt': last_id})
+            return query
+        query = Q(**{field + '__lt': value})
+        if not distinct:
+            query |= Q(**{field: value, 'id__lt': last_id})
+        return query
+    if value is None:
+        if distinct:
+            return Q(pk__in=[])
+        return Q(**{field + '__isnull': True, 'id__gt': last_id})
+    query = Q(**{field + '__gt': value}) | Q(**{field + '__isnull': True})
+    if not distinct:
+        query |= Q(**{field: value, 'id__gt': last_id})
+    return query
+
+
+def _resolve_field(obj, field):
+    for attr in field.split('__'):
+        obj = getattr(obj, attr)
+        if obj is None:
+            return None
+    return obj
+
+
+class KeysetPaginationMixin(object):
+    """
+    Cursor (keyset) pagination, used when the `cursor` query parameter is
+    passed (leave it empty for the first page). Pages are fetched with
+    `WHERE (field, id) < (last field, last id)` instead of an OFFSET, so
+    deep pages cost the same as the first one.
+
+    The view sets `keyset_ordering = (field, descending)`, the date field
+    (NULL means 'still running') to order and paginate on.
+    """
+    cursor_query_param = 'cursor'
+    keyset_page_size = 100
+    keyset_max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param not in request.query_params:
+            return super(KeysetPaginationMixin, self).paginate_queryset(
+                queryset, request, view=view
+            )
+        self.request = request
+        self.keyset = getattr(view, 'keyset_ordering', ('start_date', True))
+        field, descending = self.keyset
+        queryset = keyset_order_by(queryset, field, descending)
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            value, last_id = self._decode_cursor(cursor)
+            queryset = queryset.filter(
+                _keyset_after(
+                    field,
+                    descending,
+                    value,
+                    last_id,
+                    distinct=bool(queryset.query.distinct_fields)
+                )
+            )
+        page_size = self._get_keyset_page_size(request)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+        self.next_cursor = None
+        if self.has_next and results:
+            last = results[-1]
+            self.next_cursor = self._encode_cursor(
+                _resolve_field(last, field), last.id
+            )
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super(KeysetPaginationMixin,
+                         self).get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ('next', self.get_next_keyset_link()),
+                    ('previous', None),
+                    ('results', data),
+                ]
+            )
+        )
+
+    def get_next_keyset_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def _get_keyset_page_size(self, request):
+        try:
+            page_size = int(request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return self.keyset_page_size
+        if page_size <= 0:
+            return self.keyset_page_size
+        return min(page_size, self.keyset_max_page_size)
+
+    def _encode_cursor(self, value, last_id):
+        if value is not None:
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, last_id]))
+
+    def _decode_cursor(self, cursor):
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(str(cursor)))
+            if value is not None:
+                value = parse(value)
+            return value, int(last_id)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+
 class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 1000
     page_size = 100
@@ -55,3 +202,13 @@ class OptionalPagination(PageNumberPagination):
             return _is_positive(request.query_params[self.page_query_param])
         except (KeyError, ValueError):
             return False
+
+
+class OptionalKeysetPagination(KeysetPaginationMixin, OptionalPagination):
+    pass
+
+
+class StandardKeysetPagination(
+    KeysetPaginationMixin, StandardResultsSetPagination
+):
+    pass
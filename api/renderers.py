@@ -1,11 +1,64 @@
+import os
+import tempfile
+from wsgiref.util import FileWrapper
+
 from django.http import StreamingHttpResponse
 
 from rest_framework import renderers
 from rest_framework_csv.renderers import CSVRenderer
 
-from StringIO import StringIO
 import pandas as pd
 
+#: Bytes read at a time when streaming a file
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def excel_file_response(raw_dataframe, excel_writer_hook):
+    """
+    Let `excel_writer_hook(raw_dataframe, writer)` write (and save) a
+    workbook to a temporary file, then stream that file. The workbook is
+    never held in memory.
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        writer = pd.ExcelWriter(path, engine='xlsxwriter')
+        excel_writer_hook(raw_dataframe, writer)
+        # ASSERT: Writer should be saved by now
+        workbook = open(path, 'rb')
+    finally:
+        # The open file stays readable until it is closed
+        os.unlink(path)
+    return StreamingHttpResponse(
+        FileWrapper(workbook, STREAM_CHUNK_SIZE),
+        content_type='application/vnd.ms-excel'
+    )
+
+
+def csv_streaming_response(dataframes, headers, filename):
+    """
+    Stream every DataFrame of `dataframes` as CSV rows, under a single
+    header line. `dataframes` can be a generator, so rows are sent as soon
+    as each frame is ready.
+    """
+
+    def rows():
+        yield pd.DataFrame(columns=headers).to_csv(index=False)
+        for dataframe in dataframes:
+            yield dataframe.to_csv(
+                index=False,
+                header=False,
+                columns=headers,
+                date_format="%x %X",
+                encoding='utf-8'
+            )
+
+    response = StreamingHttpResponse(
+        rows(), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
+
 
 class PandasExcelRenderer(CSVRenderer):
     """
@@ -24,23 +77,13 @@ class PandasExcelRenderer(CSVRenderer):
         table = [r for r in table_gen]
         headers = table.pop(0)
         raw_dataframe = pd.DataFrame(table, columns=headers)
-        #Save to StringIO
-        sio = StringIO()
-        writer = pd.ExcelWriter(sio, engine='xlsxwriter')
         if 'excel_writer_hook' not in renderer_context:
             raise Exception(
                 "Implementation error -- Using PandasExcelRenderer without including 'excel_writer_hook' in renderer_context"
             )
 
         callback = renderer_context.get('excel_writer_hook')
-        writer = callback(raw_dataframe, writer)
-        # ASSERT: Writer should be saved by now
-        # StringIO to response:
-        sio.seek(0)
-        workbook = sio.getvalue()
-        response = StreamingHttpResponse(
-            workbook, content_type='application/vnd.ms-excel'
-        )
+        response = excel_file_response(raw_dataframe, callback)
         drf_response['Content-Disposition'
                     ] = 'attachment; filename="%s"' % filename
         return response
@@ -0,0 +1,66 @@
+import uuid
+from datetime import timedelta
+
+import mock
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.pagination import OptionalKeysetPagination
+from api.tests.factories import InstanceFactory, UserFactory
+from core.models import Instance
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        now = timezone.now()
+        end_dates = [
+            None, None, now - timedelta(days=1), now - timedelta(days=1),
+            now - timedelta(days=2)
+        ]
+        for end_date in end_dates:
+            InstanceFactory.create(
+                provider_alias=uuid.uuid4(),
+                created_by=self.user,
+                start_date=now - timedelta(days=3),
+                end_date=end_date
+            )
+
+    def _pages(self, descending):
+        view = mock.Mock(keyset_ordering=('end_date', descending))
+        queryset = Instance.objects.filter(created_by=self.user)
+        url = '/instance_history?page_size=2&cursor='
+        pages = []
+        while url:
+            paginator = OptionalKeysetPagination()
+            request = Request(APIRequestFactory().get(url))
+            page = paginator.paginate_queryset(queryset, request, view=view)
+            pages.append([instance.id for instance in page])
+            url = paginator.get_next_keyset_link()
+        return pages
+
+    def _expected(self, descending):
+        running = Instance.objects.filter(
+            created_by=self.user, end_date=None
+        ).order_by('-id' if descending else 'id')
+        ended = Instance.objects.filter(
+            created_by=self.user, end_date__isnull=False
+        ).order_by(
+            *(('-end_date', '-id') if descending else ('end_date', 'id'))
+        )
+        if descending:
+            instances = list(running) + list(ended)
+        else:
+            instances = list(ended) + list(running)
+        return [instance.id for instance in instances]
+
+    def test_descending_pages(self):
+        pages = self._pages(descending=True)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self._expected(descending=True))
+
+    def test_ascending_pages(self):
+        pages = self._pages(descending=False)
+        self.assertEqual(sum(pages, []), self._expected(descending=False))
@@ -0,0 +1,42 @@
+import uuid
+
+import mock
+from django.test import TestCase
+
+from api.tests.factories import InstanceFactory
+from api.v1.views.instance import _instance_list_etag
+from core.models import Instance, InstanceStatusHistory
+from core.models.instance import merge_esh_instances
+
+
+class InstanceListTests(TestCase):
+    def setUp(self):
+        self.instance = InstanceFactory.create(provider_alias=uuid.uuid4())
+
+    def _esh_instance(self, alias):
+        esh_instance = mock.Mock()
+        esh_instance.id = alias
+        esh_instance.ip = '10.0.0.2'
+        return esh_instance
+
+    def test_merge_does_not_write(self):
+        known = self._esh_instance(self.instance.provider_alias)
+        unknown = self._esh_instance(str(uuid.uuid4()))
+        instance_count = Instance.objects.count()
+        history_count = InstanceStatusHistory.objects.count()
+        with self.assertNumQueries(1):
+            core_instances = merge_esh_instances([known, unknown])
+        self.assertEqual([i.id for i in core_instances], [self.instance.id])
+        self.assertEqual(core_instances[0].esh, known)
+        self.assertEqual(core_instances[0].ip_address, '10.0.0.2')
+        self.assertEqual(Instance.objects.count(), instance_count)
+        self.assertEqual(InstanceStatusHistory.objects.count(), history_count)
+
+    def test_etag_follows_cache_version_and_rows(self):
+        core_instances = list(Instance.objects.filter(id=self.instance.id))
+        etag = _instance_list_etag("1", core_instances)
+        self.assertEqual(etag, _instance_list_etag("1", core_instances))
+        self.assertNotEqual(etag, _instance_list_etag("2", core_instances))
+        core_instances[0].name = "renamed"
+        self.assertNotEqual(etag, _instance_list_etag("1", core_instances))
+        self.assertIsNone(_instance_list_etag(None, core_instances))
@@ -112,6 +112,69 @@ class AllocationSourceTests(APITestCase, APISanityTestCase):
         )
         self.assertEqual(allocation_source.is_over_allocation(), False)
 
+    def test_batch_renewal(self):
+        """Check the renewal rules evaluated for many sources at once"""
+        import datetime
+        from django.utils import timezone
+        from cyverse_allocation.renewal import (
+            create_renewal_events, due_renewals
+        )
+        from core.models import EventTable
+
+        def utc_date(month, day):
+            return datetime.datetime(
+                2017, month, day, hour=12, tzinfo=timezone.utc
+            )
+
+        sources = [
+            AllocationSourceFactory.create(
+                name='default_source_02', renewal_strategy='default'
+            ),
+            AllocationSourceFactory.create(
+                name='biweekly_source_02', renewal_strategy='bi-weekly'
+            ),
+            AllocationSourceFactory.create(
+                name='ended_source_02',
+                renewal_strategy='default',
+                end_date=utc_date(7, 20)
+            ),
+            AllocationSourceFactory.create(
+                name='custom_source_02', renewal_strategy='custom'
+            ),
+        ]
+        last_renewals = dict(
+            (source.name, utc_date(7, 4)) for source in sources
+        )
+
+        def due(current_time):
+            return sorted(
+                (source.name, strategy) for source, strategy, _ in
+                due_renewals(sources, current_time, last_renewals)
+            )
+
+        self.assertEqual(due(utc_date(7, 5)), [])
+        self.assertEqual(
+            due(utc_date(7, 18)), [('biweekly_source_02', 'bi-weekly')]
+        )
+        self.assertEqual(
+            due(utc_date(8, 1)), [
+                ('biweekly_source_02', 'bi-weekly'),
+                ('default_source_02', 'default')
+            ]
+        )
+
+        payloads = create_renewal_events(
+            due_renewals(sources, utc_date(8, 1), last_renewals),
+            utc_date(8, 1),
+            dry_run=True
+        )
+        self.assertEqual(len(payloads), 2)
+        self.assertFalse(
+            EventTable.objects.filter(
+                name='allocation_source_created_or_renewed'
+            ).exists()
+        )
+
     def test_renewal_rules(self):
         """Check renewal rules"""
         import datetime
@@ -8,6 +8,8 @@ from api.tests.factories import (
 )
 from django.core.urlresolvers import reverse
 
+from core.models.application_search import refresh_search_documents
+
 EXPECTED_FIELD_COUNT = 14
 
 
@@ -75,6 +77,33 @@ class ApplicationTests(APITestCase, APISanityTestCase):
         response = self.list_view(self.list_request)
         self.assertEquals(response.status_code, 200)
 
+    def _search(self, term):
+        request = APIRequestFactory().get(
+            reverse(self.url_route + '-list'), {'search': term}
+        )
+        force_authenticate(request, user=self.user)
+        response = self.list_view(request)
+        self.assertEquals(response.status_code, 200)
+        return [image['id'] for image in response.data['results']]
+
+    def test_search(self):
+        self.public_image.name = "Ubuntu Desktop"
+        self.public_image.save()
+        self.private_image.name = "CentOS Workstation"
+        self.private_image.save()
+        refresh_search_documents()
+        self.assertEquals(self._search("ubu"), [self.public_image.id])
+        # tsquery operators in the search are ignored
+        self.assertEquals(self._search("ubu:*&!("), [self.public_image.id])
+        self.assertEquals(
+            self._search("centos workstation"), [self.private_image.id]
+        )
+        self.assertEquals(self._search("ubuntu centos"), [])
+        identifier = str(self.private_machine.instance_source.identifier)
+        self.assertEquals(
+            self._search(identifier[2:10]), [self.private_image.id]
+        )
+
     def test_list_response_contains_expected_fields(self):
         force_authenticate(self.list_request, user=self.user)
         response = self.list_view(self.list_request)
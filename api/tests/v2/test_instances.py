@@ -2,6 +2,8 @@ import uuid
 import mock
 
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from rest_framework.test import APIClient
@@ -91,6 +93,49 @@ class InstanceTests(APITestCase, APISanityTestCase):
             status=networking, activity="", instance=self.networking_instance
         )
 
+    def _list_query_count(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse(self.url_route + "-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEquals(response.status_code, 200)
+        return len(queries), response.data['count']
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        query_count, instance_count = self._list_query_count()
+        active = InstanceStatusFactory.create(name='active')
+        for index in range(5):
+            instance = InstanceFactory.create(
+                name="Another instance %s" % index,
+                provider_alias=uuid.uuid4(),
+                source=self.machine.instance_source,
+                created_by=self.user,
+                created_by_identity=self.user_identity,
+                start_date=timezone.now()
+            )
+            InstanceHistoryFactory.create(
+                status=active, activity="", instance=instance
+            )
+        more_query_count, more_instance_count = self._list_query_count()
+        self.assertEquals(more_instance_count, instance_count + 5)
+        self.assertEquals(more_query_count, query_count)
+
+    def _detail_query_count(self, lookup_value):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse(self.url_route + "-detail", args=(lookup_value, ))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['id'], self.active_instance.id)
+        return len(queries)
+
+    def test_detail_lookup_by_id_or_alias(self):
+        by_id = self._detail_query_count(self.active_instance.id)
+        by_alias = self._detail_query_count(self.active_instance.provider_alias)
+        self.assertEquals(by_id, by_alias)
+
     def test_networking_status_and_activity(self):
         """Will only work with a correct database."""
         client = APIClient()
@@ -1,10 +1,17 @@
 from unittest import skip
+import uuid
 
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
-from api.tests.factories import UserFactory, AnonymousUserFactory
+from api.tests.factories import (
+    UserFactory, AnonymousUserFactory, InstanceFactory, InstanceHistoryFactory,
+    InstanceStatusFactory
+)
 from api.v2.views import ReportingViewSet
+from core.models import Instance, InstanceStatus
+from core.reporting import REPORT_COLUMNS, instance_report
 
 
 class ReportingTests(APITestCase):
@@ -51,6 +58,71 @@ class ReportingTests(APITestCase):
                 'Invalid filter parameters'
             )
 
+    def _create_instance(self, *status_names):
+        instance = InstanceFactory.create(
+            provider_alias=uuid.uuid4(),
+            created_by=self.user,
+            start_date=timezone.now()
+        )
+        for status_name in status_names:
+            status = InstanceStatus.objects.filter(name=status_name).first()
+            if not status:
+                status = InstanceStatusFactory.create(name=status_name)
+            InstanceHistoryFactory.create(status=status, instance=instance)
+        return instance
+
+    def test_instance_report_hit_flags(self):
+        active = self._create_instance('deploy_error', 'active')
+        deploy_error = self._create_instance('networking', 'deploy_error')
+        aborted = self._create_instance('networking')
+        report = instance_report(Instance.objects.filter(created_by=self.user)
+                                ).set_index('id')
+        self.assertEqual(list(report.columns), REPORT_COLUMNS[1:])
+        self.assertTrue(report.loc[active.id, 'hit_active'])
+        self.assertFalse(report.loc[active.id, 'hit_deploy_error'])
+        self.assertTrue(report.loc[deploy_error.id, 'hit_deploy_error'])
+        self.assertEqual(
+            report.loc[deploy_error.id, 'hit_active_or_aborted'], 0
+        )
+        self.assertTrue(report.loc[aborted.id, 'hit_aborted'])
+        self.assertEqual(report.loc[aborted.id, 'hit_active_or_aborted'], 1)
+
+    def test_instance_report_size_without_last_history(self):
+        backfilled = self._create_instance('networking', 'active')
+        not_backfilled = self._create_instance('networking', 'active')
+        # Instances from before `./manage.py instance_last_history`
+        Instance.objects.filter(id=not_backfilled.id).update(
+            last_history=None, last_status=None, last_size=None
+        )
+        report = instance_report(Instance.objects.filter(created_by=self.user)
+                                ).set_index('id')
+        for instance in (backfilled, not_backfilled):
+            size = instance.instancestatushistory_set.order_by(
+                '-start_date', '-id'
+            ).first().size
+            self.assertEqual(report.loc[instance.id, 'size.alias'], size.alias)
+            self.assertEqual(report.loc[instance.id, 'size.cpu'], size.cpu)
+            self.assertEqual(
+                report.loc[instance.id, 'size.uuid'], str(size.uuid)
+            )
+
+    def test_csv_report_is_streamed(self):
+        instance = self._create_instance('active')
+        request = APIRequestFactory().get(
+            reverse('api:v2:reporting-list'), {
+                'username': self.user.username,
+                'format': 'csv'
+            }
+        )
+        force_authenticate(request, user=self.user)
+        response = self.view(request)
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = "".join(response.streaming_content).splitlines()
+        self.assertEqual(lines[0], ",".join(REPORT_COLUMNS))
+        self.assertEqual(len(lines), 2)
+        self.assertIn(str(instance.provider_alias), lines[1])
+
     @skip('skip for now')
     def test_access_invalid_provider(self):
         raise NotImplementedError
@@ -38,5 +38,5 @@ class InstanceHistorySerializer(serializers.ModelSerializer):
         model = Instance
         exclude = (
             'id', 'source', 'provider_alias', 'shell', 'vnc',
-            'created_by_identity'
+            'created_by_identity', 'last_history', 'last_status', 'last_size'
         )
@@ -59,7 +59,7 @@ class InstanceSerializer(serializers.ModelSerializer):
         model = Instance
         exclude = (
             'source', 'provider_alias', 'shell', 'vnc', 'password',
-            'created_by_identity'
+            'created_by_identity', 'last_history', 'last_status', 'last_size'
         )
 
 
@@ -1,4 +1,5 @@
-from django.utils import timezone
+from hashlib import md5
+
 from django.db.models import Q
 from rtwo.exceptions import (
     LibcloudInvalidCredsError, ConnectionFailure, LibcloudBadResponseError
@@ -12,7 +13,7 @@ from core.exceptions import ProviderNotActive
 from core.models import AtmosphereUser as User
 from core.models.allocation_source import AllocationSource
 from core.models.identity import Identity
-from core.models.instance import convert_esh_instance
+from core.models.instance import convert_esh_instance, merge_esh_instances
 from core.models.instance import Instance as CoreInstance
 from core.models.boot_script import _save_scripts_to_instance
 from core.models.tag import Tag as CoreTag
@@ -20,7 +21,7 @@ from core.models.provider import Provider
 
 from service import task
 from service.cache import get_cached_instances,\
-    invalidate_cached_instances
+    get_cached_instances_version, invalidate_cached_instances
 from service.driver import prepare_driver
 from service.exceptions import (
     OverAllocationError,
@@ -48,7 +49,7 @@ from api.exceptions import (
     inactive_provider, size_not_available, mount_failed, over_quota,
     under_threshold, over_capacity, instance_not_found
 )
-from api.pagination import OptionalPagination
+from api.pagination import OptionalKeysetPagination, keyset_order_by
 from api.v1.serializers import InstanceStatusHistorySerializer,\
     InstanceSerializer, InstanceHistorySerializer, VolumeSerializer,\
     TagSerializer
@@ -102,6 +103,24 @@ def get_esh_instance(request, provider_uuid, identity_uuid, instance_id):
     return esh_instance
 
 
+def _instance_list_etag(cache_version, core_instance_list):
+    """
+    Build an ETag from the version of the cached cloud listing and the
+    fields of the core instances that are not part of that listing.
+    """
+    if cache_version is None:
+        return None
+    rows = [
+        (
+            core_instance.id, core_instance.name, core_instance.end_date,
+            core_instance.last_history_id, core_instance.project_id,
+            sorted(tag.id for tag in core_instance.tags.all()),
+            sorted(script.id for script in core_instance.scripts.all())
+        ) for core_instance in core_instance_list
+    ]
+    return '"%s"' % md5(repr((cache_version, rows))).hexdigest()
+
+
 class InstanceList(AuthAPIView):
     """
     Instances are the objects created when you launch a machine. They are
@@ -132,18 +151,28 @@ class InstanceList(AuthAPIView):
             return connection_failure(provider_uuid, identity_uuid)
         except LibcloudInvalidCredsError:
             return invalid_creds(provider_uuid, identity_uuid)
-        core_instance_list = [
-            convert_esh_instance(
-                esh_driver, inst, provider_uuid, identity_uuid, user
-            ) for inst in esh_instance_list
-        ]
-        # TODO: Core/Auth checks for shared instances
-        serialized_data = InstanceSerializer(
-            core_instance_list, context={
-                "request": request
-            }, many=True
-        ).data
-        response = Response(serialized_data)
+        cache_version = get_cached_instances_version(identity=identity)
+        # NOTE: This is a read-only path, the monitoring tasks create
+        # and update the core instances and their history.
+        queryset = CoreInstance.objects.select_related(
+            'created_by', 'created_by_identity__created_by',
+            'created_by_identity__provider', 'project',
+            'source__providermachine__application_version__application'
+        ).prefetch_related('tags', 'scripts')
+        core_instance_list = merge_esh_instances(esh_instance_list, queryset)
+        etag = _instance_list_etag(cache_version, core_instance_list)
+        if etag and request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            # TODO: Core/Auth checks for shared instances
+            serialized_data = InstanceSerializer(
+                core_instance_list, context={
+                    "request": request
+                }, many=True
+            ).data
+            response = Response(serialized_data)
+        if etag:
+            response['ETag'] = etag
         response['Cache-Control'] = 'no-cache'
         return response
 
@@ -246,20 +275,18 @@ class InstanceList(AuthAPIView):
             )
 
 
+def _instance_history_sort_field(sort_by):
+    if 'start_date' in sort_by:
+        return 'start_date'
+    return 'end_date'
+
+
 def _sort_instance_history(history_instance_list, sort_by, descending=False):
-    # Using the 'sort_by' variable, sort the list:
-    if not sort_by or 'end_date' in sort_by:
-        return sorted(
-            history_instance_list,
-            key=lambda ish: ish.end_date if ish.end_date else timezone.now(),
-            reverse=descending
-        )
-    elif 'start_date' in sort_by:
-        return sorted(
-            history_instance_list,
-            key=lambda ish: ish.start_date if ish.start_date else timezone.now(),
-            reverse=descending
-        )
+    # Using the 'sort_by' variable, sort the list in the database.
+    # Running instances (no end_date) are treated as ending 'now'
+    return keyset_order_by(
+        history_instance_list, _instance_history_sort_field(sort_by), descending
+    )
 
 
 def _filter_instance_history(history_instance_list, params):
@@ -286,7 +313,7 @@ def _filter_instance_history(history_instance_list, params):
 
 class InstanceHistory(AuthListAPIView):
     """Instance history for a specific user."""
-    pagination_class = OptionalPagination
+    pagination_class = OptionalKeysetPagination
 
     serializer_class = InstanceHistorySerializer
 
@@ -299,14 +326,18 @@ class InstanceHistory(AuthListAPIView):
         # List of all instances created by user
         sort_by = self.request.query_params.get('sort_by', '')
         order_by = self.request.query_params.get('order_by', 'desc')
+        descending = 'desc' in order_by.lower()
+        self.keyset_ordering = (
+            _instance_history_sort_field(sort_by), descending
+        )
         history_instance_list = CoreInstance.objects.filter(
             created_by=self.request.user
-        ).order_by("-start_date")
+        )
         history_instance_list = _filter_instance_history(
             history_instance_list, self.request.query_params
         )
         history_instance_list = _sort_instance_history(
-            history_instance_list, sort_by, 'desc' in order_by.lower()
+            history_instance_list, sort_by, descending
         )
         return history_instance_list
 
@@ -4,6 +4,12 @@ from api.v2 import views
 
 router = routers.DefaultRouter(trailing_slash=False)
 router.register(r'resource_requests', views.AdminResourceRequestViewSet)
+router.register(
+    r'launch_latency', views.LaunchLatencyViewSet, base_name='launch_latency'
+)
+router.register(
+    r'task_metrics', views.TaskMetricsViewSet, base_name='task_metrics'
+)
 
 urlpatterns = [
     url(r'^', include(router.urls)),
@@ -20,9 +20,14 @@ class AllocationSourceSerializer(serializers.HyperlinkedModelSerializer):
     )
 
     def _get_allocation_source_snapshot(self, allocation_source, attr_name):
-        snapshot = AllocationSourceSnapshot.objects.filter(
-            allocation_source=allocation_source
-        ).first()
+        # Snapshots may be bulk-loaded into the context by list views
+        snapshots = self.context.get('allocation_source_snapshots')
+        if snapshots is not None:
+            snapshot = snapshots.get(allocation_source.id)
+        else:
+            snapshot = AllocationSourceSnapshot.objects.filter(
+                allocation_source=allocation_source
+            ).first()
         if not snapshot:
             return None
         attr = getattr(snapshot, attr_name)
@@ -34,10 +39,14 @@ class AllocationSourceSerializer(serializers.HyperlinkedModelSerializer):
         return self.context['request'].user
 
     def _get_user_allocation_snapshot(self, allocation_source, attr_name):
-        user = self._get_request_user()
-        snapshot = UserAllocationSnapshot.objects.filter(
-            allocation_source=allocation_source, user=user
-        ).first()
+        snapshots = self.context.get('user_allocation_snapshots')
+        if snapshots is not None:
+            snapshot = snapshots.get(allocation_source.id)
+        else:
+            user = self._get_request_user()
+            snapshot = UserAllocationSnapshot.objects.filter(
+                allocation_source=allocation_source, user=user
+            ).first()
         if not snapshot:
             return None
         attr = getattr(snapshot, attr_name)
@@ -35,7 +35,7 @@ class ImageMetricSerializer(serializers.HyperlinkedModelSerializer):
                 "'request' including 'user' to be passed in via serializer "
                 "context! context={'user':user}"
             )
-        # Summarized metrics example
+        # Materialized by the 'refresh_application_metrics' task
         return _get_summarized_application_metrics(application)
 
     class Meta:
@@ -1,6 +1,8 @@
 from core.models import (
-    Project, BootScript, Instance, Application as Image,
-    InstanceAllocationSourceSnapshot
+    Project, BootScript, Instance, InstanceAllocationSourceSnapshot
+)
+from core.models.allocation_source import (
+    AllocationSourceSnapshot, UserAllocationSnapshot
 )
 from rest_framework import serializers
 from core.serializers.fields import ModelRelatedField
@@ -14,6 +16,39 @@ from api.v2.serializers.summaries.image import ImageSuperSummarySerializer
 from api.v2.serializers.fields.base import UUIDHyperlinkedIdentityField
 
 
+def prefetch_instance_context(instances, user):
+    """
+    Bulk-load the allocation snapshots needed to serialize `instances`
+    with a fixed number of queries. The returned dict is meant to be merged
+    into the serializer context, see `InstanceViewSet.list`.
+    """
+    instance_snapshots = {
+        snapshot.instance_id: snapshot
+        for snapshot in InstanceAllocationSourceSnapshot.objects.filter(
+            instance__in=[instance.id for instance in instances]
+        ).select_related('allocation_source')
+    }
+    allocation_source_ids = set(
+        snapshot.allocation_source_id
+        for snapshot in instance_snapshots.values()
+    )
+    allocation_source_snapshots = {
+        snapshot.allocation_source_id: snapshot
+        for snapshot in AllocationSourceSnapshot.objects.
+        filter(allocation_source__in=allocation_source_ids)
+    }
+    user_allocation_snapshots = {
+        snapshot.allocation_source_id: snapshot
+        for snapshot in UserAllocationSnapshot.objects.
+        filter(allocation_source__in=allocation_source_ids, user=user)
+    }
+    return {
+        'instance_allocation_snapshots': instance_snapshots,
+        'allocation_source_snapshots': allocation_source_snapshots,
+        'user_allocation_snapshots': user_allocation_snapshots,
+    }
+
+
 class InstanceSerializer(serializers.HyperlinkedModelSerializer):
     identity = IdentitySummarySerializer(source='created_by_identity')
     user = UserSummarySerializer(source='created_by')
@@ -46,10 +81,16 @@ class InstanceSerializer(serializers.HyperlinkedModelSerializer):
         uuid_field='provider_alias'
     )
 
-    def get_allocation_source(self, instance):
-        snapshot = InstanceAllocationSourceSnapshot.objects.filter(
+    def _get_instance_snapshot(self, instance):
+        snapshots = self.context.get('instance_allocation_snapshots')
+        if snapshots is not None:
+            return snapshots.get(instance.id)
+        return InstanceAllocationSourceSnapshot.objects.filter(
             instance=instance
-        ).first()
+        ).select_related('allocation_source').first()
+
+    def get_allocation_source(self, instance):
+        snapshot = self._get_instance_snapshot(instance)
         if not snapshot:
             return None
         serializer = AllocationSourceSerializer(
@@ -58,10 +99,19 @@ class InstanceSerializer(serializers.HyperlinkedModelSerializer):
         return serializer.data
 
     def get_usage(self, instance):
-        if not instance.allocation_source\
-                or not instance.allocation_source.snapshot:
+        snapshot = self._get_instance_snapshot(instance)
+        if not snapshot:
+            return -1
+        snapshots = self.context.get('allocation_source_snapshots')
+        if snapshots is not None:
+            source_snapshot = snapshots.get(snapshot.allocation_source_id)
+        else:
+            source_snapshot = AllocationSourceSnapshot.objects.filter(
+                allocation_source=snapshot.allocation_source_id
+            ).first()
+        if not source_snapshot:
             return -1
-        return instance.allocation_source.snapshot.compute_used
+        return source_snapshot.compute_used
 
     def get_size(self, obj):
         size = obj.get_size()
@@ -71,8 +121,7 @@ class InstanceSerializer(serializers.HyperlinkedModelSerializer):
     def get_image(self, obj):
         if not obj.source.is_machine():
             return {}
-        image_uuid = obj.application_uuid()
-        image = Image.objects.get(uuid=image_uuid)
+        image = obj.source.providermachine.application_version.application
         serializer = ImageSuperSummarySerializer(image, context=self.context)
         return serializer.data
 
@@ -53,6 +53,8 @@ from .user import UserViewSet
 from .user_allocation_source import UserAllocationSourceViewSet
 from .volume import VolumeViewSet
 from .metric import MetricViewSet
+from .launch_latency import LaunchLatencyViewSet
+from .task_metrics import TaskMetricsViewSet
 from .ssh_key import SSHKeyViewSet
 # This is imported out of abc order because it caused import errors if imported above
 from .access_token import AccessTokenViewSet
@@ -1,3 +1,5 @@
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F
 from django_filters import rest_framework as filters
 from rest_framework.filters import SearchFilter, BaseFilterBackend, OrderingFilter
 
@@ -7,6 +9,9 @@ from api.v2.views.base import AuthOptionalViewSet
 from api.v2.views.mixins import MultipleFieldLookup
 
 from core.models import Application as Image
+from core.models.application_search import (
+    PrefixSearchQuery, SEARCH_CONFIG, search_query
+)
 
 #
 # The following imports and method and monkey patch are a quick fix for a big
@@ -94,6 +99,31 @@ class FeaturedFilterBackend(BaseFilterBackend):
         return queryset
 
 
+class ImageSearchFilter(SearchFilter):
+    """
+    Search the full-text search document of the images (see
+    `core.models.application_search`), every search term must match.
+    Results are ranked unless an explicit ordering is requested.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        conditions = [search_query(term) for term in search_terms]
+        queryset = queryset.filter(reduce(operator.and_, conditions))
+        if OrderingFilter.ordering_param in request.query_params:
+            return queryset
+        rank = SearchRank(
+            F('search_document__document'),
+            PrefixSearchQuery(" ".join(search_terms), config=SEARCH_CONFIG)
+        )
+        return queryset.annotate(search_rank=rank).order_by(
+            F('search_rank').desc(nulls_last=True),
+            *getattr(view, 'ordering', ())
+        )
+
+
 class ImageViewSet(MultipleFieldLookup, AuthOptionalViewSet):
     """
     API endpoint that allows images to be viewed or edited.
@@ -107,16 +137,10 @@ class ImageViewSet(MultipleFieldLookup, AuthOptionalViewSet):
 
     serializer_class = ImageSerializer
     filter_backends = (
-        OrderingFilter, filters.DjangoFilterBackend, SearchFilter,
+        OrderingFilter, filters.DjangoFilterBackend, ImageSearchFilter,
         FeaturedFilterBackend, BookmarkedFilterBackend
     )
     filter_class = ImageFilter
-    search_fields = (
-        'id', 'description', 'name', 'versions__change_log', 'tags__name',
-        'tags__description', 'created_by__username',
-        'versions__machines__instance_source__identifier',
-        'versions__machines__instance_source__provider__location'
-    )
     ordering = ('-end_date', '-start_date')
 
     def get_queryset(self):
@@ -20,4 +20,5 @@ class ImageMetricViewSet(MultipleFieldLookup, AuthOptionalViewSet):
         request_user = self.request.user
         if type(request_user) == AnonymousUser or not request_user.is_staff:
             return Application.objects.none()
-        return Application.images_for_user(request_user)
+        return Application.images_for_user(request_user)\
+            .select_related('metric')
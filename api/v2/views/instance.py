@@ -2,6 +2,7 @@ import django_filters
 from django.db.models import Q
 
 from api.v2.serializers.details import InstanceSerializer, InstanceActionSerializer
+from api.v2.serializers.details.instance import prefetch_instance_context
 from api.v2.serializers.post import InstanceSerializer as POST_InstanceSerializer
 from api.v2.views.base import AuthModelViewSet
 from api.v2.views.mixins import MultipleFieldLookup
@@ -84,11 +85,33 @@ class InstanceViewSet(MultipleFieldLookup, AuthModelViewSet):
             qs = qs.filter(only_current_instances())
         # logger.info("DEBUG- User %s querying for instances, available IDs are:%s" % (user, qs.values_list('id',flat=True)))
         qs = qs.select_related("created_by")\
-            .select_related('created_by_identity')\
-            .select_related('source')\
-            .select_related('project')
+            .select_related('created_by_identity__provider')\
+            .select_related(
+                'source__providermachine__application_version__application'
+            )\
+            .select_related('project__owner', 'project__created_by')\
+            .select_related('last_size')\
+            .prefetch_related('created_by_identity__credential_set')\
+            .prefetch_related('scripts__script_type')
         return qs
 
+    def list(self, request, *args, **kwargs):
+        """
+        Serialize a page of instances with a fixed number of queries,
+        the allocation snapshots are bulk-loaded for the whole page.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        instances = page if page is not None else list(queryset)
+        context = self.get_serializer_context()
+        context.update(prefetch_instance_context(instances, request.user))
+        serializer = self.get_serializer_class()(
+            instances, many=True, context=context
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     @detail_route(methods=['post'])
     def update_metadata(self, request, pk=None):
         """
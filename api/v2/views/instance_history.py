@@ -5,6 +5,7 @@ from django_filters import rest_framework as filters
 
 from core.models import InstanceStatusHistory
 
+from api.pagination import StandardKeysetPagination
 from api.v2.serializers.details import InstanceStatusHistorySerializer
 from api.v2.views.base import AuthReadOnlyViewSet
 from api.v2.views.mixins import MultipleFieldLookup
@@ -40,20 +41,27 @@ class InstanceStatusHistoryViewSet(MultipleFieldLookup, AuthReadOnlyViewSet):
     lookup_fields = ("id", "uuid")
     filter_class = InstanceStatusHistoryFilter
     filter_backends = (OrderingFilter, filters.DjangoFilterBackend)
+    # With `?cursor=`, pages are ordered by -instance__start_date, -id
+    pagination_class = StandardKeysetPagination
+    keyset_ordering = ('instance__start_date', True)
 
     def get_queryset(self):
         """
         Filter out tags for deleted instances
         """
         user_id = self.request.user.id
+        related = (
+            'status', 'instance__source__provider',
+            'instance__source__providermachine__application_version__application'
+        )
 
         if self.request.query_params.get('unique', "").lower() == 'true':
             # filtering distinct instance__start_date effectively gives us a unique instance list. Also the order of fields in distinct()
             # must match the order of fields in ordering set above
             return InstanceStatusHistory.objects.filter(
                 instance__created_by_id=user_id
-            ).distinct('instance__start_date')
+            ).select_related(*related).distinct('instance__start_date')
 
         return InstanceStatusHistory.objects.filter(
             instance__created_by_id=user_id
-        )
+        ).select_related(*related)
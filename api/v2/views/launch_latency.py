@@ -0,0 +1,51 @@
+"""
+Launch latency percentiles, from the launch traces
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from api.permissions import (
+    ApiAuthRequired, CloudAdminRequired, EnabledUserRequired, InMaintenance
+)
+from api.v2.exceptions import failure_response
+
+from core.launch_trace import GROUP_BY, latency_percentiles
+from core.models import LaunchTrace
+
+
+class LaunchLatencyViewSet(GenericViewSet):
+
+    permission_classes = (
+        InMaintenance,
+        CloudAdminRequired,
+        EnabledUserRequired,
+        ApiAuthRequired,
+    )
+
+    queryset = LaunchTrace.objects.all()
+
+    def list(self, *args, **kwargs):
+        """
+        Percentiles of the time between launch stages, in seconds, per
+        `?by=provider|image|size` (default: provider) for the launches of
+        the last `?days=<n>` (default: 7).
+        """
+        params = self.request.query_params
+        group_by = params.get('by', 'provider')
+        if group_by not in GROUP_BY:
+            return failure_response(
+                status.HTTP_400_BAD_REQUEST,
+                "'by' should be one of: %s" % ", ".join(sorted(GROUP_BY))
+            )
+        try:
+            days = int(params.get('days', 7))
+        except ValueError:
+            return failure_response(
+                status.HTTP_400_BAD_REQUEST, "'days' should be a number"
+            )
+        since = timezone.now() - timedelta(days=days)
+        return Response(latency_percentiles(group_by, since=since))
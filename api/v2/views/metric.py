@@ -10,7 +10,7 @@ from api import permissions
 from api.v2.exceptions import failure_response
 
 from core.models import Instance
-from core.metrics.instance import get_instance_metrics
+from core.metrics.instance import get_instance_metrics, get_instances_metrics
 from threepio import logger
 
 
@@ -29,10 +29,6 @@ class MetricViewSet(GenericViewSet):
             return self.queryset
         return Instance.objects.filter(created_by=self.request.user)
 
-    def get_key(self, instance, params):
-        inputs = [instance.provider_alias] + params.values()
-        return ":".join(map(str, inputs))
-
     def retrieve(self, *args, **kwargs):
         instance = self.get_object()
         params = self.request.query_params
@@ -42,3 +38,23 @@ class MetricViewSet(GenericViewSet):
             logger.exception("Failed to retrieve instance metrics")
             return failure_response(status.HTTP_409_CONFLICT, str(exc.message))
         return Response(instance_metrics)
+
+    def list(self, *args, **kwargs):
+        """
+        Metrics of every instance passed with `?instance=<uuid>`, fetched
+        with batched requests to the metrics server.
+        """
+        params = self.request.query_params
+        aliases = params.getlist('instance')
+        if not aliases:
+            return failure_response(
+                status.HTTP_400_BAD_REQUEST,
+                "Pass at least one instance, '?instance=<uuid>'"
+            )
+        instances = self.get_queryset().filter(provider_alias__in=aliases)
+        try:
+            instance_metrics = get_instances_metrics(instances, params)
+        except Exception as exc:
+            logger.exception("Failed to retrieve instance metrics")
+            return failure_response(status.HTTP_409_CONFLICT, str(exc.message))
+        return Response(instance_metrics)
@@ -5,59 +5,88 @@ from django.db.models import Q
 from django.http import Http404
 from rest_framework.generics import get_object_or_404
 
+from core import identity_map
+
 
 class MultipleFieldLookup(object):
     lookup_fields = None
 
+    #: (model, lookup_fields) -> [(field_name, field)], shared by every view
+    _lookup_field_cache = {}
+
+    VALID_FIELDS = {
+        identity_map.INT_IDENTIFIER:
+            (models.AutoField, models.IntegerField, models.BigIntegerField),
+        identity_map.UUID_IDENTIFIER:
+            (models.UUIDField, models.CharField, models.TextField),
+    # Non-uuid strings would fail the validation of an UUIDField
+        identity_map.STRING_IDENTIFIER: (models.CharField, models.TextField),
+    }
+
     def get_object(self):
-        # NOTE: 'distinct()' required to avoid failing on AnonymousUser access
-        # specifically, in the 'v2/images/##' URL endpoint
-        queryset = self.filter_queryset(self.get_queryset()).distinct()
         #: field to perform lookup with
         lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
 
         #: kwarg value to lookup
         filter_value = self.kwargs[lookup_url_kwarg]
 
+        # Actions that call get_object() more than once only query once
+        cached = getattr(self, '_lookup_object', None)
+        if cached is not None and cached[0] == filter_value:
+            return cached[1]
+
+        # NOTE: 'distinct()' required to avoid failing on AnonymousUser access
+        # specifically, in the 'v2/images/##' URL endpoint
+        queryset = self.filter_queryset(self.get_queryset()).distinct()
+
         #: determine the value of the field
-        if isinstance(filter_value, int) or filter_value.isdecimal():
-            VALID_FIELDS = (
-                models.AutoField, models.IntegerField, models.BigIntegerField
-            )
-        else:
-            VALID_FIELDS = (
-                models.UUIDField, models.CharField, models.TextField
-            )
+        valid_fields = self.VALID_FIELDS[identity_map.
+                                         identifier_kind(filter_value)]
+        filter_fields = [
+            field_name
+            for field_name, field in self._get_lookup_fields(queryset.model)
+            if isinstance(field, valid_fields)
+        ]
 
+        query_list = [Q(**{f: filter_value}) for f in filter_fields]
+        try:
+            filter_chain = reduce(operator.or_, query_list)
+        except TypeError:
+            raise Http404
+        obj = get_object_or_404(queryset, filter_chain)
+        self.check_object_permissions(self.request, obj)
+        self._lookup_object = (filter_value, obj)
+        for field_name in filter_fields:
+            value = getattr(obj, field_name, None)
+            if unicode(value) == unicode(filter_value):
+                identity_map.add(obj, field_name, filter_value)
+        return obj
+
+    def _get_lookup_fields(self, model):
         assert self.lookup_fields is not None, (
             "%s must define the attribute `lookup_fields`." %
             self.__class__.__name__
         )
+        cache_key = (model, tuple(self.lookup_fields))
+        if cache_key in self._lookup_field_cache:
+            return self._lookup_field_cache[cache_key]
 
-        filter_fields = []
+        lookup_fields = []
         for field_name in self.lookup_fields:
             try:
                 if '.' not in field_name and '__' not in field_name:
-                    field = queryset.model._meta.get_field(field_name)
+                    field = model._meta.get_field(field_name)
                 else:
                     #NOTE: This allows for 'x__y' or 'x.y' support
                     field_split_list = field_name.replace('__', '.').split('.')
-                    field = queryset.model._meta.get_field(field_split_list[0])
+                    field = model._meta.get_field(field_split_list[0])
                     for n_field in field_split_list[1:]:
                         field = field.related_model._meta.get_field(n_field)
             except models.FieldDoesNotExist:
                 raise Exception(
                     "The lookup field `%s` does not exist for the model %s." %
-                    (field_name, queryset.model.__name__)
+                    (field_name, model.__name__)
                 )
-            if isinstance(field, VALID_FIELDS):
-                filter_fields.append(field_name)
-
-        query_list = [Q(**{f: filter_value}) for f in filter_fields]
-        try:
-            filter_chain = reduce(operator.or_, query_list)
-        except TypeError:
-            raise Http404
-        obj = get_object_or_404(queryset, filter_chain)
-        self.check_object_permissions(self.request, obj)
-        return obj
+            lookup_fields.append((field_name, field))
+        self._lookup_field_cache[cache_key] = lookup_fields
+        return lookup_fields
@@ -8,13 +8,20 @@ from dateutil.parser import parse
 from django.db.models import Q
 from rest_framework import exceptions
 from rest_framework import status
+from rest_framework.reverse import reverse
 from rest_framework.settings import api_settings
 
-from api.renderers import PandasExcelRenderer, CSVRenderer
+from api.renderers import (
+    PandasExcelRenderer, CSVRenderer, csv_streaming_response,
+    excel_file_response
+)
 from api.v2.exceptions import failure_response
 from api.v2.serializers.details import InstanceReportingSerializer
 from api.v2.views.base import AuthModelViewSet
 from core.models import Instance
+from core.reporting import (
+    REPORT_COLUMNS, instance_report, iter_instance_report
+)
 
 
 class ReportingViewSet(AuthModelViewSet):
@@ -43,29 +50,13 @@ class ReportingViewSet(AuthModelViewSet):
         else:
             filename = 'instance_reporting.xlsx'
         return {
-            'view':
-                self,
-            'args':
-                getattr(self, 'args', ()),
-            'kwargs':
-                getattr(self, 'kwargs', {}),
-            'request':
-                request,
-            'filename':
-                filename,
-            'excel_writer_hook':
-                self.create_excel_file,
-            'headers_ordering':
-                [
-                    "id", "instance_id", "username", "staff_user", "provider",
-                    "start_date", "end_date", "image_name", "version_name",
-                    "size.active", "size.start_date", "size.end_date",
-                    "size.name", "size.id", "size.uuid", "size.url",
-                    "size.alias", "size.cpu", "size.mem", "size.disk",
-                    "is_featured_image", "hit_active", "hit_deploy_error",
-                    "hit_error", "hit_aborted", "hit_active_or_aborted",
-                    "hit_active_or_aborted_or_error"
-                ],
+            'view': self,
+            'args': getattr(self, 'args', ()),
+            'kwargs': getattr(self, 'kwargs', {}),
+            'request': request,
+            'filename': filename,
+            'excel_writer_hook': self.create_excel_file,
+            'headers_ordering': REPORT_COLUMNS,
         }
 
     def set_frequency(self):
@@ -98,12 +89,10 @@ class ReportingViewSet(AuthModelViewSet):
 
     @staticmethod
     def _create_datasets(raw_dataframe, frequency):
-        raw_dataframe['start_date'] = raw_dataframe['start_date'].apply(
-            pd.to_datetime
-        )
-        raw_dataframe['end_date'] = raw_dataframe['end_date'].apply(
-            pd.to_datetime
+        raw_dataframe['start_date'] = pd.to_datetime(
+            raw_dataframe['start_date']
         )
+        raw_dataframe['end_date'] = pd.to_datetime(raw_dataframe['end_date'])
 
         # Create some new tables
         global_summary_data = raw_dataframe.set_index('start_date').query(
@@ -336,7 +325,12 @@ class ReportingViewSet(AuthModelViewSet):
                 "The reporting API should be accessed via the query parameters:"
                 " ['start_date', 'end_date', 'provider_id']"
             )
+        renderer_format = getattr(request.accepted_renderer, 'format', None)
         try:
+            if renderer_format == PandasExcelRenderer.format:
+                return self.excel_report()
+            if renderer_format == CSVRenderer.format:
+                return self.csv_report()
             results = super(ReportingViewSet,
                             self).list(request, *args, **kwargs)
         except ValueError:
@@ -344,3 +338,38 @@ class ReportingViewSet(AuthModelViewSet):
                 status.HTTP_400_BAD_REQUEST, 'Invalid filter parameters'
             )
         return results
+
+    def _size_url(self, size_uuid):
+        return reverse(
+            'api:v2:size-detail',
+            kwargs={'pk': size_uuid},
+            request=self.request
+        )
+
+    def excel_report(self):
+        """
+        Build the report straight from the database columns (see
+        `core.reporting`) rather than through the serializer
+        """
+        context = self.get_renderer_context()
+        raw_dataframe = instance_report(
+            self.get_queryset(), size_url=self._size_url
+        )
+        response = excel_file_response(
+            raw_dataframe, context['excel_writer_hook']
+        )
+        response['Content-Disposition'
+                ] = 'attachment; filename="%s"' % context['filename']
+        return response
+
+    def csv_report(self):
+        """
+        Stream the report as CSV, a chunk of instances at a time
+        """
+        filename = self.request.query_params.get(
+            'filename', 'instance_reporting.csv'
+        )
+        return csv_streaming_response(
+            iter_instance_report(self.get_queryset(), size_url=self._size_url),
+            REPORT_COLUMNS, filename
+        )
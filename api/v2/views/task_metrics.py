@@ -0,0 +1,55 @@
+"""
+Celery queue depths and task metrics
+"""
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+import redis
+
+from api.permissions import (
+    ApiAuthRequired, CloudAdminRequired, EnabledUserRequired, InMaintenance
+)
+from api.v2.exceptions import failure_response
+
+from core.task_metrics import counter_report, queue_depths, task_report
+from threepio import logger
+
+
+class TaskMetricsViewSet(GenericViewSet):
+
+    permission_classes = (
+        InMaintenance,
+        CloudAdminRequired,
+        EnabledUserRequired,
+        ApiAuthRequired,
+    )
+
+    def list(self, *args, **kwargs):
+        """
+        Messages waiting in each queue, the runs, retries, failures, queue
+        wait and runtime of every task and the other counters (ex: network
+        sessions) over the last `?hours=<n>` (default: 1, the current hour).
+        """
+        try:
+            hours = int(self.request.query_params.get('hours', 1))
+        except ValueError:
+            return failure_response(
+                status.HTTP_400_BAD_REQUEST, "'hours' should be a number"
+            )
+        if hours < 1:
+            return failure_response(
+                status.HTTP_400_BAD_REQUEST, "'hours' should be at least 1"
+            )
+        try:
+            return Response(
+                {
+                    "queues": queue_depths(),
+                    "tasks": task_report(hours),
+                    "counters": counter_report(hours)
+                }
+            )
+        except redis.exceptions.ConnectionError as exc:
+            logger.exception("Failed to read the task metrics")
+            return failure_response(
+                status.HTTP_503_SERVICE_UNAVAILABLE, str(exc)
+            )
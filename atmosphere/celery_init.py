@@ -41,3 +41,6 @@ from kombu import serialization
 serialization.registry._disabled_content_types.discard(
     u'application/x-python-serialize'
 )
+
+# Record the queue wait, runtime, retries and result size of the tasks
+import core.task_metrics    # noqa
@@ -22,6 +22,12 @@ class PredeclareRouter(object):
                 queue(channel).declare()
 
 
+#: Queues the tasks are routed to
+QUEUES = [
+    "default", "periodic", "fast_deploy", "ssh_deploy", "imaging", "email",
+    "celery"
+]
+
 DEPLOY_TASKS = [
     "_deploy_instance", "_deploy_instance_for_user", "check_web_desktop_task",
     "_deploy_init_to", "service.tasks.driver._deploy_init_to",
@@ -29,10 +35,12 @@ DEPLOY_TASKS = [
     "check_process_task", "service.tasks.driver.check_process_task",
     "check_volume_task", "service.tasks.volume.check_volume_task",
     "mount_volume_task", "service.tasks.volume.mount_volume_task",
-    "unmount_volume_task", "service.tasks.volume.unmount_volume_task"
+    "unmount_volume_task", "service.tasks.volume.unmount_volume_task",
+    "run_user_deploy_batch"
 ]
 EMAIL_TASKS = [
     "send_email",
+    "send_email_batch",
     "core.tasks.email.send_email",
 ]
 IMAGING_TASKS = [
@@ -67,8 +75,14 @@ PERIODIC_TASKS = [
     "update_membership_for",
     "clear_empty_ips",
     "clear_empty_ips_for",
+    "clear_empty_ips_for_provider",
     "remove_empty_networks",
     "remove_empty_networks_for",
+    "watch_all_pending_instances",
+    "watch_all_argo_workflows",
+    "refresh_application_metrics",
+    "refresh_application_search",
+    "flush_launch_traces",
     #JETSTREAM_SPECIFIC PERIODIC TASKS
     "report_allocations_to_tas",
     "update_snapshot",
@@ -80,6 +94,9 @@ PERIODIC_TASKS = [
 ]
 SHORT_TASKS = [
     "wait_for_instance",
+    "wait_for_instance_event",
+    "watch_pending_instances",
+    "watch_argo_workflows",
 ]
 
 
@@ -100,16 +117,7 @@ class CloudRouter(PredeclareRouter):
     def route_for_task(self, task, *args, **kwargs):
         super(CloudRouter, self).route_for_task(task, *args, **kwargs)
         the_route = self.prepare_route(task)
-        if the_route:
-            logger.info(
-                "ROUTE: Assigning Route %s for Celery AsyncTask: %r %r %r" %
-                (the_route, task, args, kwargs)
-            )
-        else:
-            logger.info(
-                "ROUTE: Assigning Route Default for Celery AsyncTask: %r %r %r"
-                % (task, args, kwargs)
-            )
+        logger.debug("ROUTE: Assigning Route %s for TASK:%s", the_route, task)
         return the_route
 
     def prepare_route(self, task_name):
@@ -124,7 +132,7 @@ class CloudRouter(PredeclareRouter):
         elif task_name in DEPLOY_TASKS:
             return {"queue": "ssh_deploy", "routing_key": "long.deployment"}
         else:
-            logger.info(
-                "ROUTE: Could not place a routing key for TASK:%s" % task_name
+            logger.debug(
+                "ROUTE: Could not place a routing key for TASK:%s", task_name
             )
             return {"queue": "default", "routing_key": "default"}
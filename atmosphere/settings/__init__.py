@@ -119,6 +119,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'atmosphere.slash_middleware.RemoveSlashMiddleware',
     'atmosphere.slash_middleware.RemoveCSRFMiddleware',
+    'core.identity_map.IdentityMapMiddleware',
 )
 
 ROOT_URLCONF = 'atmosphere.urls'
@@ -413,10 +414,22 @@ CELERYD_SEND_EVENTS = True
 
 CELERY_ACCEPT_CONTENT = [
     'pickle',
+    'json',
+    'msgpack',
 ]
 CELERY_TASK_SERIALIZER = "pickle"
 CELERY_RESULT_SERIALIZER = "pickle"
 CELERY_EVENT_SERIALIZER = "pickle"
+# Serializer of the tasks taking ids instead of objects (core.task_payload)
+TASK_PAYLOAD_SERIALIZER = "json"
+# Record the queue wait, runtime and retries of tasks (core.task_metrics),
+# kept for TASK_METRICS_RETENTION hours
+TASK_METRICS_ENABLED = True
+TASK_METRICS_RETENTION = 48
+# Task name -> overrides of the policy of the periodic provider tasks, e.g.
+# {"monitor_sizes_for": {"policy": "coalesce", "backoff": 2}}
+# (see service.periodic)
+PERIODIC_RUN_POLICIES = {}
 
 # Related to Broker and ResultBackend
 REDIS_CONNECT_RETRY = True
@@ -505,6 +518,65 @@ CELERYBEAT_SCHEDULE = {
                 "expires": 60 * 60
             }
         },
+    "watch_all_pending_instances":
+        {
+            "task": "watch_all_pending_instances",
+            "schedule": timedelta(minutes=5),
+            "options": {
+                "expires": 5 * 60,
+                "time_limit": 60
+            }
+        },
+    "watch_all_argo_workflows":
+        {
+            "task": "watch_all_argo_workflows",
+            "schedule": timedelta(minutes=5),
+            "options": {
+                "expires": 5 * 60,
+                "time_limit": 60
+            }
+        },
+    "refresh_application_metrics":
+        {
+            "task": "refresh_application_metrics",
+            "schedule": timedelta(minutes=60),
+            "options": {
+                "expires": 10 * 60,
+                "time_limit": 10 * 60
+            }
+        },
+    "refresh_application_metrics_full":
+        {
+            "task": "refresh_application_metrics",
+    # Every day of the week @ 2am, recount the launches of every application
+    # (catches deleted instances and rows committed behind the watermark)
+            "schedule": crontab(hour="2", minute="0", day_of_week="*"),
+            "kwargs": {
+                "full": True
+            },
+            "options": {
+                "expires": 60 * 60,
+                "time_limit": 30 * 60
+            }
+        },
+    "refresh_application_search":
+        {
+            "task": "refresh_application_search",
+            "schedule": timedelta(minutes=60),
+            "options": {
+                "expires": 10 * 60,
+                "time_limit": 10 * 60
+            }
+        },
+    "flush_launch_traces":
+        {
+            "task": "flush_launch_traces",
+            "schedule": timedelta(minutes=1),
+            "options": {
+                "expires": 60,
+                "time_limit": 60
+            }
+        },
 }
 
 #     # Django-Celery Development settings
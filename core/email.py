@@ -15,7 +15,7 @@ from django.conf import settings
 from core.models import MachineRequest, EmailTemplate
 
 from django_cyverse_auth.protocol.ldap import lookupEmail as ldapLookupEmail, lookupUser
-from core.tasks import send_email
+from core.tasks import send_email, send_email_batch
 
 
 def get_email_template():
@@ -204,25 +204,45 @@ def email_admin(subject, body, sender):
     return True
 
 
+def admin_email_message(username, subject, body, html=False):
+    """
+    Returns the keyword arguments of `send_email` for a standard
+    Atmosphere admin email from admins to a user.
+    """
+    user_email, user_name = user_email_info(username)[1:]
+    sender = email_address_str(*settings.ATMO_DAEMON)
+    return {
+        "subject": subject,
+        "body": body,
+        "from_email": sender,
+        "to": [email_address_str(user_name, user_email)],
+        "cc": [sender],
+        "html": html
+    }
+
+
 def email_from_admin(username, subject, body, html=False):
     """ Use user, subject and body to build and send a standard
         Atmosphere admin email from admins to a user.
         Returns True on success and False on failure.
     """
-    user_email, user_name = user_email_info(username)[1:]
-    sender = email_address_str(*settings.ATMO_DAEMON)
-    celery_task = send_email.si(
-        subject,
-        body,
-        from_email=sender,
-        to=[email_address_str(user_name, user_email)],
-        cc=[sender],
-        html=html
-    )
+    message = admin_email_message(username, subject, body, html=html)
+    celery_task = send_email.si(**message)
     celery_task.delay()    # Task executes here
     return True
 
 
+def send_emails(messages):
+    """
+    Send many emails (keyword arguments of `send_email`) in batches sharing
+    one SMTP connection, instead of one task and connection per email.
+    """
+    messages = list(messages)
+    if messages:
+        send_email_batch.delay(messages)
+    return len(messages)
+
+
 def send_approved_resource_email(user, request, reason):
     """
     Notify the user the that their request has been approved.
@@ -349,6 +369,24 @@ def send_allocation_usage_email(
 ):
     """
     Sends an email to the user to inform them that their Usage has hit a predefined checkpoint.
+    """
+    message = allocation_usage_email_message(
+        user, allocation_source, threshold, usage_percentage, user_compute_used
+    )
+    send_email.si(**message).delay()
+    return True
+
+
+def allocation_usage_email_message(
+    user,
+    allocation_source,
+    threshold,
+    usage_percentage,
+    user_compute_used=None
+):
+    """
+    Returns the keyword arguments of `send_email` for the email informing
+    the user that their Usage has hit a predefined checkpoint.
     #TODO: Version 2.0 -- The event-sending becomes async (CELERY!)
     #TODO: In version 2.0 we add a 1sec delay before firing this task/listener and allow `allocation_source_snapshot` to be created.
     #TODO: Use the values in `allocation_source_snapshot` and possibly the `TASAPIDriver` to inform the user of more relevant details!
@@ -385,7 +423,7 @@ def send_allocation_usage_email(
     }
     body = render_to_string("core/email/allocation_warning.html", context)
     subject = '(%s) Jetstream Allocation Usage Notice' % username
-    return email_from_admin(user.username, subject, body)
+    return admin_email_message(user.username, subject, body)
 
 
 def send_preemptive_deploy_failed_email(core_instance, message):
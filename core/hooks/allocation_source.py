@@ -124,11 +124,41 @@ def listen_for_allocation_threshold_met(sender, instance, created, **kwargs):
     if not source:
         return None
     users = AtmosphereUser.for_allocation_source(source.name)
+    send_usage_emails_to(
+        users, source, threshold, usage_percentage=usage_percentage
+    )
 
-    for user in users:
-        send_usage_email_to(
-            user, source, threshold, usage_percentage=usage_percentage
+
+def send_usage_emails_to(users, source, threshold, usage_percentage=None):
+    """
+    Send the usage email to every user of `users` in batches
+    (`core.tasks.send_email_batch`)
+    """
+    from core.email import allocation_usage_email_message, send_emails
+    if not usage_percentage:
+        usage_percentage = int(
+            source.snapshot.compute_used / source.snapshot.compute_allowed * 100
         )
+    compute_used = dict(
+        UserAllocationSnapshot.objects.filter(
+            allocation_source=source, user__in=users
+        ).order_by('id').values_list('user_id', 'compute_used')
+    )
+    messages = []
+    for user in users:
+        try:
+            messages.append(
+                allocation_usage_email_message(
+                    user,
+                    source,
+                    threshold,
+                    usage_percentage,
+                    user_compute_used=compute_used.get(user.id)
+                )
+            )
+        except Exception:
+            logger.exception("Could not send a usage email to user %s" % user)
+    return send_emails(messages)
 
 
 def send_usage_email_to(user, source, threshold, usage_percentage=None):
@@ -0,0 +1,90 @@
+"""
+Per-request identity map of model instances resolved by identifier.
+
+While a request is handled by `IdentityMapMiddleware`, looking the same
+object up twice (e.g. `MultipleFieldLookup.get_object` followed by
+`find_instance` in an instance action) returns the object loaded the first
+time instead of querying again. Outside of a request (celery tasks,
+management commands) the map is inactive and every lookup queries.
+"""
+import re
+import threading
+import uuid
+
+_local = threading.local()
+
+INT_IDENTIFIER = "int"
+UUID_IDENTIFIER = "uuid"
+STRING_IDENTIFIER = "string"
+
+_UUID_RE = re.compile(
+    r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$",
+    re.IGNORECASE
+)
+
+
+def identifier_kind(value):
+    """
+    Returns:
+        str: INT_IDENTIFIER for primary keys, UUID_IDENTIFIER for uuids and
+        STRING_IDENTIFIER for anything else (names, cloud aliases...)
+    """
+    if isinstance(value, (int, long)):
+        return INT_IDENTIFIER
+    if isinstance(value, uuid.UUID):
+        return UUID_IDENTIFIER
+    value = unicode(value)
+    if value.isdecimal():
+        return INT_IDENTIFIER
+    if _UUID_RE.match(value):
+        return UUID_IDENTIFIER
+    return STRING_IDENTIFIER
+
+
+def activate():
+    _local.objects = {}
+
+
+def deactivate():
+    _local.objects = None
+
+
+def is_active():
+    return getattr(_local, "objects", None) is not None
+
+
+def _key(model, field, value):
+    return (model._meta.label_lower, field, unicode(value))
+
+
+def get(model, field, value):
+    """
+    Returns:
+        the object of `model` previously resolved with `field`=`value`
+        during this request, or None
+    """
+    if not is_active():
+        return None
+    return _local.objects.get(_key(model, field, value))
+
+
+def add(obj, field, value):
+    if is_active() and obj is not None:
+        _local.objects[_key(obj.__class__, field, value)] = obj
+    return obj
+
+
+class IdentityMapMiddleware(object):
+    """
+    Keep the identity map for the duration of each request
+    """
+
+    def process_request(self, request):
+        activate()
+
+    def process_response(self, request, response):
+        deactivate()
+        return response
+
+    def process_exception(self, request, exception):
+        deactivate()
@@ -0,0 +1,80 @@
+"""
+Cache of the ids of the images (applications) each user can see.
+
+`Application.images_for_user` used to join through versions, machines,
+instance sources and providers on every image list request. The ids it
+resolves to are kept in redis, one entry per user plus one shared entry
+for anonymous users, so list endpoints start from an `id__in` filter.
+
+Any change to images, their versions/machines/sources, providers,
+identities or memberships bumps a version number which invalidates every
+entry at once. Entries also expire after `IMAGE_VISIBILITY_CACHE_DURATION`
+seconds, so images reaching their start or end date show up/disappear.
+"""
+import cPickle as pickle
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+import redis
+from threepio import logger
+
+VERSION_KEY = "image_visibility.version"
+VISIBLE_KEY = "image_visibility.{0}.{1}"
+PUBLIC = "public"
+
+
+def _cache_duration():
+    return getattr(settings, 'IMAGE_VISIBILITY_CACHE_DURATION', 5 * 60)
+
+
+def visible_image_ids(user_key, compute):
+    """
+    Args:
+        user_key: identifies the user (and their role), or `PUBLIC`
+        compute (callable): returns the visible image ids when not cached
+
+    Returns:
+        list: ids of the images visible to `user_key`
+    """
+    from service.cache import redis_connection
+    try:
+        r = redis_connection()
+        version = r.get(VERSION_KEY) or "0"
+        key = VISIBLE_KEY.format(version, user_key)
+        cached = r.get(key)
+        if cached:
+            return pickle.loads(cached)
+        image_ids = list(compute())
+        r.set(key, pickle.dumps(image_ids), ex=_cache_duration())
+        return image_ids
+    except redis.exceptions.ConnectionError:
+        logger.exception("Could not reach redis to cache image visibility")
+        return list(compute())
+
+
+def invalidate():
+    """
+    Drop the visible images of every user
+    """
+    from service.cache import redis_connection
+    try:
+        redis_connection().incr(VERSION_KEY)
+    except redis.exceptions.ConnectionError:
+        logger.warn("Could not reach redis to invalidate image visibility")
+
+
+def invalidate_on_change(sender, **kwargs):
+    # Once more after commit, in case the old ids were cached in between
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+for _sender in (
+    'core.Application', 'core.ApplicationVersion', 'core.ProviderMachine',
+    'core.InstanceSource', 'core.Provider', 'core.Identity',
+    'core.GroupMembership', 'core.IdentityMembership',
+    'core.ApplicationVersionMembership', 'core.ProviderMachineMembership'
+):
+    post_save.connect(invalidate_on_change, sender=_sender)
+    post_delete.connect(invalidate_on_change, sender=_sender)
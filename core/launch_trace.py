@@ -0,0 +1,194 @@
+"""
+Launch latency tracing.
+
+Each stage an instance launch goes through (see `core.models.launch_trace`)
+is appended to a capped redis list by `record_stage`, which is cheap enough
+for the launch path. The periodic `flush_launch_traces` task moves the
+buffer into the `LaunchTrace` table, one row per instance, and
+`latency_percentiles` reports the time between stages per provider, image
+or size.
+"""
+from collections import OrderedDict
+import json
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import numpy as np
+import pandas as pd
+import pytz
+import redis
+from threepio import logger
+
+from core.models.launch_trace import (
+    DEPLOYED, LAUNCHED, NETWORKING, REQUESTED, STAGES, VALIDATED, LaunchTrace
+)
+
+BUFFER_KEY = "launch_trace.buffer"
+
+#: Latencies reported by `latency_percentiles`: name -> (from, to) stage
+LATENCIES = OrderedDict(
+    [
+        ("request_to_validate", (REQUESTED, VALIDATED)),
+        ("request_to_launch", (REQUESTED, LAUNCHED)),
+        ("launch_to_networking", (LAUNCHED, NETWORKING)),
+        ("launch_to_deploy", (LAUNCHED, DEPLOYED)),
+        ("request_to_deploy", (REQUESTED, DEPLOYED)),
+    ]
+)
+
+#: Columns `latency_percentiles` can group by
+GROUP_BY = {
+    "provider": "provider__location",
+    "image": "image",
+    "size": "size",
+}
+
+_DETAILS = ("username", "provider_id", "image", "size")
+
+_EPOCH = timezone.datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+
+def _buffer_size():
+    return getattr(settings, 'LAUNCH_TRACE_BUFFER_SIZE', 10000)
+
+
+def record_stage(instance_alias, stage, timestamp=None, **details):
+    """
+    Record that the launch of `instance_alias` reached `stage`.
+
+    Args:
+        timestamp (datetime, optional): when, default: now
+        details: username, provider_id, image and/or size of the launch
+    """
+    if stage not in STAGES:
+        raise ValueError("Unknown launch stage: %s" % stage)
+    record = dict(
+        (key, value) for key, value in details.items() if key in _DETAILS
+    )
+    record.update(
+        {
+            "alias": str(instance_alias),
+            "stage": stage,
+            "timestamp": (timestamp or timezone.now()).isoformat()
+        }
+    )
+    from service.cache import redis_connection
+    try:
+        pipe = redis_connection().pipeline()
+        pipe.rpush(BUFFER_KEY, json.dumps(record))
+        # Keep the newest records if nothing flushes the buffer
+        pipe.ltrim(BUFFER_KEY, -_buffer_size(), -1)
+        pipe.execute()
+    except redis.exceptions.RedisError:
+        # Tracing must never break a launch
+        logger.exception("Could not record launch %s in redis", record)
+
+
+def _drain():
+    from service.cache import redis_connection
+    pipe = redis_connection().pipeline()
+    pipe.lrange(BUFFER_KEY, 0, -1)
+    pipe.delete(BUFFER_KEY)
+    records, _ = pipe.execute()
+    return [json.loads(record) for record in records]
+
+
+def _merge(trace, record):
+    """
+    Returns:
+        bool: whether `record` changed `trace`. The first time a stage is
+        reached wins.
+    """
+    changed = False
+    timestamp = parse_datetime(record["timestamp"])
+    if getattr(trace, record["stage"]) is None:
+        setattr(trace, record["stage"], timestamp)
+        changed = True
+    for key in _DETAILS:
+        if record.get(key) and not getattr(trace, key):
+            setattr(trace, key, record[key])
+            changed = True
+    return changed
+
+
+def flush():
+    """
+    Move the recorded stages from redis into `LaunchTrace`
+
+    Returns:
+        int: number of records flushed
+    """
+    records = _drain()
+    if not records:
+        return 0
+    aliases = set(record["alias"] for record in records)
+    traces = dict(
+        (trace.instance_alias, trace)
+        for trace in LaunchTrace.objects.filter(instance_alias__in=aliases)
+    )
+    created = {}
+    changed = set()
+    for record in records:
+        alias = record["alias"]
+        trace = traces.get(alias) or created.get(alias)
+        if trace is None:
+            trace = created[alias] = LaunchTrace(instance_alias=alias)
+        if _merge(trace, record) and alias in traces:
+            changed.add(alias)
+    LaunchTrace.objects.bulk_create(created.values())
+    for alias in changed:
+        traces[alias].save()
+    return len(records)
+
+
+def _seconds(value):
+    return (value - _EPOCH).total_seconds() if value else np.nan
+
+
+def latency_percentiles(
+    group_by="provider", since=None, percentiles=(50, 90, 99)
+):
+    """
+    Args:
+        group_by (str): one of GROUP_BY
+        since (datetime, optional): only the launches created since then
+        percentiles (tuple): percentiles to report
+
+    Returns:
+        list: one dict per group with the group, the number of launches and,
+        for each of LATENCIES, the percentiles of the latency in seconds
+    """
+    column = GROUP_BY[group_by]
+    queryset = LaunchTrace.objects.all()
+    if since:
+        queryset = queryset.filter(created__gte=since)
+    frame = pd.DataFrame.from_records(
+        [
+            (row[0], ) + tuple(_seconds(value) for value in row[1:])
+            for row in queryset.values_list(column, *STAGES)
+        ],
+        columns=["group"] + list(STAGES)
+    )
+    if frame.empty:
+        return []
+    for name, (start, end) in LATENCIES.items():
+        frame[name] = frame[end] - frame[start]
+    frame["group"] = frame["group"].fillna("Unknown")
+
+    results = []
+    for group, rows in frame.groupby("group"):
+        result = OrderedDict([(group_by, group), ("launches", len(rows))])
+        for name in LATENCIES:
+            latencies = rows[name].dropna()
+            result[name] = OrderedDict(
+                [("count", len(latencies))] + [
+                    (
+                        "p%s" % percentile,
+                        round(float(np.percentile(latencies, percentile)), 3)
+                        if len(latencies) else None
+                    ) for percentile in percentiles
+                ]
+            )
+        results.append(result)
+    return results
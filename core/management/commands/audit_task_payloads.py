@@ -0,0 +1,108 @@
+import base64
+from collections import defaultdict
+import json
+import pickletools
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import redis
+
+from atmosphere.celery_router import QUEUES
+
+
+def _message_body(message):
+    body = message.get("body", "")
+    if message.get("properties", {}).get("body_encoding") == "base64":
+        body = base64.b64decode(body)
+    return body
+
+
+def _pickled_classes(body):
+    """
+    Returns:
+        set: "module.name" of the classes in a pickled message body
+    """
+    classes = set()
+    try:
+        for opcode, arg, _ in pickletools.genops(body):
+            if opcode.name == "GLOBAL":
+                classes.add(arg.replace(" ", "."))
+    except Exception:
+        pass
+    return classes
+
+
+def audit_messages(messages):
+    """
+    Args:
+        messages: raw (json) messages of the redis broker
+
+    Returns:
+        dict: (task name, content type) -> dict of count, total and max
+        body size, and the classes found in pickled bodies
+    """
+    stats = defaultdict(
+        lambda: {"count": 0, "total": 0, "max": 0, "classes": set()}
+    )
+    for raw in messages:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            continue
+        body = _message_body(message)
+        content_type = message.get("content-type", "")
+        task_name = message.get("headers", {}).get("task", "?")
+        entry = stats[(task_name, content_type)]
+        entry["count"] += 1
+        entry["total"] += len(body)
+        entry["max"] = max(entry["max"], len(body))
+        if "pickle" in content_type:
+            entry["classes"] |= _pickled_classes(body)
+    return stats
+
+
+class Command(BaseCommand):
+    help = 'Report the size of the task messages waiting in the broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to inspect (repeatable), default: every queue"
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=1000,
+            help="Messages read from the head of each queue (default 1000)"
+        )
+
+    def handle(self, *args, **options):
+        connection = redis.StrictRedis.from_url(settings.CELERY_BROKER_URL)
+        queues = options["queues"] or QUEUES
+        try:
+            for queue in queues:
+                self._audit_queue(connection, queue, options["sample"])
+        except redis.exceptions.ConnectionError as exc:
+            raise CommandError("Could not reach the broker: %s" % exc)
+
+    def _audit_queue(self, connection, queue, sample):
+        length = connection.llen(queue)
+        self.stdout.write("%s: %s message(s)" % (queue, length))
+        if not length:
+            return
+        stats = audit_messages(connection.lrange(queue, 0, sample - 1))
+        for (task_name, content_type), entry in sorted(
+            stats.items(), key=lambda item: -item[1]["total"]
+        ):
+            self.stdout.write(
+                "  %s (%s): %s message(s), %s bytes on average, %s at most" % (
+                    task_name, content_type, entry["count"],
+                    entry["total"] / entry["count"], entry["max"]
+                )
+            )
+            if entry["classes"]:
+                self.stdout.write(
+                    "    pickled: %s" % ", ".join(sorted(entry["classes"]))
+                )
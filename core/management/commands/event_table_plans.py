@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import EventTable
+
+#: Indexes of migration 0104, dropped (and restored) by --compare
+PAYLOAD_INDEXES = [
+    "event_table_allocation_source_name_idx", "event_table_instance_id_idx",
+    "event_table_username_idx", "event_table_payload_gin_idx"
+]
+
+
+def _sample(name, key):
+    event = EventTable.objects.filter(
+        name=name, payload__has_key=key
+    ).order_by('-id').first()
+    return event.payload[key] if event else ""
+
+
+def sample_queries():
+    """
+    Returns:
+        list: (description, queryset) of the payload lookups of the hot paths
+    """
+    renewed = 'allocation_source_created_or_renewed'
+    changed = 'instance_allocation_source_changed'
+    return [
+        (
+            "latest renewal of an allocation source",
+            EventTable.filter_for(
+                renewed,
+                allocation_source_name=_sample(
+                    renewed, 'allocation_source_name'
+                )
+            ).order_by('-timestamp')[:1]
+        ),
+        (
+            "allocation source changes of an instance",
+            EventTable.filter_for(
+                changed, instance_id=_sample(changed, 'instance_id')
+            ).order_by('-timestamp')[:1]
+        ),
+        (
+            "allocation source changes of a user",
+            EventTable.filter_for(
+                changed, username=_sample(changed, 'username')
+            ).order_by('timestamp')
+        ),
+        (
+            "threshold events (not an indexed key)",
+            EventTable.filter_for(
+                'allocation_source_threshold_met', threshold=50.0
+            )
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Print the query plans of the event_table payload lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            default=False,
+            help="Run the queries (EXPLAIN ANALYZE) to show actual timings"
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            default=False,
+            help="Also show the plans without the payload indexes. The "
+            "indexes are dropped in a transaction which is rolled back, "
+            "this locks event_table meanwhile: do not use on a busy server."
+        )
+
+    def handle(self, *args, **options):
+        explain = "EXPLAIN ANALYZE " if options["analyze"] else "EXPLAIN "
+        queries = sample_queries()
+        self.stdout.write("== With the payload indexes")
+        self._explain(explain, queries)
+        if not options["compare"]:
+            return
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in PAYLOAD_INDEXES:
+                    cursor.execute("DROP INDEX IF EXISTS %s" % index)
+            self.stdout.write("== Without the payload indexes")
+            self._explain(explain, queries)
+            transaction.set_rollback(True)
+
+    def _explain(self, explain, queries):
+        with connection.cursor() as cursor:
+            for description, queryset in queries:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(explain + sql, params)
+                self.stdout.write("-- %s" % description)
+                for row in cursor.fetchall():
+                    self.stdout.write(row[0])
@@ -0,0 +1,159 @@
+import math
+
+from dateutil.parser import parse
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import pytz
+
+from core.models import Instance
+from core.reporting import CHUNK_SIZE, iter_instance_report
+
+CSV_HEADER = (
+    "Instance ID, Instance Alias, Username, Staff_user, Provider, "
+    "Instance Start Date, Image Name, Version Name, Size Name, "
+    "Size Alias, Size cpu, Size mem, Size disk, Featured Image, "
+    "Active, Deploy Error, Error, Aborted"
+)
+
+#: Report columns written to the CSV, in the order of CSV_HEADER
+CSV_COLUMNS = [
+    "id", "instance_id", "username", "staff_user", "provider", "start_date",
+    "image_name", "version_name", "size.name", "size.alias", "size.cpu",
+    "size.mem", "size.disk", "is_featured_image", "hit_active",
+    "hit_deploy_error", "hit_error", "hit_aborted"
+]
+
+
+def _date(value):
+    try:
+        date = parse(value)
+    except ValueError:
+        raise CommandError("Invalid date: %s" % value)
+    if timezone.is_naive(date):
+        date = pytz.utc.localize(date)
+    return date
+
+
+def _cell(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return u""
+    if isinstance(value, float) and value.is_integer():
+        return unicode(int(value))
+    return unicode(value)
+
+
+def accounting_queryset(
+    provider_ids=None, start_date=None, end_date=None, min_id=None, max_id=None
+):
+    """
+    Returns:
+        QuerySet: the instances of `provider_ids` started between
+        `start_date` and `end_date` with an id between `min_id` and
+        `max_id` (inclusive)
+    """
+    queryset = Instance.objects.all()
+    if provider_ids:
+        queryset = queryset.filter(
+            created_by_identity__provider__id__in=provider_ids
+        )
+    if start_date:
+        queryset = queryset.filter(start_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(start_date__lt=end_date)
+    if min_id is not None:
+        queryset = queryset.filter(id__gte=min_id)
+    if max_id is not None:
+        queryset = queryset.filter(id__lte=max_id)
+    return queryset
+
+
+def accounting_rows(report):
+    """
+    Args:
+        report (DataFrame): a chunk of `core.reporting.instance_report`
+
+    Returns:
+        list: the CSV values of each instance of `report`. An instance that
+        hit both 'deploy_error' and 'error' only counts as a deploy error.
+    """
+    report = report.copy()
+    report["hit_error"] &= ~report["hit_deploy_error"]
+    report["start_date"] = report["start_date"].dt.strftime("%x %X")
+    for column in [
+        "is_featured_image", "hit_active", "hit_deploy_error", "hit_error",
+        "hit_aborted"
+    ]:
+        report[column] = report[column].astype(int)
+    return report[CSV_COLUMNS].values.tolist()
+
+
+class Command(BaseCommand):
+    help = 'Print the accounting CSV (launch outcome) of instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--provider",
+            action="append",
+            type=int,
+            dest="provider_ids",
+            help="Provider id (repeatable), default: every provider"
+        )
+        parser.add_argument(
+            "--start-date",
+            type=_date,
+            help="Only the instances started on or after this date"
+        )
+        parser.add_argument(
+            "--end-date",
+            type=_date,
+            help="Only the instances started before this date"
+        )
+        parser.add_argument(
+            "--min-id",
+            type=int,
+            help="Only the instances with an id of at least this, "
+            "run one command per id range to export in parallel"
+        )
+        parser.add_argument(
+            "--max-id",
+            type=int,
+            help="Only the instances with an id of at most this"
+        )
+        parser.add_argument(
+            "--no-header",
+            action="store_true",
+            default=False,
+            help="Do not print the CSV header, to concatenate id ranges"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Instances read from the database at a time"
+        )
+
+    def handle(self, *args, **options):
+        time_start = timezone.now()
+        queryset = accounting_queryset(
+            provider_ids=options["provider_ids"],
+            start_date=options["start_date"],
+            end_date=options["end_date"],
+            min_id=options["min_id"],
+            max_id=options["max_id"]
+        )
+        if not options["no_header"]:
+            self.stdout.write(CSV_HEADER)
+        count = 0
+        for report in iter_instance_report(
+            queryset, chunk_size=options["chunk_size"]
+        ):
+            for row in accounting_rows(report):
+                self.stdout.write(",".join(map(_cell, row)))
+            count += len(report)
+            self.stderr.write(
+                "%s %s instances exported" % (timezone.now(), count)
+            )
+        self.stderr.write(
+            "Exported %s instances in %s" %
+            (count, timezone.now() - time_start)
+        )
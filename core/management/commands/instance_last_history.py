@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Instance, InstanceStatusHistory
+
+
+class Command(BaseCommand):
+    help = 'Backfill (or check) the last history, status and size of instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            default=False,
+            help="Only report the instances that are out of date, "
+            "exit with an error if any are found"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of instances to look at in each query"
+        )
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        stale_ids = []
+        total = 0
+        for batch in _instance_batches(options['batch_size']):
+            total += len(batch)
+            stale = find_stale_instances(batch)
+            stale_ids.extend(instance_id for instance_id, _ in stale)
+            if not check_only:
+                update_instances(stale)
+        if check_only:
+            if stale_ids:
+                raise CommandError(
+                    "%s of %s instances have an out of date last history: %s" %
+                    (len(stale_ids), total, _format_ids(stale_ids))
+                )
+            self.stdout.write("All %s instances are up to date" % total)
+            return
+        self.stdout.write(
+            "Updated %s of %s instances" % (len(stale_ids), total)
+        )
+
+
+def _instance_batches(batch_size):
+    """
+    Yield lists of (id, last_history_id, last_status, last_size_id)
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            Instance.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'last_history_id', 'last_status', 'last_size_id'
+            )[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def find_stale_instances(batch):
+    """
+    Compare the denormalized fields of a batch of instances to their newest
+    history, in a single query.
+
+    Returns:
+        list: (instance id, expected (last_history_id, last_status, last_size_id))
+    """
+    newest = {
+        instance_id: (history_id, status_name, size_id)
+        for instance_id, history_id, status_name, size_id in
+        InstanceStatusHistory.objects.filter(
+            instance_id__in=[row[0] for row in batch]
+        ).order_by('instance_id', '-start_date', '-id').distinct('instance_id').
+        values_list('instance_id', 'id', 'status__name', 'size_id')
+    }
+    stale = []
+    for row in batch:
+        expected = newest.get(row[0], (None, None, None))
+        if tuple(row[1:]) != expected:
+            stale.append((row[0], expected))
+    return stale
+
+
+def update_instances(stale):
+    for instance_id, (history_id, status_name, size_id) in stale:
+        Instance.objects.filter(id=instance_id).update(
+            last_history=history_id, last_status=status_name, last_size=size_id
+        )
+
+
+def _format_ids(ids, limit=20):
+    formatted = ", ".join(str(instance_id) for instance_id in ids[:limit])
+    if len(ids) > limit:
+        formatted += ", ..."
+    return formatted
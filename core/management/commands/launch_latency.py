@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import redis
+
+from core.launch_trace import GROUP_BY, LATENCIES, flush, latency_percentiles
+
+
+class Command(BaseCommand):
+    help = 'Report the percentiles of the time between launch stages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--by",
+            default="provider",
+            choices=sorted(GROUP_BY),
+            help="Group the launches by (default: provider)"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Report the launches of the last days (default 7)"
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            default=False,
+            help="Flush the stages recorded in redis first"
+        )
+
+    def handle(self, *args, **options):
+        if options["flush"]:
+            try:
+                self.stdout.write("Flushed %s stage(s)" % flush())
+            except redis.exceptions.ConnectionError as exc:
+                raise CommandError("Could not reach redis: %s" % exc)
+        since = timezone.now() - timedelta(days=options["days"])
+        results = latency_percentiles(options["by"], since=since)
+        if not results:
+            self.stdout.write("No launch since %s" % since)
+        for result in results:
+            self.stdout.write(
+                "%s (%s launch(es))" %
+                (result[options["by"]], result["launches"])
+            )
+            for name in LATENCIES:
+                self.stdout.write(
+                    "  %s: %s" % (
+                        name, ", ".join(
+                            "%s=%s" % item for item in result[name].items()
+                        )
+                    )
+                )
@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+import redis
+
+from core.models import Provider
+from service.periodic import (
+    FAILED, POLICIES, SUCCEEDED, policy_for, run_history
+)
+
+
+def summarize(history):
+    """
+    Args:
+        history (list): entries of `service.periodic.run_history`
+
+    Returns:
+        dict: number of entries per status, the mean time between the
+        starts of the runs (cadence) and their mean and max duration, in
+        seconds
+    """
+    runs = [
+        entry for entry in history if entry["status"] in (SUCCEEDED, FAILED)
+    ]
+    durations = [entry["duration"] for entry in runs]
+    starts = [entry["started"] for entry in runs]
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    return {
+        "statuses": Counter(entry["status"] for entry in history),
+        "cadence": sum(gaps) / len(gaps) if gaps else None,
+        "mean_duration": sum(durations) / len(durations) if runs else None,
+        "max_duration": max(durations) if runs else None,
+    }
+
+
+def _format_seconds(seconds):
+    return "-" if seconds is None else "%.1fs" % seconds
+
+
+class Command(BaseCommand):
+    help = 'Report the cadence and duration of the periodic provider tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--task",
+            action="append",
+            dest="tasks",
+            choices=sorted(POLICIES),
+            help="Task to report (repeatable), default: every task"
+        )
+        parser.add_argument(
+            "--provider",
+            action="append",
+            type=int,
+            dest="provider_ids",
+            help="Provider id (repeatable), default: the active providers"
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Number of history entries to print (default 10)"
+        )
+
+    def handle(self, *args, **options):
+        tasks = options["tasks"] or sorted(POLICIES)
+        if options["provider_ids"]:
+            providers = Provider.objects.filter(id__in=options["provider_ids"])
+        else:
+            providers = Provider.get_active()
+        try:
+            for task_name in tasks:
+                self.stdout.write(
+                    "== %s (%s)" % (task_name, policy_for(task_name))
+                )
+                for provider in providers:
+                    self._report(task_name, provider, options["limit"])
+        except redis.exceptions.ConnectionError as exc:
+            raise CommandError("Could not reach redis: %s" % exc)
+
+    def _report(self, task_name, provider, limit):
+        history = run_history(task_name, provider.id)
+        summary = summarize(history)
+        self.stdout.write(
+            "%s: every %s, %s on average, %s at most, %s" % (
+                provider.location, _format_seconds(summary["cadence"]),
+                _format_seconds(summary["mean_duration"]),
+                _format_seconds(summary["max_duration"]), ", ".join(
+                    "%s %s" % (count, status)
+                    for status, count in sorted(summary["statuses"].items())
+                ) or "no history"
+            )
+        )
+        for entry in history[-limit:]:
+            self.stdout.write(
+                "  %s %s %s" % (
+                    datetime.utcfromtimestamp(entry["started"]
+                                             ).strftime("%Y-%m-%d %H:%M:%S"),
+                    entry["status"], _format_seconds(entry["duration"])
+                )
+            )
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+import redis
+
+from core.task_metrics import (
+    TIMINGS, counter_report, queue_depths, task_report
+)
+
+
+class Command(BaseCommand):
+    help = 'Report the celery queue depths, task metrics and other counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=1,
+            help="Report the last hours, including the current one "
+            "(default 1)"
+        )
+        parser.add_argument(
+            "--overrun",
+            action="store_true",
+            default=False,
+            help="Only report the periodic tasks that overrun their "
+            "schedule, exit with an error if any are found"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            depths = queue_depths()
+            report = task_report(options["hours"])
+            counters = counter_report(options["hours"])
+        except redis.exceptions.ConnectionError as exc:
+            raise CommandError("Could not reach redis: %s" % exc)
+        if options["overrun"]:
+            overruns = [result for result in report if result["overrun"]]
+            for result in overruns:
+                self._write_task(result)
+            if overruns:
+                raise CommandError(
+                    "%s task(s) overrun their schedule: %s" % (
+                        len(overruns),
+                        ", ".join(result["task"] for result in overruns)
+                    )
+                )
+            return
+        self.stdout.write("== Queues")
+        for queue, depth in depths.items():
+            self.stdout.write("%s: %s message(s)" % (queue, depth))
+        self.stdout.write("== Tasks")
+        for result in report:
+            self._write_task(result)
+        self.stdout.write("== Counters")
+        for name, totals in counters.items():
+            self.stdout.write(
+                "%s: %s" %
+                (name, ", ".join("%s=%s" % item for item in totals.items()))
+            )
+
+    def _write_task(self, result):
+        self.stdout.write(
+            "%s: %s run(s), %s retries, %s failure(s), %s bytes of result" % (
+                result["task"], result["runs"], result["retries"],
+                result["failures"], result["result_size"]
+            )
+        )
+        for name in TIMINGS:
+            self.stdout.write(
+                "  %s: %s" % (
+                    name,
+                    ", ".join("%s=%s" % item for item in result[name].items())
+                )
+            )
+        if result["interval"]:
+            self.stdout.write(
+                "  every %ss%s" % (
+                    int(result["interval"]),
+                    ", OVERRUN" if result["overrun"] else ""
+                )
+            )
@@ -0,0 +1,103 @@
+from StringIO import StringIO
+import uuid
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.timezone import datetime
+import pytz
+
+from api.tests.factories import (
+    InstanceFactory, InstanceHistoryFactory, InstanceStatusFactory, UserFactory
+)
+from core.management.commands.instance_accounting import CSV_HEADER
+from core.models import Instance, InstanceStatus
+
+
+class InstanceAccountingTest(TestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+
+    def _create_instance(self, *status_names, **kwargs):
+        instance = InstanceFactory.create(
+            provider_alias=uuid.uuid4(),
+            created_by=self.user,
+            start_date=kwargs.get('start_date', timezone.now())
+        )
+        for status_name in status_names:
+            status = InstanceStatus.objects.filter(name=status_name).first()
+            if not status:
+                status = InstanceStatusFactory.create(name=status_name)
+            InstanceHistoryFactory.create(status=status, instance=instance)
+        return instance
+
+    def _export(self, *args):
+        out = StringIO()
+        call_command(
+            "instance_accounting", *args, stdout=out, stderr=StringIO()
+        )
+        lines = out.getvalue().splitlines()
+        return lines[0], dict(
+            (line.split(",")[1], line.split(",")[-4:]) for line in lines[1:]
+        )
+
+    def test_export_flags(self):
+        active = self._create_instance('deploy_error', 'active')
+        deploy_error = self._create_instance('error', 'deploy_error')
+        error = self._create_instance('networking', 'error')
+        aborted = self._create_instance('networking')
+
+        header, rows = self._export("--chunk-size", "2")
+        self.assertEqual(header, CSV_HEADER)
+        # Active, Deploy Error, Error, Aborted
+        self.assertEqual(
+            rows, {
+                str(active.provider_alias): ["1", "0", "0", "0"],
+                str(deploy_error.provider_alias): ["0", "1", "0", "0"],
+                str(error.provider_alias): ["0", "0", "1", "0"],
+                str(aborted.provider_alias): ["0", "0", "0", "1"],
+            }
+        )
+
+    def test_export_filters(self):
+        old = self._create_instance(
+            'active', start_date=datetime(2017, 1, 1, tzinfo=pytz.utc)
+        )
+        first = self._create_instance('active')
+        second = self._create_instance('active')
+
+        _, rows = self._export("--end-date", "2018-01-01")
+        self.assertEqual(list(rows), [str(old.provider_alias)])
+
+        _, rows = self._export(
+            "--start-date", "2018-01-01", "--min-id", str(second.id)
+        )
+        self.assertEqual(list(rows), [str(second.provider_alias)])
+
+        _, rows = self._export(
+            "--provider", str(first.created_by_identity.provider_id)
+        )
+        self.assertEqual(list(rows), [str(first.provider_alias)])
+
+    def test_export_size_without_last_history(self):
+        instance = self._create_instance('networking', 'active')
+        # Instances from before `./manage.py instance_last_history`
+        Instance.objects.filter(id=instance.id).update(
+            last_history=None, last_status=None, last_size=None
+        )
+        size = instance.instancestatushistory_set.order_by(
+            '-start_date', '-id'
+        ).first().size
+
+        out = StringIO()
+        call_command("instance_accounting", stdout=out, stderr=StringIO())
+        row = out.getvalue().splitlines()[1].split(",")
+        # Size Name, Size Alias, Size cpu, Size mem, Size disk
+        self.assertEqual(
+            row[8:13], [
+                size.name, size.alias,
+                str(size.cpu),
+                str(size.mem),
+                str(size.disk)
+            ]
+        )
@@ -0,0 +1,47 @@
+import uuid
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.timezone import datetime, timedelta
+import pytz
+
+from core.management.commands import instance_last_history
+from core.models import Instance
+from core.tests.helpers import CoreStatusHistoryHelper, CoreInstanceHelper
+
+
+class InstanceLastHistoryTest(TestCase):
+    def setUp(self):
+        start_date = datetime(2018, 1, 1, tzinfo=pytz.utc)
+        self.instance = CoreInstanceHelper(
+            "test_instance", uuid.uuid4(), start_date
+        ).to_core_instance()
+        history_helper = CoreStatusHistoryHelper(self.instance, start_date)
+        history_helper.first_transaction()
+        history_helper.set_start_date(start_date + timedelta(hours=1))
+        history_helper.status_name = 'suspended'
+        history_helper.set_size('large')
+        self.last_history = history_helper.new_transaction()
+
+    def test_saving_a_history_updates_the_instance(self):
+        instance = Instance.objects.get(id=self.instance.id)
+        self.assertEqual(instance.last_history_id, self.last_history.id)
+        self.assertEqual(instance.last_status, 'suspended')
+        self.assertEqual(instance.last_size.alias, 'large')
+        with self.assertNumQueries(0):
+            self.assertEqual(instance.api_status(), 'suspended')
+            self.assertEqual(instance.esh_status(), 'suspended')
+
+    def test_check_and_backfill(self):
+        Instance.objects.filter(id=self.instance.id).update(
+            last_history=None, last_status=None, last_size=None
+        )
+        with self.assertRaises(CommandError):
+            call_command(instance_last_history.Command(), "--check")
+
+        call_command(instance_last_history.Command())
+        instance = Instance.objects.get(id=self.instance.id)
+        self.assertEqual(instance.last_history_id, self.last_history.id)
+        self.assertEqual(instance.last_status, 'suspended')
+        call_command(instance_last_history.Command(), "--check")
@@ -2,32 +2,56 @@ import pickle
 import collections
 import redis
 
+from django.db.models import Count, Max
+from django.utils import timezone
+
 from threepio import logger
 from core.models import Instance
 
-METRICS_CACHE_DURATION = 4 * 24 * 60 * 60    # 4 days (persist over the weekend)
+APPLICATION_FIELD = 'source__providermachine__application_version__application'
+WATERMARK_KEY = "metrics-application-watermark"
 
 
-def _get_summarized_application_metrics(
-    application, force=False, read_only=False
-):
+def _get_summarized_application_metrics(application, force=False):
+    """
+    Return the materialized metrics of `application`, see
+    `refresh_application_metrics`. Applications that have not been
+    refreshed yet are calculated on the spot and materialized.
+    """
+    from core.models import ApplicationMetric
     metrics = collections.OrderedDict()
-    redis_cache = redis.StrictRedis()
-    key = "metrics-application-summary-%s" % (application.id)
     try:
-        if redis_cache.exists(key) and not force:
-            pickled_object = redis_cache.get(key)
-            metrics = pickle.loads(pickled_object)
-        elif not read_only:
-            metrics = calculate_summarized_application_metrics(application)
-            pickled_object = pickle.dumps(metrics)
-            redis_cache.set(key, pickled_object)
-            redis_cache.expire(key, METRICS_CACHE_DURATION)
+        if not force:
+            try:
+                return application.metric.summary()
+            except ApplicationMetric.DoesNotExist:
+                return _materialize_application_metrics(application).summary()
+        metrics = calculate_summarized_application_metrics(application)
     except:
         logger.exception("Unexpected errror in application metrics")
     return metrics
 
 
+def _materialize_application_metrics(application):
+    """
+    Create the `ApplicationMetric` of an application created since the
+    last `refresh_application_metrics`.
+    """
+    from core.models import ApplicationMetric
+    metrics = calculate_summarized_application_metrics(application)
+    metric, _ = ApplicationMetric.objects.get_or_create(
+        application=application,
+        defaults={
+            'forks': metrics['forks'],
+            'bookmarks': metrics['bookmarks'],
+            'projects': metrics['projects'],
+            'instances_total': metrics['instances']['total'],
+            'instances_success': metrics['instances']['success'],
+        }
+    )
+    return metric
+
+
 def calculate_summarized_application_metrics(app):
     """
     From start_date of Application to now/End-date of application
@@ -65,3 +89,140 @@ def calculate_summarized_application_metrics(app):
             }
     }
     return application_metrics
+
+
+def refresh_application_metrics(full=False):
+    """
+    Refresh the `ApplicationMetric` table for every application with grouped
+    aggregate queries.
+
+    Forks, bookmarks and projects are recounted on every run. Launch counts
+    are only recounted for the applications that have new instances or new
+    'active' history since the previous run (or for all applications if
+    `full`).
+
+    Returns the number of metrics that were created or updated.
+    """
+    from core.models import (
+        Application, ApplicationBookmark, ApplicationMetric,
+        InstanceStatusHistory, MachineRequest, Project
+    )
+    redis_cache = redis.StrictRedis()
+    watermark = None if full else _load_watermark(redis_cache)
+    new_watermark = {
+        'instance':
+            Instance.objects.aggregate(last=Max('id'))['last'] or 0,
+        'history':
+            InstanceStatusHistory.objects.aggregate(last=Max('id'))['last'] or
+            0,
+    }
+    existing = {
+        metric.application_id: metric
+        for metric in ApplicationMetric.objects.all()
+    }
+    application_ids = set(Application.objects.values_list('id', flat=True))
+    if watermark is None:
+        launch_ids = application_ids
+    else:
+        launch_ids = _applications_launched_since(watermark, new_watermark)
+        launch_ids |= application_ids - set(existing.keys())
+
+    forks = _grouped_counts(
+        MachineRequest.objects.filter(
+            status__name='completed', new_version_forked=True
+        ), 'instance__' + APPLICATION_FIELD
+    )
+    bookmarks = _grouped_counts(
+        ApplicationBookmark.objects.all(), 'application'
+    )
+    projects = _grouped_counts(
+        Project.applications.through.objects.all(), 'application'
+    )
+    instances = Instance.objects.all()
+    if watermark is not None:
+        instances = instances.filter(**{APPLICATION_FIELD + '__in': launch_ids})
+    launched = _grouped_counts(instances, APPLICATION_FIELD)
+    successful = _grouped_counts(
+        instances.filter(instancestatushistory__status__name='active'),
+        APPLICATION_FIELD,
+        distinct=True
+    )
+
+    now = timezone.now()
+    new_metrics = []
+    updated = 0
+    for application_id in application_ids:
+        values = {
+            'forks': forks.get(application_id, 0),
+            'bookmarks': bookmarks.get(application_id, 0),
+            'projects': projects.get(application_id, 0),
+        }
+        if application_id in launch_ids:
+            values['instances_total'] = launched.get(application_id, 0)
+            values['instances_success'] = successful.get(application_id, 0)
+        metric = existing.get(application_id)
+        if not metric:
+            new_metrics.append(
+                ApplicationMetric(
+                    application_id=application_id, updated=now, **values
+                )
+            )
+        elif any(
+            getattr(metric, key) != value for key, value in values.items()
+        ):
+            ApplicationMetric.objects.filter(id=metric.id).update(
+                updated=now, **values
+            )
+            updated += 1
+    ApplicationMetric.objects.bulk_create(new_metrics)
+    redis_cache.set(WATERMARK_KEY, pickle.dumps(new_watermark))
+    logger.info(
+        "Refreshed application metrics: %s created, %s updated, "
+        "launches recounted for %s applications" %
+        (len(new_metrics), updated, len(launch_ids))
+    )
+    return len(new_metrics) + updated
+
+
+def _load_watermark(redis_cache):
+    try:
+        pickled_object = redis_cache.get(WATERMARK_KEY)
+    except redis.exceptions.ConnectionError:
+        logger.exception("Could not read the application metrics watermark")
+        return None
+    if not pickled_object:
+        return None
+    return pickle.loads(pickled_object)
+
+
+def _applications_launched_since(watermark, new_watermark):
+    """
+    Ids of the applications with instances or 'active' history created
+    between the two watermarks.
+    """
+    from core.models import InstanceStatusHistory
+    application_ids = set(
+        Instance.objects.filter(
+            id__gt=watermark['instance'], id__lte=new_watermark['instance']
+        ).values_list(APPLICATION_FIELD, flat=True)
+    )
+    application_ids |= set(
+        InstanceStatusHistory.objects.filter(
+            id__gt=watermark['history'],
+            id__lte=new_watermark['history'],
+            status__name='active'
+        ).values_list('instance__' + APPLICATION_FIELD, flat=True)
+    )
+    application_ids.discard(None)
+    return application_ids
+
+
+def _grouped_counts(queryset, field, distinct=False):
+    """
+    Return a dict of `field` value -> number of rows, using one GROUP BY query
+    """
+    return dict(
+        queryset.order_by().values(field).annotate(
+            count=Count('id', distinct=distinct)
+        ).values_list(field, 'count')
+    )
@@ -2,6 +2,7 @@
  Instance metrics stored in graphite
 """
 import json
+import time
 
 from django.conf import settings
 import redis
@@ -22,17 +23,63 @@ DEFAULT_RESOLUTION = 1
 #: Maximum time period is only two weeks
 MAXIMUM_TIME_PERIOD = 1209600
 
-
-def request_instance_metrics(uuid, params):
-    uri = create_request_uri(uuid, params)
-    r = requests.get(uri)
+#: Number of instances (graphite targets) fetched with a single render request
+BATCH_SIZE = 25
+
+#: Seconds to wait for graphite (or for another request of the same metrics)
+#: before returning the metrics fetched so far
+REQUEST_TIMEOUT = 10
+CONNECT_TIMEOUT = 3
+
+_session = None
+
+
+def _http_session():
+    """
+    Session shared by every request to METRIC_SERVER in this process, so
+    connections are pooled and kept alive.
+    """
+    global _session
+    if not _session:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=16
+        )
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
+def request_metrics_batch(uuids, fields, timeout=REQUEST_TIMEOUT):
+    """
+    Fetch the metrics of many instances with a single graphite render
+    request (one target per instance).
+
+    Returns:
+        dict: uuid -> list of series
+    """
+    query = [("target", _to_target(uuid, fields)) for uuid in uuids]
+    query.append(("format", "json"))
+    for key in ("from", "until"):
+        if key in fields:
+            query.append((key, fields[key]))
+    r = _http_session().get(
+        "{}/render/".format(settings.METRIC_SERVER),
+        params=query,
+        timeout=(CONNECT_TIMEOUT, timeout)
+    )
     if r.status_code != 200:
         raise NotFound()
-    return r.json()
+    metrics = dict((uuid, []) for uuid in uuids)
+    for series in r.json():
+        for uuid in uuids:
+            if uuid in series.get("target", ""):
+                metrics[uuid].append(series)
+                break
+    return metrics
 
 
-def create_request_uri(uuid, params):
-    endpoint = "{server}/render/?target={target}&format={format}"
+def _to_target(uuid, params):
     query = "stats.*.{uuid}.{field}"
     summarize = "summarize({metric}, {resolution}, 'avg')"
     metric = query.format(uuid=uuid, field=params.get("field"))
@@ -47,35 +94,15 @@ def create_request_uri(uuid, params):
         and params.get("field") != "*"
     ):
         res = '"{}min"'.format(params["res"])
-
-        target = summarize.format(metric=metric, resolution=res)
-    else:
-        target = metric
-
-    fields = {
-        "server": settings.METRIC_SERVER,
-        "target": target,
-        "format": "json"
-    }
-
-    request_uri = endpoint.format(**fields)
-
-    #: (Optional) specify the window
-    if "from" in params:
-        request_uri = "{}&from={}".format(request_uri, params["from"])
-
-    if "until" in params:
-        request_uri = "{}&until={}".format(request_uri, params["until"])
-
-    logger.info("metrics endpoint: " + request_uri)
-    return request_uri
+        return summarize.format(metric=metric, resolution=res)
+    return metric
 
 
 def params_to_fields(params):
     fields = {"field": "*", "res": DEFAULT_RESOLUTION}
 
     #: Check for a valid field
-    if getattr(params, "field", None) is None:
+    if not params or params.get("field") is None:
         return fields
 
     fields["field"] = params["field"]
@@ -83,15 +110,17 @@ def params_to_fields(params):
     #: Determine if the data should be summarized
     try:
         resolution = int(params["res"])
-        size = int(params["size"])
-        if "until" in params and params["until"]:
+        fields["res"] = resolution
+        if params.get("from"):
+            #: (Optional) specify the window
             fields["from"] = params["from"]
-            fields["until"] = params["until"]
+            if params.get("until"):
+                fields["until"] = params["until"]
         else:
+            size = int(params["size"])
             period = resolution * 60 * size
             if period < MAXIMUM_TIME_PERIOD:
                 fields["from"] = "-{}s".format(period)
-                fields["res"] = resolution
 
         #: (Optional) Check for a valid function
         if params.get("fun", "") in VALID_FUNCTIONS:
@@ -101,25 +130,107 @@ def params_to_fields(params):
     return fields
 
 
-def _to_instance_key(instance, fields):
-    inputs = [instance.provider_alias] + fields.values()
-    return ":".join(map(str, inputs))
+def _to_instance_key(instance_uuid, fields):
+    """
+    Cache key of the metrics of an instance, stable for the same fields
+    """
+    inputs = [instance_uuid
+             ] + ["{}={}".format(key, fields[key]) for key in sorted(fields)]
+    return "metrics:" + ":".join(map(str, inputs))
 
 
 def get_instance_metrics(instance, params=None):
+    return get_instances_metrics([instance],
+                                 params).get(instance.provider_alias, {})
+
+
+def get_instances_metrics(instances, params=None, timeout=REQUEST_TIMEOUT):
+    """
+    Metrics of many instances, from the cache or with batched graphite
+    requests. When another request is already fetching the same metrics,
+    wait for its result rather than asking graphite again.
+
+    Instances whose metrics could not be fetched before `timeout` are left
+    out of the result.
+
+    Returns:
+        dict: provider_alias -> metrics
+    """
+    from service.cache import acquire_lock, redis_connection, release_lock
     fields = params_to_fields(params)
-    key = _to_instance_key(instance, fields)
-    redis_cache = redis.StrictRedis()
+    deadline = time.time() + timeout
+    keys = dict(
+        (
+            str(instance.provider_alias),
+            _to_instance_key(instance.provider_alias, fields)
+        ) for instance in instances
+    )
     instance_metrics = {}
     try:
-        if redis_cache.exists(key):
-            instance_metrics = json.loads(redis_cache.get(key))
-        else:
-            instance_metrics = request_instance_metrics(
-                instance.provider_alias, params=params
+        redis_cache = redis_connection()
+        missing = _read_cached(redis_cache, keys, instance_metrics)
+        locks = {}
+        for uuid in missing:
+            token = acquire_lock(keys[uuid] + ":lock", timeout)
+            if token:
+                locks[uuid] = token
+        try:
+            _fetch_batches(
+                redis_cache, sorted(locks), fields, keys, deadline,
+                instance_metrics
             )
-            redis_cache.set(key, json.dumps(instance_metrics))
-            redis_cache.expire(key, CACHE_DURATION)
-    except Exception:
+        finally:
+            for uuid, token in locks.items():
+                release_lock(keys[uuid] + ":lock", token)
+        waiting = [uuid for uuid in missing if uuid not in locks]
+        while waiting and time.time() < deadline:
+            time.sleep(0.2)
+            waiting = _read_cached(
+                redis_cache, dict((uuid, keys[uuid]) for uuid in waiting),
+                instance_metrics
+            )
+    except redis.exceptions.ConnectionError:
         logger.exception("Failed to retrieve metrics")
     return instance_metrics
+
+
+def _read_cached(redis_cache, keys, instance_metrics):
+    """
+    Add the cached metrics of `keys` (uuid -> cache key) to `instance_metrics`
+
+    Returns:
+        list: uuids that are not cached
+    """
+    uuids = sorted(keys)
+    values = redis_cache.mget([keys[uuid] for uuid in uuids])
+    missing = []
+    for uuid, value in zip(uuids, values):
+        if value is None:
+            missing.append(uuid)
+        else:
+            instance_metrics[uuid] = json.loads(value)
+    return missing
+
+
+def _fetch_batches(
+    redis_cache, uuids, fields, keys, deadline, instance_metrics
+):
+    for index in range(0, len(uuids), BATCH_SIZE):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            logger.warn(
+                "Timed out fetching metrics, %s instances left out" %
+                (len(uuids) - index)
+            )
+            return
+        batch = uuids[index:index + BATCH_SIZE]
+        try:
+            metrics = request_metrics_batch(batch, fields, timeout=remaining)
+        except Exception:
+            logger.exception("Failed to retrieve metrics")
+            continue
+        pipeline = redis_cache.pipeline()
+        for uuid, series in metrics.items():
+            pipeline.set(keys[uuid], json.dumps(series), ex=CACHE_DURATION)
+        pipeline.execute()
+        instance_metrics.update(metrics)
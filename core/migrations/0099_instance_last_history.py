@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """
+    Existing instances are backfilled with:
+        ./manage.py instance_last_history
+    """
+
+    dependencies = [
+        ('core', '0098_applicationversion_doc_object_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='last_history',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='core.InstanceStatusHistory'
+            ),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='last_size',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='core.Size'
+            ),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='last_status',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0099_instance_last_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='instance',
+            index=models.Index(
+                fields=['created_by', 'end_date', 'id'],
+                name='instance_creator_end_date_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='instance',
+            index=models.Index(
+                fields=['created_by', 'start_date', 'id'],
+                name='instance_creator_start_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0100_instance_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationMetric',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('forks', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('projects', models.IntegerField(default=0)),
+                ('instances_total', models.IntegerField(default=0)),
+                ('instances_success', models.IntegerField(default=0)),
+                (
+                    'updated',
+                    models.DateTimeField(default=django.utils.timezone.now)
+                ),
+                (
+                    'application',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='metric',
+                        to='core.Application'
+                    )
+                ),
+            ],
+            options={
+                'db_table': 'application_metric',
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_search_documents(apps, schema_editor):
+    from core.models.application_search import refresh_search_documents
+    refresh_search_documents(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0101_applicationmetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationSearchDocument',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                (
+                    'document',
+                    django.contrib.postgres.search.SearchVectorField(null=True)
+                ),
+                ('identifiers', models.TextField(default='')),
+                ('checksum', models.CharField(default='', max_length=32)),
+                (
+                    'updated',
+                    models.DateTimeField(default=django.utils.timezone.now)
+                ),
+                (
+                    'application',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='search_document',
+                        to='core.Application'
+                    )
+                ),
+            ],
+            options={
+                'db_table': 'application_search_document',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='applicationsearchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['document'], name='app_search_document_idx'
+            ),
+        ),
+        migrations.RunPython(
+            create_search_documents, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0102_applicationsearchdocument'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX event_table_threshold_met_idx ON event_table "
+            "((payload ->> 'allocation_source_name')) "
+            "WHERE name = 'allocation_source_threshold_met'",
+            "DROP INDEX event_table_threshold_met_idx",
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def _payload_key_index(key):
+    name = "event_table_%s_idx" % key
+    return migrations.RunSQL(
+        "CREATE INDEX CONCURRENTLY %s ON event_table "
+        "(name, (payload -> '%s'), \"timestamp\")" % (name, key),
+        "DROP INDEX %s" % name,
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0103_event_table_threshold_index'),
+    ]
+
+    operations = [
+        _payload_key_index('allocation_source_name'),
+        _payload_key_index('instance_id'),
+        _payload_key_index('username'),
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY event_table_payload_gin_idx "
+            "ON event_table USING gin (payload jsonb_path_ops)",
+            "DROP INDEX event_table_payload_gin_idx",
+        ),
+    ]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0104_event_table_payload_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaunchTrace',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                (
+                    'instance_alias',
+                    models.CharField(max_length=256, unique=True)
+                ),
+                (
+                    'username',
+                    models.CharField(blank=True, default='', max_length=256)
+                ),
+                (
+                    'image',
+                    models.CharField(blank=True, default='', max_length=256)
+                ),
+                (
+                    'size',
+                    models.CharField(blank=True, default='', max_length=256)
+                ),
+                ('requested', models.DateTimeField(blank=True, null=True)),
+                ('validated', models.DateTimeField(blank=True, null=True)),
+                ('launched', models.DateTimeField(blank=True, null=True)),
+                ('networking', models.DateTimeField(blank=True, null=True)),
+                ('deployed', models.DateTimeField(blank=True, null=True)),
+                (
+                    'created',
+                    models.DateTimeField(default=django.utils.timezone.now)
+                ),
+                (
+                    'provider',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to='core.Provider'
+                    )
+                ),
+            ],
+            options={
+                'db_table': 'launch_trace',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='launchtrace',
+            index=models.Index(
+                fields=['provider', 'created'],
+                name='launch_trace_provider_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='launchtrace',
+            index=models.Index(
+                fields=['created'], name='launch_trace_created_idx'
+            ),
+        ),
+    ]
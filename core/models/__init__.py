@@ -11,6 +11,8 @@ from core.models.allocation_source import (
 from core.models.application import Application, ApplicationMembership,\
     ApplicationBookmark, ApplicationThreshold
 from core.models.application_pattern_match import ApplicationPatternMatch
+from core.models.application_metric import ApplicationMetric
+from core.models.application_search import ApplicationSearchDocument
 from core.models.application_tag import ApplicationTag
 from core.models.application_version import ApplicationVersion, ApplicationVersionMembership
 from core.models.cloud_admin import CloudAdministrator
@@ -38,6 +40,7 @@ from core.models.instance import Instance
 from core.models.instance_action import InstanceAction
 from core.models.instance_history import InstanceStatus, InstanceStatusHistory
 from core.models.instance_source import InstanceSource
+from core.models.launch_trace import LaunchTrace
 from core.models.node import NodeController
 from core.models.boot_script import ScriptType, BootScript, ApplicationVersionBootScript
 from core.models.quota import Quota
@@ -8,7 +8,7 @@ from threepio import logger
 
 from django.conf import settings
 
-from core import query
+from core import image_visibility, query
 from core.models.provider import Provider
 from core.models.identity import Identity
 from core.models.tag import Tag, updateTags
@@ -142,20 +142,45 @@ class Application(models.Model):
 
     @classmethod
     def images_for_user(cls, user=None):
+        """
+        Images visible to `user`, filtered by the ids cached in
+        `core.image_visibility`
+        """
         from core.models.user import AtmosphereUser
-        is_public = Q(private=False)
         if not user or isinstance(user, AnonymousUser):
-            # Images that are not endated and are public
-            return Application.objects.filter(
-                query.only_current_apps() & is_public,
-                versions__machines__instance_source__provider__public=True
-            ).distinct()
+            image_ids = image_visibility.visible_image_ids(
+                image_visibility.PUBLIC, cls._public_image_ids
+            )
+            return Application.objects.filter(id__in=image_ids)
         if not isinstance(user, AtmosphereUser):
             raise Exception(
                 "Expected user to be of type AtmosphereUser"
                 " - Received %s" % type(user)
             )
-        queryset = None
+        image_ids = image_visibility.visible_image_ids(
+            "%s.%s" % (user.id, "staff" if user.is_staff else "user"),
+            lambda: cls._user_image_ids(user)
+        )
+        queryset = Application.objects.filter(id__in=image_ids)
+        if user.is_staff:
+            return queryset
+        return queryset.select_related('created_by').prefetch_related(
+            'versions__machines__instance_source__provider',
+            'versions__machines__members', 'versions__membership'
+        )
+
+    @classmethod
+    def _public_image_ids(cls):
+        # Images that are not endated and are public
+        return Application.objects.filter(
+            query.only_current_apps() & Q(private=False),
+            versions__machines__instance_source__provider__public=True
+        ).values_list(
+            'id', flat=True
+        ).distinct()
+
+    @classmethod
+    def _user_image_ids(cls, user):
         if user.is_staff:
             # Any image on a provider in the staff's provider list
             queryset = Application.objects.filter(
@@ -165,18 +190,16 @@ class Application(models.Model):
             # This query is not the most clear. Here's an explanation:
             # Include all images created by the user or active images in the
             # users providers that are either shared with the user or public
-            queryset = Application.objects.select_related(
-                'created_by'
-            ).prefetch_related(
-                'versions__machines__instance_source__provider',
-                'versions__machines__members', 'versions__membership'
-            ).filter(
+            queryset = Application.objects.filter(
                 query.created_by_user(user) | (
                     query.only_current_apps() & query.in_users_providers(user) &
-                    (query.images_shared_with_user_by_ids(user) | is_public)
+                    (
+                        query.images_shared_with_user_by_ids(user) |
+                        Q(private=False)
+                    )
                 )
             )
-        return queryset.distinct()
+        return queryset.values_list('id', flat=True).distinct()
 
     def _current_machines(self, request_user=None):
         """
@@ -0,0 +1,57 @@
+"""
+  Materialized metrics of an application, see core.metrics.application
+"""
+from collections import OrderedDict
+
+from django.db import models
+from django.utils import timezone
+
+from core.models.application import Application
+
+
+class ApplicationMetric(models.Model):
+    """
+    Summarized metrics for a single application, refreshed in bulk by
+    `core.metrics.application.refresh_application_metrics`
+    """
+    application = models.OneToOneField(
+        Application, models.CASCADE, related_name="metric"
+    )
+    forks = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    projects = models.IntegerField(default=0)
+    instances_total = models.IntegerField(default=0)
+    instances_success = models.IntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    def summary(self):
+        """
+        Same layout as `calculate_summarized_application_metrics`
+        """
+        success_pct = 0.0
+        if self.instances_total != 0:
+            success_pct = self.instances_success / float(
+                self.instances_total
+            ) * 100
+        return OrderedDict(
+            [
+                ('forks', self.forks),
+                ('bookmarks', self.bookmarks),
+                ('projects', self.projects),
+                (
+                    'instances', {
+                        'total': self.instances_total,
+                        'success': self.instances_success,
+                        'percent': success_pct,
+                    }
+                ),
+            ]
+        )
+
+    def __unicode__(self):
+        return "%s (Launched:%s Succeeded:%s)" %\
+            (self.application, self.instances_total, self.instances_success)
+
+    class Meta:
+        db_table = 'application_metric'
+        app_label = 'core'
@@ -0,0 +1,269 @@
+"""
+  Full-text search document of an application, used by the image search
+"""
+from collections import defaultdict
+from hashlib import md5
+import re
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchVector, SearchVectorField
+)
+from django.db import models, transaction
+from django.db.models import Q, TextField, Value
+from django.db.models.signals import m2m_changed, post_save
+from django.utils import timezone
+
+from core.models.application import Application
+from core.models.application_tag import ApplicationTag
+from core.models.application_version import ApplicationVersion
+from core.models.machine import ProviderMachine
+
+SEARCH_CONFIG = "english"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def prefix_tsquery(value):
+    """
+    Returns:
+        str: tsquery matching every word of `value` as a prefix. Only the
+        words are kept, so the tsquery operators (& | ! ( ) : *) of user
+        input cannot make it invalid.
+    """
+    return u" & ".join(u"%s:*" % word for word in _WORD_RE.findall(value))
+
+
+class PrefixSearchQuery(SearchQuery):
+    """
+    Match the words of the query as prefixes ('ubu' matches 'ubuntu'),
+    like the `icontains` search it replaces.
+    """
+
+    def __init__(self, value, **extra):
+        super(PrefixSearchQuery, self).__init__(prefix_tsquery(value), **extra)
+
+    def as_sql(self, compiler, connection):
+        params = [self.value]
+        template = 'to_tsquery(%s)'
+        if self.config:
+            config_sql, config_params = compiler.compile(self.config)
+            template = 'to_tsquery({}::regconfig, %s)'.format(config_sql)
+            params = config_params + params
+        if self.invert:
+            template = '!!({})'.format(template)
+        return template, params
+
+
+def search_query(term, prefix=''):
+    """
+    Args:
+        term (str): a single search term
+        prefix (str, optional): path to the application when searching
+            another model, e.g. 'application_version__application__'
+
+    Returns:
+        Q: applications matching the term, on their search document or
+        (as a substring) on their identifiers
+    """
+    condition = Q(**{prefix + 'search_document__identifiers__icontains': term})
+    if _WORD_RE.search(term):
+        condition |= Q(
+            **{
+                prefix + 'search_document__document':
+                    PrefixSearchQuery(term, config=SEARCH_CONFIG)
+            }
+        )
+    if term.isdigit():
+        condition |= Q(**{prefix + 'id': term})
+    return condition
+
+
+class ApplicationSearchDocument(models.Model):
+    """
+    Weighted tsvector of an application (A: name and tags, B: descriptions
+    and owner, C: change logs) and the identifiers/locations of its
+    machines, refreshed by `refresh_search_documents`
+    """
+    application = models.OneToOneField(
+        Application, models.CASCADE, related_name="search_document"
+    )
+    document = SearchVectorField(null=True)
+    identifiers = models.TextField(default="")
+    checksum = models.CharField(max_length=32, default="")
+    updated = models.DateTimeField(default=timezone.now)
+
+    def __unicode__(self):
+        return "%s (Updated:%s)" % (self.application, self.updated)
+
+    class Meta:
+        db_table = 'application_search_document'
+        app_label = 'core'
+        indexes = [
+            GinIndex(fields=['document'], name='app_search_document_idx'),
+        ]
+
+
+def _models(apps=None):
+    """
+    Returns:
+        tuple: the Application, ApplicationTag, ApplicationVersion,
+        ProviderMachine and ApplicationSearchDocument models, of `apps`
+        (the historical models of a migration) if given
+    """
+    if apps is None:
+        return (
+            Application, ApplicationTag, ApplicationVersion, ProviderMachine,
+            ApplicationSearchDocument
+        )
+    return tuple(
+        apps.get_model('core', name) for name in (
+            'Application', 'ApplicationTag', 'ApplicationVersion',
+            'ProviderMachine', 'ApplicationSearchDocument'
+        )
+    )
+
+
+def _search_texts(application_ids, apps=None):
+    """
+    Collect the text of every application in `application_ids` with one
+    query per related table.
+
+    Returns:
+        dict: application id -> dict of weight (or 'identifiers') -> words
+    """
+    (Application, ApplicationTag, ApplicationVersion, ProviderMachine,
+     _) = _models(apps)
+    texts = defaultdict(lambda: defaultdict(list))
+    for app_id, name, description, username in Application.objects.filter(
+        id__in=application_ids
+    ).values_list('id', 'name', 'description', 'created_by__username'):
+        texts[app_id]['A'].append(name)
+        texts[app_id]['B'].extend([description, username])
+    for app_id, tag_name, tag_description in ApplicationTag.objects.filter(
+        application_id__in=application_ids
+    ).values_list('application_id', 'tag__name', 'tag__description'):
+        texts[app_id]['A'].append(tag_name)
+        texts[app_id]['B'].append(tag_description)
+    for app_id, change_log in ApplicationVersion.objects.filter(
+        application_id__in=application_ids
+    ).values_list('application_id', 'change_log'):
+        texts[app_id]['C'].append(change_log)
+    for app_id, identifier, location in ProviderMachine.objects.filter(
+        application_version__application_id__in=application_ids
+    ).values_list(
+        'application_version__application_id', 'instance_source__identifier',
+        'instance_source__provider__location'
+    ):
+        texts[app_id]['identifiers'].extend([identifier, location])
+    return dict(
+        (
+            app_id,
+            dict(
+                (key, u" ".join(sorted(set(word for word in words if word))))
+                for key, words in app_texts.items()
+            )
+        ) for app_id, app_texts in texts.items()
+    )
+
+
+def _to_vector(texts):
+    vector = None
+    for weight in ('A', 'B', 'C'):
+        part = SearchVector(
+            Value(texts.get(weight, u""), output_field=TextField()),
+            weight=weight,
+            config=SEARCH_CONFIG
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def refresh_search_documents(application_ids=None, batch_size=500, apps=None):
+    """
+    Create or refresh the search document of `application_ids` (default:
+    every application). Documents whose text did not change are not written.
+
+    Args:
+        apps (optional): the app registry of a migration, to use its
+            historical models
+
+    Returns:
+        int: number of documents written
+    """
+    (Application, _, _, _, ApplicationSearchDocument) = _models(apps)
+    if application_ids is None:
+        application_ids = Application.objects.values_list('id', flat=True)
+    application_ids = sorted(set(application_ids))
+    written = 0
+    for index in range(0, len(application_ids), batch_size):
+        batch = application_ids[index:index + batch_size]
+        checksums = dict(
+            ApplicationSearchDocument.objects.filter(
+                application_id__in=batch
+            ).values_list('application_id', 'checksum')
+        )
+        with transaction.atomic():
+            for app_id, texts in _search_texts(batch, apps).items():
+                checksum = md5(repr(sorted(texts.items())).encode('utf-8')
+                              ).hexdigest()
+                if checksums.get(app_id) == checksum:
+                    continue
+                if app_id not in checksums:
+                    ApplicationSearchDocument.objects.create(
+                        application_id=app_id
+                    )
+                ApplicationSearchDocument.objects.filter(
+                    application_id=app_id
+                ).update(
+                    document=_to_vector(texts),
+                    identifiers=texts.get('identifiers', u""),
+                    checksum=checksum,
+                    updated=timezone.now()
+                )
+                written += 1
+    return written
+
+
+def _refresh_on_commit(application_ids):
+    application_ids = [app_id for app_id in application_ids if app_id]
+    if application_ids:
+        transaction.on_commit(lambda: refresh_search_documents(application_ids))
+
+
+def refresh_application_search_document(sender, instance, **kwargs):
+    if isinstance(instance, Application):
+        application_id = instance.id
+    elif isinstance(instance, ApplicationVersion):
+        application_id = instance.application_id
+    elif instance.application_version_id:
+        application_id = instance.application_version.application_id
+    else:
+        return
+    _refresh_on_commit([application_id])
+
+
+def refresh_tagged_application_search_document(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        _refresh_on_commit([instance.id])
+    elif pk_set:
+        _refresh_on_commit(pk_set)
+    else:
+        # Clearing the applications of a tag
+        _refresh_on_commit(
+            list(instance.application_set.values_list('id', flat=True))
+        )
+
+
+post_save.connect(refresh_application_search_document, sender=Application)
+post_save.connect(
+    refresh_application_search_document, sender=ApplicationVersion
+)
+post_save.connect(refresh_application_search_document, sender=ProviderMachine)
+m2m_changed.connect(
+    refresh_tagged_application_search_document, sender=Application.tags.through
+)
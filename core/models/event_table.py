@@ -19,10 +19,16 @@ from core.hooks.allocation_source import (
 )
 from threepio import logger
 
+#: Payload keys with an expression index on (name, payload -> key, timestamp)
+INDEXED_PAYLOAD_KEYS = ('allocation_source_name', 'instance_id', 'username')
+
 
 class EventTable(models.Model):
     """
     Used to keep a track of events
+
+    Query events by payload with `filter_for` and `latest_for`, which use
+    the indexes of the table.
     """
 
     uuid = models.UUIDField(default=uuid4, unique=True, blank=True)
@@ -40,6 +46,65 @@ class EventTable(models.Model):
             name=name, entity_id=entity_id, payload=payload
         )
 
+    @classmethod
+    def bulk_create_events(cls, events):
+        """
+        Insert the (unsaved) `events` with one query, then send the save
+        signals of every event so the hooks still run.
+        """
+        for event in events:
+            pre_save.send(
+                sender=cls,
+                instance=event,
+                raw=False,
+                using='default',
+                update_fields=None
+            )
+        cls.objects.bulk_create(events)
+        for event in events:
+            logger.info(
+                "Creating new event: %s\tPayload: %s" %
+                (event.name, event.payload)
+            )
+            post_save.send(
+                sender=cls,
+                instance=event,
+                created=True,
+                raw=False,
+                using='default',
+                update_fields=None
+            )
+        return events
+
+    @classmethod
+    def filter_for(cls, name, **payload_keys):
+        """
+        Events named `name` whose payload has the values of `payload_keys`,
+        e.g. `EventTable.filter_for('...', allocation_source_name='TG-1')`
+
+        Keys of INDEXED_PAYLOAD_KEYS are compared on their expression
+        index, the other keys through the GIN index of the payload.
+        """
+        lookups = {}
+        contains = {}
+        for key, value in payload_keys.items():
+            if key in INDEXED_PAYLOAD_KEYS:
+                lookups['payload__%s' % key] = value
+            else:
+                contains[key] = value
+        if contains:
+            lookups['payload__contains'] = contains
+        return cls.objects.filter(name=name, **lookups)
+
+    @classmethod
+    def latest_for(cls, name, **payload_keys):
+        """
+        Returns:
+            EventTable: the newest event of `filter_for(name, **payload_keys)`
+            or None
+        """
+        return cls.filter_for(name, **payload_keys).order_by('timestamp').last()
+
     def __str__(self):
         return "%s" % self.name
 
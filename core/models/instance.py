@@ -16,6 +16,7 @@ from rtwo.models.size import OSSize
 
 from threepio import logger
 
+from core import identity_map
 from core.models.identity import Identity
 from core.models.instance_source import InstanceSource
 from core.models.machine import (
@@ -65,6 +66,19 @@ class Instance(models.Model):
     # FIXME  Problems when setting a default, missing auto_now_add
     start_date = models.DateTimeField()
     end_date = models.DateTimeField(null=True, blank=True)
+    # Newest InstanceStatusHistory, along with its status name and size.
+    # Kept up to date by `InstanceStatusHistory.save`, see `get_last_history`
+    last_history = models.ForeignKey(
+        "InstanceStatusHistory",
+        models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_status = models.CharField(max_length=128, null=True, blank=True)
+    last_size = models.ForeignKey(
+        Size, models.SET_NULL, null=True, blank=True, related_name='+'
+    )
 
     # Model Managers
     objects = models.Manager()    # The default manager.
@@ -134,6 +148,8 @@ class Instance(models.Model):
         # except InstanceStatusHistory.DoesNotExist:
         # TODO: Profile current choice
         # FIXME: Move this call so that it happens inside InstanceStatusHistory to avoid circ.dep.
+        if self.last_history_id:
+            return self.last_history
         last_history = self.instancestatushistory_set.order_by('-start_date'
                                                               ).first()
         if last_history:
@@ -157,6 +173,14 @@ class Instance(models.Model):
             )
             return last_history
 
+    def get_last_status_name(self):
+        """
+        Returns the status name of the newest InstanceStatusHistory
+        """
+        if self.last_history_id and self.last_status:
+            return self.last_status
+        return self.get_last_history().status.name
+
     def _build_first_history(
         self,
         status_name,
@@ -224,7 +248,8 @@ class Instance(models.Model):
         )
 
         # 2. Get the last history (or Build a new one if no other exists)
-        has_history = self.instancestatushistory_set.all().count()
+        has_history = self.last_history_id or \
+            self.instancestatushistory_set.exists()
         if not has_history:
             last_history = InstanceStatusHistory.create_history(
                 status_name,
@@ -247,8 +272,8 @@ class Instance(models.Model):
             )
         last_history = self.get_last_history()
         # 2. Size and name must match to continue using last history
-        if last_history.status.name == status_name \
-                and last_history.size.id == size.id:
+        if self.get_last_status_name() == status_name \
+                and self.get_size().id == size.id:
             # logger.info("status_name matches last history:%s " %
             #        last_history.status.name)
             return (False, last_history)
@@ -378,10 +403,9 @@ class Instance(models.Model):
 
     def api_status(self):
         # Used by the v2 serializer - db only. no 'esh'
-        last_history = self.get_last_history()
-        if not last_history:
+        status_name = self.get_last_status_name()
+        if not status_name:
             return "Unknown"
-        status_name = last_history.status.name
         #NOTE: This handles the two 'atmosphere created' special-case status types, networking/deploying.
         # If the last history is one of these states, return active
         if status_name in ["networking", "deploy_error", "deploying"]:
@@ -390,10 +414,9 @@ class Instance(models.Model):
 
     def api_activity(self):
         # Used by the v2 serializer - db only. no 'esh'
-        last_history = self.get_last_history()
-        if not last_history:
+        status_name = self.get_last_status_name()
+        if not status_name:
             return ""
-        status_name = last_history.status.name
         #FIXME: Using this, for now, in place of a better solution.descripted in core/models/instance_history.py:InstanceStatus
         if status_name not in ["networking", "deploy_error", "deploying"]:
             return ""
@@ -402,11 +425,7 @@ class Instance(models.Model):
     def esh_status(self):
         if self.esh and type(self.esh) != MockInstance:
             return self.esh.get_status()
-        last_history = self.get_last_history()
-        if last_history:
-            return last_history.status.name
-        else:
-            return "Unknown"
+        return self.get_last_status_name() or "Unknown"
 
     def esh_activity(self):
         activity = None
@@ -434,13 +453,15 @@ class Instance(models.Model):
         return self.source.provider
 
     def get_size(self):
+        if self.last_history_id and self.last_size_id:
+            return self.last_size
         return self.get_last_history().size
 
     def esh_size(self):
         if not self.esh or not hasattr(self.esh, 'extra'):
-            last_history = self.get_last_history()
-            if last_history:
-                return last_history.size.alias
+            size = self.get_size()
+            if size:
+                return size.alias
             return "Unknown"
         extras = self.esh.extra
         if 'flavorId' in extras:
@@ -546,6 +567,17 @@ class Instance(models.Model):
     class Meta:
         db_table = "instance"
         app_label = "core"
+        # Back the keyset pagination of the instance history endpoints
+        indexes = [
+            models.Index(
+                fields=['created_by', 'end_date', 'id'],
+                name='instance_creator_end_date_idx'
+            ),
+            models.Index(
+                fields=['created_by', 'start_date', 'id'],
+                name='instance_creator_start_idx'
+            ),
+        ]
 
 
 """
@@ -654,16 +686,25 @@ def strfdate(datetime_o, fmt=None):
 
 
 def find_instance(instance_id):
-    if type(instance_id) == int:
-        core_instance = Instance.objects.filter(id=instance_id)
+    """
+    Find an instance by primary key or provider alias with one query
+    (none when it was already found during the current request)
+    """
+    kind = identity_map.identifier_kind(instance_id)
+    if kind == identity_map.INT_IDENTIFIER:
+        field = "id"
     else:
-        core_instance = Instance.objects.filter(provider_alias=instance_id)
-    if len(core_instance) > 1:
+        field = "provider_alias"
+    core_instance = identity_map.get(Instance, field, instance_id)
+    if core_instance:
+        return core_instance
+    core_instances = list(Instance.objects.filter(**{field: instance_id})[:2])
+    if len(core_instances) > 1:
         logger.warn(
             "Multiple instances returned for instance_id - %s" % instance_id
         )
-    if core_instance:
-        return core_instance[0]
+    if core_instances:
+        return identity_map.add(core_instances[0], field, instance_id)
     return None
 
 
@@ -825,6 +866,35 @@ def convert_esh_instance(
     return core_instance
 
 
+def merge_esh_instances(esh_instance_list, queryset=None):
+    """
+    Read-only counterpart of `convert_esh_instance` for listings:
+    match every cloud instance to its existing core instance with a single
+    query and attach the 'esh' object. Nothing is written to the database,
+    cloud instances without a core instance are left out until the
+    monitoring tasks create them.
+    """
+    if queryset is None:
+        queryset = Instance.objects.all()
+    core_instances = {
+        core_instance.provider_alias: core_instance
+        for core_instance in queryset.filter(
+            provider_alias__in=[
+                esh_instance.id for esh_instance in esh_instance_list
+            ]
+        )
+    }
+    core_instance_list = []
+    for esh_instance in esh_instance_list:
+        core_instance = core_instances.get(esh_instance.id)
+        if not core_instance:
+            continue
+        core_instance.esh = esh_instance
+        core_instance.ip_address = _find_esh_ip(esh_instance)
+        core_instance_list.append(core_instance)
+    return core_instance_list
+
+
 def _esh_instance_size_to_core(esh_driver, esh_instance, provider_uuid):
     # NOTE: Querying for esh_size because esh_instance
     # Only holds the alias, not all the values.
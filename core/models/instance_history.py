@@ -5,7 +5,7 @@ from uuid import uuid4
 from datetime import timedelta
 
 from django.db import models, transaction, DatabaseError
-from django.db.models import ObjectDoesNotExist
+from django.db.models import ObjectDoesNotExist, Q
 from django.contrib.postgres.fields import JSONField
 
 from django.utils import timezone
@@ -58,6 +58,35 @@ class InstanceStatusHistory(models.Model):
     end_date = models.DateTimeField(null=True, blank=True)
     extra = JSONField(null=True, blank=True)
 
+    def save(self, *args, **kwargs):
+        super(InstanceStatusHistory, self).save(*args, **kwargs)
+        self._update_instance_last_history()
+
+    def _update_instance_last_history(self):
+        """
+        Point `Instance.last_history` (and its cached status name and size)
+        at this history, unless the instance already has a newer one.
+        """
+        from core.models.instance import Instance
+        instance = self.instance
+        status_name = self.status.name
+        if instance.last_history_id == self.id \
+                and instance.last_status == status_name \
+                and instance.last_size_id == self.size_id:
+            return
+        updated = Instance.objects.filter(id=instance.id).filter(
+            Q(last_history__isnull=True) |
+            Q(last_history__start_date__lte=self.start_date)
+        ).update(
+            last_history=self.id,
+            last_status=status_name,
+            last_size=self.size_id
+        )
+        if updated:
+            instance.last_history = self
+            instance.last_status = status_name
+            instance.last_size = self.size
+
     def previous(self):
         """
         Given that you are a node on a linked-list, traverse yourself backwards
@@ -0,0 +1,49 @@
+"""
+  Timestamps of the stages of each instance launch
+"""
+from django.db import models
+from django.utils import timezone
+
+from core.models.provider import Provider
+
+#: Stages of a launch, in order
+REQUESTED = "requested"
+VALIDATED = "validated"
+LAUNCHED = "launched"
+NETWORKING = "networking"
+DEPLOYED = "deployed"
+STAGES = (REQUESTED, VALIDATED, LAUNCHED, NETWORKING, DEPLOYED)
+
+
+class LaunchTrace(models.Model):
+    """
+    One row per launched instance, with the time it reached each stage
+    (see `core.launch_trace`)
+    """
+    instance_alias = models.CharField(max_length=256, unique=True)
+    username = models.CharField(max_length=256, blank=True, default="")
+    provider = models.ForeignKey(
+        Provider, models.SET_NULL, null=True, blank=True
+    )
+    image = models.CharField(max_length=256, blank=True, default="")
+    size = models.CharField(max_length=256, blank=True, default="")
+    requested = models.DateTimeField(null=True, blank=True)
+    validated = models.DateTimeField(null=True, blank=True)
+    launched = models.DateTimeField(null=True, blank=True)
+    networking = models.DateTimeField(null=True, blank=True)
+    deployed = models.DateTimeField(null=True, blank=True)
+    created = models.DateTimeField(default=timezone.now)
+
+    def __unicode__(self):
+        return "%s (Requested:%s)" % (self.instance_alias, self.requested)
+
+    class Meta:
+        db_table = 'launch_trace'
+        app_label = 'core'
+        indexes = [
+            models.Index(
+                fields=['provider', 'created'],
+                name='launch_trace_provider_idx'
+            ),
+            models.Index(fields=['created'], name='launch_trace_created_idx'),
+        ]
@@ -18,6 +18,7 @@ from core.models.application_version import (
 )
 from core.models.identity import Identity
 from core.models.provider import Provider
+from core import identity_map
 from core.query import contains_credential
 
 
@@ -528,14 +529,23 @@ def update_provider_machine_metadata(provider_machine_id, metadata={}):
 
 
 def find_provider_machine(identifier):
-    try:
-        if type(identifier) == int:
-            machine = ProviderMachine.objects.get(pk=identifier)
-        else:
-            machine = ProviderMachine.objects.get(
-                instance_source__identifier=identifier
-            )
+    """
+    Find a provider machine by primary key or cloud identifier with one query
+    (none when it was already found during the current request)
+    """
+    kind = identity_map.identifier_kind(identifier)
+    if kind == identity_map.INT_IDENTIFIER:
+        field = "id"
+    else:
+        field = "instance_source__identifier"
+    machine = identity_map.get(ProviderMachine, field, identifier)
+    if machine:
         return machine
+    try:
+        machine = ProviderMachine.objects.select_related(
+            "instance_source__provider"
+        ).get(**{field: identifier})
+        return identity_map.add(machine, field, identifier)
     except ProviderMachine.DoesNotExist:
         return None
     except MultipleObjectsReturned:
@@ -0,0 +1,222 @@
+"""
+Columnar instance reports.
+
+The rows of the instance report are read with `values_list()` straight
+into pandas columns, and the hit_* flags are computed with set membership
+over the whole column instead of one history query per instance.
+"""
+import numpy as np
+import pandas as pd
+from django.db.models import F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import ApplicationTag, InstanceStatusHistory, Size
+
+#: Columns of the report, in order
+REPORT_COLUMNS = [
+    "id", "instance_id", "username", "staff_user", "provider", "start_date",
+    "end_date", "image_name", "version_name", "size.active", "size.start_date",
+    "size.end_date", "size.name", "size.id", "size.uuid", "size.url",
+    "size.alias", "size.cpu", "size.mem", "size.disk", "is_featured_image",
+    "hit_active", "hit_deploy_error", "hit_error", "hit_aborted",
+    "hit_active_or_aborted", "hit_active_or_aborted_or_error"
+]
+
+#: Database column -> report column
+_VALUES = [
+    ("id", "id"),
+    ("provider_alias", "instance_id"),
+    ("created_by__username", "username"),
+    ("created_by__is_staff", "staff_user"),
+    ("created_by_identity__provider__location", "provider"),
+    ("start_date", "start_date"),
+    ("end_date", "end_date"),
+    (
+        "source__providermachine__application_version__application_id",
+        "application_id"
+    ),
+    (
+        "source__providermachine__application_version__application__name",
+        "image_name"
+    ),
+    ("source__providermachine__application_version__name", "version_name"),
+    ("report_size_id", "size.id"),
+]
+
+#: Size column -> report column, read for the sizes of the rows
+_SIZE_VALUES = [
+    ("uuid", "size.uuid"),
+    ("alias", "size.alias"),
+    ("name", "size.name"),
+    ("cpu", "size.cpu"),
+    ("mem", "size.mem"),
+    ("disk", "size.disk"),
+    ("start_date", "size.start_date"),
+    ("end_date", "size.end_date"),
+]
+
+#: Rows read from the database at a time by `iter_instance_report`
+CHUNK_SIZE = 5000
+
+
+def _utc_naive(column):
+    """
+    Timezone aware datetimes (UTC) -> naive datetime64 column, which is
+    what the excel writer expects
+    """
+    column = pd.to_datetime(column, utc=True)
+    if getattr(column.dt, 'tz', None) is not None:
+        column = column.dt.tz_convert(None)
+    return column
+
+
+def _iso_format(column):
+    return column.map(lambda value: value.isoformat() if value else None)
+
+
+def _instances_by_status(instances, status_names):
+    """
+    Returns:
+        dict: status name -> set of the ids of `instances` that have been
+        in that status
+    """
+    by_status = dict((name, set()) for name in status_names)
+    for instance_id, status_name in InstanceStatusHistory.objects.filter(
+        instance__in=instances, status__name__in=status_names
+    ).values_list('instance_id', 'status__name').distinct():
+        by_status[status_name].add(instance_id)
+    return by_status
+
+
+def _newest_size_id():
+    """
+    Size of the newest history of the instance. Instances whose
+    `last_history` has not been backfilled yet (see
+    `./manage.py instance_last_history`) fall back to a subquery.
+    """
+    newest = InstanceStatusHistory.objects.filter(
+        instance=OuterRef('pk')
+    ).order_by('-start_date', '-id').values('size_id')[:1]
+    return Coalesce(
+        F('last_history__size'),
+        Subquery(newest, output_field=IntegerField()),
+        output_field=IntegerField()
+    )
+
+
+def _size_columns(size_ids):
+    """
+    Returns:
+        DataFrame: the _SIZE_VALUES columns of the sizes of `size_ids`,
+        aligned with `size_ids`
+    """
+    ids = set(int(size_id) for size_id in size_ids.dropna())
+    fields = ['id'] + [field for field, _ in _SIZE_VALUES]
+    rows = Size.objects.filter(id__in=ids).values_list(*fields)
+    sizes = dict((values[0], values[1:]) for values in rows)
+    missing = (None, ) * len(_SIZE_VALUES)
+    return pd.DataFrame.from_records(
+        [sizes.get(size_id, missing) for size_id in size_ids],
+        columns=[column for _, column in _SIZE_VALUES],
+        index=size_ids.index
+    )
+
+
+def _featured_applications(application_ids):
+    return set(
+        ApplicationTag.objects.filter(
+            application_id__in=application_ids, tag__name__icontains='featured'
+        ).values_list('application_id', flat=True).distinct()
+    )
+
+
+def instance_report(queryset, size_url=None):
+    """
+    Args:
+        queryset: instances to report on
+        size_url (callable, optional): size uuid -> url of the size
+
+    Returns:
+        DataFrame: one row per instance, with the columns of REPORT_COLUMNS
+    """
+    annotated = queryset.annotate(report_size_id=_newest_size_id())
+    rows = list(
+        annotated.order_by('id').values_list(*[field for field, _ in _VALUES]).
+        distinct()
+    )
+    frame = pd.DataFrame.from_records(
+        rows, columns=[column for _, column in _VALUES]
+    )
+    sizes = _size_columns(frame["size.id"])
+    for column in sizes.columns:
+        frame[column] = sizes[column]
+    application_ids = [
+        app_id
+        for app_id in frame["application_id"].unique() if not pd.isnull(app_id)
+    ]
+
+    now = timezone.now()
+    size_start = frame["size.start_date"]
+    size_end = frame["size.end_date"]
+    frame["size.active"] = (
+        size_start.map(lambda start: start is not None and start <= now) &
+        size_end.map(lambda end: end is None or end >= now)
+    ).astype(bool)
+    frame["size.start_date"] = _iso_format(size_start)
+    frame["size.end_date"] = _iso_format(size_end)
+    frame["size.uuid"] = frame["size.uuid"].map(
+        lambda uuid: str(uuid) if uuid else None
+    )
+    if size_url:
+        urls = dict(
+            (uuid, size_url(uuid))
+            for uuid in frame["size.uuid"].dropna().unique()
+        )
+        frame["size.url"] = frame["size.uuid"].map(urls)
+    else:
+        frame["size.url"] = None
+
+    frame["staff_user"] = frame["staff_user"].map(str)
+    frame["start_date"] = _utc_naive(frame["start_date"])
+    frame["end_date"] = _utc_naive(frame["end_date"])
+    frame["image_name"] = frame["image_name"].fillna("Deleted Image"
+                                                    ).str.replace(",", "-")
+    frame["version_name"] = frame["version_name"].fillna("N/A").str.replace(
+        ",", "-"
+    )
+    frame["is_featured_image"] = frame["application_id"].isin(
+        _featured_applications(application_ids)
+    )
+
+    by_status = _instances_by_status(
+        queryset.order_by().values('id'), ["active", "deploy_error", "error"]
+    )
+    hit_active = frame["id"].isin(by_status["active"])
+    hit_deploy_error = ~hit_active & frame["id"].isin(by_status["deploy_error"])
+    hit_error = ~hit_active & frame["id"].isin(by_status["error"])
+    hit_aborted = ~hit_active & ~hit_deploy_error & ~hit_error
+    frame["hit_active"] = hit_active
+    frame["hit_deploy_error"] = hit_deploy_error
+    frame["hit_error"] = hit_error
+    frame["hit_aborted"] = hit_aborted
+    frame["hit_active_or_aborted"] = (hit_active | hit_aborted).astype(np.int64)
+    frame["hit_active_or_aborted_or_error"] = (
+        hit_active | hit_aborted | hit_error
+    ).astype(np.int64)
+    return frame[REPORT_COLUMNS]
+
+
+def iter_instance_report(queryset, size_url=None, chunk_size=CHUNK_SIZE):
+    """
+    `instance_report` of `queryset`, `chunk_size` instances at a time
+    """
+    instance_ids = list(
+        queryset.order_by('id').values_list('id', flat=True).distinct()
+    )
+    model = queryset.model
+    for index in range(0, len(instance_ids), chunk_size):
+        chunk = instance_ids[index:index + chunk_size]
+        yield instance_report(
+            model.objects.filter(id__in=chunk), size_url=size_url
+        )
@@ -0,0 +1,334 @@
+"""
+Celery task instrumentation.
+
+Celery signal handlers measure, for every task run by a worker, the time it
+waited in its queue (from when it was published, or from its eta, until it
+started), its runtime, its retries and failures and the size of its result.
+The measurements are added to a redis hash per hour, as sums and histogram
+buckets, with one pipeline when the task finishes.
+
+`count` adds other counters (ex: the reuse of a cache by the tasks) to the
+same hashes.
+
+`task_report` reads the hashes of the last hours back into per task counts
+and percentiles, and flags the periodic tasks whose runtime overruns their
+schedule; `counter_report` reads back the other counters; `queue_depths`
+reports the number of messages waiting in each queue of the broker. They
+are exposed by `/api/v2/admin/task_metrics` and `./manage.py task_metrics`.
+"""
+from collections import OrderedDict
+import calendar
+from datetime import datetime, timedelta
+import time
+
+from celery import signals, states
+from celery.utils.iso8601 import parse_iso8601
+from django.conf import settings
+from kombu.serialization import dumps
+import redis
+
+#: Hourly hash of the measurements, fields are "<task name>|<field>"
+KEY = "task_metrics.{:%Y%m%d%H}"
+
+#: Message header set to the time a task is published
+SENT_AT_HEADER = "atmo_sent_at"
+
+#: Upper bounds (seconds) of the histogram buckets of the timings
+BUCKETS = (
+    0.1, 0.5, 1, 5, 15, 30, 60, 5 * 60, 15 * 60, 30 * 60, 60 * 60, 6 * 60 * 60,
+    24 * 60 * 60
+)
+
+TIMINGS = ("wait", "runtime")
+
+COUNTERS = ("runs", "retries", "failures", "result_size")
+
+#: Prefix of the fields added by `count` instead of a task name
+COUNTER_PREFIX = "@"
+
+#: task id -> (time the task started, queue wait), in this worker process
+_started = {}
+
+#: Seconds after which a started task is assumed to be gone (killed by a
+#: time limit or a worker crash, without a task_postrun), longer than the
+#: time limit of any task
+STARTED_TTL = BUCKETS[-1]
+
+#: Most started tasks tracked by a worker process
+STARTED_SIZE = 1000
+
+
+def _enabled():
+    return getattr(settings, 'TASK_METRICS_ENABLED', True)
+
+
+def _retention():
+    return getattr(settings, 'TASK_METRICS_RETENTION', 48) * 60 * 60
+
+
+def _bucket(seconds):
+    for bound in BUCKETS:
+        if seconds <= bound:
+            return str(bound)
+    return "inf"
+
+
+def _timestamp(value):
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+def record(task_name, timings=None, **counters):
+    """
+    Add measurements of `task_name` to the hash of the current hour.
+
+    Args:
+        timings (dict, optional): one of TIMINGS -> seconds
+        counters: counter (one of COUNTERS for tasks) -> amount to add
+    """
+    key = KEY.format(datetime.utcnow())
+    from service.cache import redis_connection
+    try:
+        pipe = redis_connection().pipeline(transaction=False)
+        for name, seconds in (timings or {}).items():
+            seconds = max(seconds, 0)
+            field = "%s|%s" % (task_name, name)
+            pipe.hincrbyfloat(key, field + "|sum", seconds)
+            pipe.hincrby(key, "%s|%s" % (field, _bucket(seconds)), 1)
+        for name, amount in counters.items():
+            pipe.hincrby(key, "%s|%s" % (task_name, name), amount)
+        pipe.expire(key, _retention())
+        pipe.execute()
+    except redis.exceptions.ConnectionError:
+        from threepio import celery_logger
+        celery_logger.warn("Could not reach redis to record %s", task_name)
+
+
+def count(name, **amounts):
+    """
+    Add `amounts` to the counters of `name` in the hash of the current hour,
+    see `counter_report`.
+
+    Args:
+        amounts: counter -> amount to add
+    """
+    if _enabled():
+        record(COUNTER_PREFIX + name, **amounts)
+
+
+@signals.before_task_publish.connect
+def _task_published(headers=None, **kwargs):
+    if headers is not None and _enabled():
+        headers[SENT_AT_HEADER] = time.time()
+
+
+def _queue_wait(request, started):
+    sent_at = getattr(request, SENT_AT_HEADER, None)
+    if not sent_at:
+        return None
+    ready_at = sent_at
+    if request.eta:
+        ready_at = max(sent_at, _timestamp(parse_iso8601(request.eta)))
+    return started - ready_at
+
+
+@signals.task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    if task is None or task.request.is_eager or not _enabled():
+        return
+    started = time.time()
+    _forget_stale(started)
+    _started[task_id] = (started, _queue_wait(task.request, started))
+
+
+def _forget_stale(now):
+    for task_id, (started, _) in _started.items():
+        if now - started > STARTED_TTL:
+            del _started[task_id]
+    if len(_started) >= STARTED_SIZE:
+        oldest = sorted(_started, key=lambda task_id: _started[task_id][0])
+        for task_id in oldest[:len(_started) - STARTED_SIZE + 1]:
+            del _started[task_id]
+
+
+def _result_size(task, retval):
+    if retval is None or task.ignore_result:
+        return 0
+    try:
+        _, _, body = dumps(retval, serializer=settings.CELERY_RESULT_SERIALIZER)
+    except Exception:
+        return 0
+    return len(body)
+
+
+@signals.task_postrun.connect
+def _task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    if task_id not in _started:
+        return
+    started, wait = _started.pop(task_id)
+    timings = {"runtime": time.time() - started}
+    if wait is not None:
+        timings["wait"] = wait
+    result_size = _result_size(task, retval) if state == states.SUCCESS else 0
+    record(task.name, timings=timings, runs=1, result_size=result_size)
+
+
+@signals.task_retry.connect
+def _task_retried(sender=None, request=None, **kwargs):
+    if sender is None or (request and request.is_eager) or not _enabled():
+        return
+    record(sender.name, retries=1)
+
+
+@signals.task_failure.connect
+def _task_failed(sender=None, task_id=None, **kwargs):
+    if sender is None or task_id not in _started:
+        return
+    record(sender.name, failures=1)
+
+
+def _percentile(buckets, count, percentile):
+    """
+    Returns:
+        float: upper bound of the bucket holding `percentile`, None when it
+        is past the largest bucket
+    """
+    rank = count * percentile / 100.0
+    cumulative = 0
+    for bound in BUCKETS:
+        cumulative += buckets.get(str(bound), 0)
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+def _schedule_intervals():
+    """
+    Returns:
+        dict: task name -> seconds between the runs of the periodic tasks
+        with a fixed interval
+    """
+    intervals = {}
+    for entry in settings.CELERYBEAT_SCHEDULE.values():
+        schedule = entry.get("schedule")
+        if isinstance(schedule, timedelta):
+            intervals[entry["task"]] = schedule.total_seconds()
+    return intervals
+
+
+def _schedule_interval(intervals, task_name):
+    # "<task>_for" tasks are fanned out by the periodic "<task>"
+    if task_name not in intervals and task_name.endswith("_for"):
+        task_name = task_name[:-len("_for")]
+    return intervals.get(task_name)
+
+
+def _read_hashes(hours, now):
+    from service.cache import redis_connection
+    pipe = redis_connection().pipeline(transaction=False)
+    for hour in range(hours):
+        pipe.hgetall(KEY.format(now - timedelta(hours=hour)))
+    return pipe.execute()
+
+
+def _totals(hours, now=None):
+    """
+    Returns:
+        dict: task name -> field -> sum over the last `hours` hashes
+    """
+    totals = {}
+    for values in _read_hashes(hours, now or datetime.utcnow()):
+        for field, value in values.items():
+            task_name, name = field.split("|", 1)
+            fields = totals.setdefault(task_name, {})
+            fields[name] = fields.get(name, 0) + float(value)
+    return totals
+
+
+def task_report(hours=1, percentiles=(50, 90, 99), now=None):
+    """
+    Args:
+        hours (int): number of hourly hashes to report on, including the
+            current (partial) hour
+        percentiles (tuple): percentiles of the timings to report
+
+    Returns:
+        list: one dict per task, sorted by name, with the number of runs,
+        retries and failures, the average result size, the count, mean and
+        percentiles (upper bounds of the histogram buckets) of each of
+        TIMINGS, and for periodic tasks their interval and whether the
+        highest percentile of their runtime overruns it
+    """
+    totals = _totals(hours, now)
+    intervals = _schedule_intervals()
+    report = []
+    for task_name in sorted(totals):
+        if task_name.startswith(COUNTER_PREFIX):
+            continue
+        fields = totals[task_name]
+        result = OrderedDict([("task", task_name)])
+        for name in COUNTERS:
+            result[name] = int(fields.get(name, 0))
+        result["result_size"] = (
+            result["result_size"] / result["runs"] if result["runs"] else 0
+        )
+        for name in TIMINGS:
+            buckets = dict(
+                (bucket, fields.get("%s|%s" % (name, bucket), 0))
+                for bucket in [str(bound) for bound in BUCKETS] + ["inf"]
+            )
+            count = int(sum(buckets.values()))
+            timing = OrderedDict([("count", count)])
+            timing["mean"] = (
+                round(fields.get(name + "|sum", 0) / count, 3)
+                if count else None
+            )
+            for percentile in percentiles:
+                timing["p%s" % percentile] = (
+                    _percentile(buckets, count, percentile) if count else None
+                )
+            result[name] = timing
+        interval = _schedule_interval(intervals, task_name)
+        result["interval"] = interval
+        runtime = result["runtime"]
+        result["overrun"] = bool(
+            interval and runtime["count"] and (
+                runtime["p%s" % max(percentiles)] is None
+                or runtime["p%s" % max(percentiles)] > interval
+            )
+        )
+        report.append(result)
+    return report
+
+
+def counter_report(hours=1, now=None):
+    """
+    Args:
+        hours (int): number of hourly hashes to report on, including the
+            current (partial) hour
+
+    Returns:
+        OrderedDict: name -> OrderedDict of counter -> total of the
+        counters added by `count`, sorted by name
+    """
+    totals = _totals(hours, now)
+    report = OrderedDict()
+    for name in sorted(totals):
+        if name.startswith(COUNTER_PREFIX):
+            report[name[len(COUNTER_PREFIX):]] = OrderedDict(
+                (counter, int(total))
+                for counter, total in sorted(totals[name].items())
+            )
+    return report
+
+
+def queue_depths():
+    """
+    Returns:
+        OrderedDict: queue name -> number of messages waiting in the broker
+    """
+    from atmosphere.celery_router import QUEUES
+    connection = redis.StrictRedis.from_url(settings.CELERY_BROKER_URL)
+    pipe = connection.pipeline(transaction=False)
+    for queue in QUEUES:
+        pipe.llen(queue)
+    return OrderedDict(zip(QUEUES, pipe.execute()))
@@ -0,0 +1,147 @@
+"""
+Compact celery task arguments.
+
+Tasks used to receive whole model instances, sliced querysets and rtwo
+provider/identity objects, which are pickled into every broker message.
+Tasks following this convention receive instead:
+
+  * the primary keys of the objects they work on (`model_ids`), loaded
+    back with one query on the worker (`load_models`, `load_model`);
+  * `model_reference` ("app_label.model", pk) when the model varies;
+  * a driver spec (`driver_spec`) instead of driverCls/provider/identity,
+    from which the worker builds the driver (`driver_from_spec`);
+  * datetimes as ISO 8601 strings (`encode_datetime`, `decode_datetime`).
+
+Those arguments serialize with `COMPACT_SERIALIZER` (json by default), so
+the messages stay small and do not break when a model changes shape. The
+loaders also accept model instances, so messages queued before a task was
+converted still run.
+
+`payload_size` tells how large the message of a task would be, see also
+`./manage.py audit_task_payloads`.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.utils.dateparse import parse_datetime
+from kombu.serialization import dumps
+
+#: Serializer of the tasks that follow this convention
+COMPACT_SERIALIZER = getattr(settings, 'TASK_PAYLOAD_SERIALIZER', 'json')
+
+
+def model_ids(objects):
+    """
+    Args:
+        objects: queryset, or iterable of model instances and/or ids
+
+    Returns:
+        list: the primary keys of `objects`, in order
+    """
+    if isinstance(objects, models.QuerySet):
+        return list(objects.values_list('pk', flat=True))
+    return [obj.pk if isinstance(obj, models.Model) else obj for obj in objects]
+
+
+def load_models(model, ids, queryset=None):
+    """
+    Load the objects of `model` with the primary keys `ids` in one query.
+
+    Args:
+        model: the model class
+        ids (list): primary keys (model instances are passed through)
+        queryset (optional): queryset of `model` to load from, e.g. with
+            `select_related`
+
+    Returns:
+        list: the objects, in the order of `ids`. Ids which no longer
+        exist are skipped.
+    """
+    ids = list(ids)
+    if queryset is None:
+        queryset = model.objects.all()
+    missing = [obj for obj in ids if not isinstance(obj, models.Model)]
+    loaded = queryset.in_bulk(missing) if missing else {}
+    objects = []
+    for obj in ids:
+        if not isinstance(obj, models.Model):
+            obj = loaded.get(model._meta.pk.to_python(obj))
+        if obj is not None:
+            objects.append(obj)
+    return objects
+
+
+def load_model(model, pk):
+    """
+    Returns:
+        the object of `model` with the primary key `pk` (or `pk` itself
+        when it already is a model instance)
+
+    Raises:
+        model.DoesNotExist
+    """
+    if isinstance(pk, models.Model):
+        return pk
+    return model.objects.get(pk=pk)
+
+
+def model_reference(obj):
+    """
+    Returns:
+        list: ["app_label.model", pk], loaded back by `load_reference`
+    """
+    return [obj._meta.label_lower, obj.pk]
+
+
+def load_reference(reference):
+    if isinstance(reference, models.Model):
+        return reference
+    label, pk = reference
+    return load_model(apps.get_model(label), pk)
+
+
+def driver_spec(core_identity):
+    """
+    Returns:
+        dict: what a worker needs to build the driver of `core_identity`
+    """
+    return {"identity_uuid": str(core_identity.uuid)}
+
+
+def is_driver_spec(value):
+    return isinstance(value, dict) and "identity_uuid" in value
+
+
+def driver_from_spec(spec):
+    """
+    Returns:
+        the rtwo driver of the identity of `spec`
+    """
+    from core.models import Identity
+    from service.driver import get_esh_driver
+    return get_esh_driver(Identity.objects.get(uuid=spec["identity_uuid"]))
+
+
+def encode_datetime(value):
+    return value.isoformat() if value else value
+
+
+def decode_datetime(value):
+    """
+    Returns:
+        datetime: `value` parsed, when it is an ISO 8601 string
+    """
+    if isinstance(value, basestring):
+        return parse_datetime(value)
+    return value
+
+
+def payload_size(args=(), kwargs=None, serializer=None):
+    """
+    Returns:
+        int: size in bytes of `args` and `kwargs` serialized with
+        `serializer` (default: the task serializer of the settings)
+    """
+    serializer = serializer or settings.CELERY_TASK_SERIALIZER
+    _, _, body = dumps([list(args), kwargs or {}, {}], serializer=serializer)
+    return len(body)
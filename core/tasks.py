@@ -2,12 +2,15 @@
 """
 Core application tasks
 """
+import time
+
 from celery.decorators import task
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
 from threepio import celery_logger, email_logger
 
 from core.models.status_type import get_status_type
+from core.task_payload import COMPACT_SERIALIZER, load_reference
 
 
 @task(name="send_email")
@@ -17,15 +20,7 @@ def send_email(subject, body, from_email, to, cc=None, html=False):
     """
 
     try:
-        msg = EmailMessage(
-            subject=subject, body=body, from_email=from_email, to=to, cc=cc
-        )
-        if html:
-            msg.content_subtype = 'html'
-        email_logger.info(
-            "\n> From:%s\n> To:%s\n> Cc:%s\n> Subject:%s\n> Body:\n%s",
-            from_email, to, cc, subject, body
-        )
+        msg = _email_message(subject, body, from_email, to, cc, html)
         if getattr(settings, "SEND_EMAILS", True):
             msg.send()
             email_logger.info("NOTE: Above message sent successfully")
@@ -43,19 +38,122 @@ def send_email(subject, body, from_email, to, cc=None, html=False):
         return False
 
 
-@task(name="close_request")
+def _email_message(subject, body, from_email, to, cc=None, html=False):
+    msg = EmailMessage(
+        subject=subject, body=body, from_email=from_email, to=to, cc=cc
+    )
+    if html:
+        msg.content_subtype = 'html'
+    email_logger.info(
+        "\n> From:%s\n> To:%s\n> Cc:%s\n> Subject:%s\n> Body:\n%s", from_email,
+        to, cc, subject, body
+    )
+    return msg
+
+
+def _send_over(connection, messages):
+    """
+    Send `messages` (keyword arguments of `send_email`) over `connection`
+
+    Returns:
+        list: the messages which could not be sent
+    """
+    failed = []
+    for message in messages:
+        try:
+            if not connection.send_messages([_email_message(**message)]):
+                raise Exception("Message was not sent")
+        except Exception:
+            celery_logger.exception(
+                "Could not send email '%s' to %s", message.get("subject"),
+                message.get("to")
+            )
+            failed.append(message)
+    return failed
+
+
+@task(
+    name="send_email_batch",
+    serializer=COMPACT_SERIALIZER,
+    max_retries=3,
+    default_retry_delay=60
+)
+def send_email_batch(messages):
+    """
+    Send many emails reusing one SMTP connection per `EMAIL_BATCH_SIZE`
+    messages. Each message which could not be sent is retried alone later,
+    in its own task, up to `max_retries` times.
+
+    messages: list of dicts of the keyword arguments of `send_email`
+
+    Returns:
+        dict: number of messages sent and failed, and the time it took
+    """
+    start = time.time()
+    if not getattr(settings, "SEND_EMAILS", True):
+        for message in messages:
+            _email_message(**message)
+        email_logger.info(
+            "NOTE: Above %s message(s) not sent -- SEND_EMAILS was False",
+            len(messages)
+        )
+        return {"sent": 0, "failed": 0, "seconds": 0}
+    batch_size = getattr(settings, "EMAIL_BATCH_SIZE", 50)
+    failed = []
+    for index in range(0, len(messages), batch_size):
+        batch = messages[index:index + batch_size]
+        batch_failed = batch
+        try:
+            with get_connection() as connection:
+                batch_failed = _send_over(connection, batch)
+        except Exception:
+            celery_logger.exception("Could not connect to send emails")
+        failed.extend(batch_failed)
+    seconds = time.time() - start
+    sent = len(messages) - len(failed)
+    celery_logger.info(
+        "send_email_batch: sent %s of %s email(s) in %.2fs (%.1f/s)", sent,
+        len(messages), seconds, sent / seconds if seconds else sent
+    )
+    if failed:
+        _retry_each(failed)
+    return {"sent": sent, "failed": len(failed), "seconds": seconds}
+
+
+def _retry_each(messages):
+    retries = send_email_batch.request.retries or 0
+    if retries >= send_email_batch.max_retries:
+        celery_logger.error(
+            "send_email_batch: giving up on %s email(s)", len(messages)
+        )
+        return
+    for message in messages:
+        send_email_batch.apply_async(
+            args=([message], ),
+            countdown=send_email_batch.default_retry_delay,
+            retries=retries + 1
+        )
+
+
+@task(name="close_request", serializer=COMPACT_SERIALIZER)
 def close_request(request):
     """
     Close the request and email approval message
+
+    request: `core.task_payload.model_reference` of the request
     """
+    request = load_reference(request)
     request.status = get_status_type(status="closed")
     request.save()
 
 
-@task(name='set_request_as_failed')
+@task(name='set_request_as_failed', serializer=COMPACT_SERIALIZER)
 def set_request_as_failed(request):
     """
     Set the request as failed
+
+    request: `core.task_payload.model_reference` of the request
     """
+    request = load_reference(request)
     request.status = get_status_type(status="failed")
     request.save()
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+
+from api.tests.factories import AllocationSourceFactory
+from core.models import AllocationSourceSnapshot, EventTable
+from cyverse_allocation.tasks import (
+    THRESHOLD_MET_EVENT, allocation_threshold_check, threshold_crossings
+)
+
+
+@override_settings(CHECK_THRESHOLD=True)
+class AllocationThresholdCheckTest(TestCase):
+    def setUp(self):
+        self.usages = {"TG-LOW": 10, "TG-HALF": 60, "TG-FULL": 95}
+        for name, compute_used in self.usages.items():
+            source = AllocationSourceFactory.create(
+                name=name, compute_allowed=100
+            )
+            AllocationSourceSnapshot.objects.update_or_create(
+                allocation_source=source,
+                defaults={
+                    'compute_used': compute_used,
+                    'compute_allowed': 100,
+                    'global_burn_rate': 0
+                }
+            )
+        self.saved = []
+        post_save.connect(self._saved, sender=EventTable)
+        self.addCleanup(post_save.disconnect, self._saved, sender=EventTable)
+
+    def _saved(self, sender, instance, created, **kwargs):
+        if instance.name == THRESHOLD_MET_EVENT:
+            self.saved.append(instance)
+
+    def _fired(self):
+        return sorted(
+            (
+                event.payload['allocation_source_name'],
+                event.payload['threshold']
+            ) for event in EventTable.objects.filter(name=THRESHOLD_MET_EVENT)
+        )
+
+    def test_lowest_threshold_not_fired_is_met(self):
+        allocation_threshold_check()
+        self.assertEqual(self._fired(), [("TG-FULL", 50.0), ("TG-HALF", 50.0)])
+        self.assertEqual(len(self.saved), 2)
+
+        allocation_threshold_check()
+        self.assertEqual(
+            self._fired(),
+            [("TG-FULL", 50.0), ("TG-FULL", 90.0), ("TG-HALF", 50.0)]
+        )
+
+        allocation_threshold_check()
+        self.assertEqual(len(self._fired()), 3)
+
+    def test_threshold_crossings(self):
+        with self.assertNumQueries(2):
+            crossings = threshold_crossings([50.0, 90.0])
+        self.assertEqual(
+            crossings, [("TG-FULL", 50.0, 95.0), ("TG-HALF", 50.0, 60.0)]
+        )
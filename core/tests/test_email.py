@@ -1,7 +1,13 @@
+from django.core import mail
+from django.core.mail import get_connection
 from django.test import TestCase, override_settings
 import mock
 
-from core.email import resource_request_email, email_admin, email_from_admin
+from core.email import (
+    resource_request_email, email_admin, email_from_admin, admin_email_message,
+    send_emails
+)
+from core.tasks import send_email_batch
 from api.tests.factories import UserFactory
 
 
@@ -82,3 +88,57 @@ class EmailTests(TestCase):
                 subject=kwargs['subject'],
                 body=kwargs['body'],
             )
+
+
+@override_settings(SEND_EMAILS=True)
+class EmailBatchTests(TestCase):
+    def setUp(self):
+        self.messages = [
+            {
+                "subject": "Subject %s" % index,
+                "body": "Body",
+                "from_email": "admin@local.atmo.cloud",
+                "to": ["user%s@site.com" % index]
+            } for index in range(3)
+        ]
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_batches_share_a_connection(self):
+        with mock.patch(
+            'core.tasks.get_connection', wraps=get_connection
+        ) as connect:
+            result = send_email_batch(self.messages)
+        self.assertEqual(connect.call_count, 2)
+        self.assertEqual(result["sent"], 3)
+        self.assertEqual(
+            [msg.subject for msg in mail.outbox],
+            ["Subject 0", "Subject 1", "Subject 2"]
+        )
+
+    def test_failed_messages_are_retried_alone(self):
+        self.messages[0]["to"] = "not a list"
+        self.messages[1]["to"] = "not a list"
+        with mock.patch.object(send_email_batch, 'apply_async') as retry:
+            result = send_email_batch(self.messages)
+        self.assertEqual(result["sent"], 1)
+        self.assertEqual(result["failed"], 2)
+        self.assertEqual(
+            [call[1]["args"] for call in retry.call_args_list],
+            [([self.messages[0]], ), ([self.messages[1]], )]
+        )
+        self.assertEqual(retry.call_args[1]["retries"], 1)
+
+    def test_send_emails(self):
+        UserFactory(
+            username="user0",
+            first_name="First",
+            last_name="Last",
+            email="first@site.com"
+        )
+        with override_settings(
+            ATMO_DAEMON=('AtmoAdmin', 'admin@local.atmo.cloud')
+        ):
+            message = admin_email_message("user0", "Subject", "Body")
+            self.assertEqual(send_emails([message, message]), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['First Last <first@site.com>'])
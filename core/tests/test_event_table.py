@@ -1,6 +1,10 @@
 from unittest import skip
 
+from django.core.management import call_command
 from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+from django.utils.timezone import datetime, timedelta
+import pytz
 
 from api.tests.factories import UserFactory
 from core.models import EventTable, AllocationSource
@@ -47,3 +51,43 @@ class EventTableTest(TestCase):
                 'threshold': 10
             }
         )
+
+
+class EventTablePayloadLookupTest(TestCase):
+    def setUp(self):
+        start = datetime(2018, 1, 1, tzinfo=pytz.utc)
+        self.events = [
+            EventTable.objects.create(
+                name='test_event',
+                entity_id='user0',
+                payload={
+                    'allocation_source_name': name,
+                    'threshold': threshold
+                },
+                timestamp=start + timedelta(days=index)
+            ) for index, (name, threshold) in
+            enumerate([('TG-1', 50), ('TG-2', 50), ('TG-1', 90)])
+        ]
+
+    def test_latest_for(self):
+        self.assertEqual(
+            EventTable.latest_for('test_event', allocation_source_name='TG-1'),
+            self.events[2]
+        )
+        self.assertIsNone(
+            EventTable.latest_for('other_event', allocation_source_name='TG-1')
+        )
+
+    def test_filter_for_keys_without_index(self):
+        self.assertEqual(
+            list(
+                EventTable.filter_for(
+                    'test_event', allocation_source_name='TG-1', threshold=50
+                )
+            ), [self.events[0]]
+        )
+
+    def test_event_table_plans(self):
+        out = StringIO()
+        call_command('event_table_plans', stdout=out)
+        self.assertIn("latest renewal of an allocation source", out.getvalue())
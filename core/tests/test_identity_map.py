@@ -0,0 +1,55 @@
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.factories import InstanceFactory
+from core import identity_map
+from core.models.instance import find_instance
+
+
+class IdentifierKindTest(TestCase):
+    def test_identifier_kind(self):
+        self.assertEqual(
+            identity_map.identifier_kind(12), identity_map.INT_IDENTIFIER
+        )
+        self.assertEqual(
+            identity_map.identifier_kind(u"12"), identity_map.INT_IDENTIFIER
+        )
+        self.assertEqual(
+            identity_map.identifier_kind(str(uuid.uuid4())),
+            identity_map.UUID_IDENTIFIER
+        )
+        self.assertEqual(
+            identity_map.identifier_kind("my-image"),
+            identity_map.STRING_IDENTIFIER
+        )
+
+
+class FindInstanceTest(TestCase):
+    def setUp(self):
+        self.instance = InstanceFactory.create(provider_alias=uuid.uuid4())
+        self.addCleanup(identity_map.deactivate)
+
+    def test_find_by_id_or_alias(self):
+        alias = str(self.instance.provider_alias)
+        self.assertEqual(find_instance(self.instance.id), self.instance)
+        self.assertEqual(find_instance(str(self.instance.id)), self.instance)
+        self.assertEqual(find_instance(alias), self.instance)
+        self.assertIsNone(find_instance(str(uuid.uuid4())))
+
+    def test_repeated_lookups_query_once_per_request(self):
+        alias = str(self.instance.provider_alias)
+        identity_map.activate()
+        with CaptureQueriesContext(connection) as queries:
+            first = find_instance(alias)
+            second = find_instance(alias)
+        self.assertIs(first, second)
+        self.assertEqual(len(queries), 1)
+
+        identity_map.deactivate()
+        with CaptureQueriesContext(connection) as queries:
+            find_instance(alias)
+            find_instance(alias)
+        self.assertEqual(len(queries), 2)
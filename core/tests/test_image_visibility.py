@@ -0,0 +1,62 @@
+from django.test import TestCase
+import mock
+
+from api.tests.factories import (
+    AnonymousUserFactory, ApplicationVersionFactory, IdentityFactory,
+    ImageFactory, ProviderFactory, ProviderMachineFactory, UserFactory
+)
+from core.models import Application
+from core.tests.test_metrics import FakeRedis
+
+
+class ImagesForUserTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch(
+            "service.cache.redis_connection", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = UserFactory.create()
+        self.identity = IdentityFactory.create_identity(
+            created_by=self.user, provider=ProviderFactory.create()
+        )
+        self.image = self._create_image()
+
+    def _create_image(self):
+        image = ImageFactory.create(created_by=self.user, private=True)
+        version = ApplicationVersionFactory.create_version(
+            self.user, self.identity, application=image
+        )
+        ProviderMachineFactory.create_provider_machine(
+            self.user, self.identity, application=image, version=version
+        )
+        return image
+
+    def test_visible_ids_are_cached(self):
+        self.assertEqual(
+            list(Application.images_for_user(self.user)), [self.image]
+        )
+        with mock.patch.object(
+            Application, "_user_image_ids", return_value=[]
+        ) as user_image_ids:
+            self.assertEqual(
+                list(Application.images_for_user(self.user)), [self.image]
+            )
+            self.assertFalse(user_image_ids.called)
+
+    def test_changes_invalidate_the_cache(self):
+        Application.images_for_user(self.user)
+        image = self._create_image()
+        self.assertEqual(
+            set(Application.images_for_user(self.user)),
+            set([self.image, image])
+        )
+
+    def test_anonymous_users_share_the_public_set(self):
+        with mock.patch.object(
+            Application, "_public_image_ids", return_value=[self.image.id]
+        ) as public_image_ids:
+            Application.images_for_user(AnonymousUserFactory())
+            Application.images_for_user(None)
+        self.assertEqual(public_image_ids.call_count, 1)
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+import mock
+import redis
+
+from core import launch_trace
+from core.models import LaunchTrace
+from core.models.launch_trace import (
+    DEPLOYED, LAUNCHED, NETWORKING, REQUESTED, VALIDATED
+)
+
+
+class FakeRedis(object):
+    """
+    The list commands used by core.launch_trace
+    """
+
+    def __init__(self):
+        self.lists = {}
+        self.results = None
+
+    def pipeline(self):
+        self.results = []
+        return self
+
+    def execute(self):
+        results, self.results = self.results, None
+        return results
+
+    @staticmethod
+    def _range(values, start, end):
+        return values[start:end + 1 if end >= 0 else len(values) + end + 1]
+
+    def _result(self, value):
+        if self.results is None:
+            return value
+        self.results.append(value)
+        return self
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+        return self._result(len(self.lists[key]))
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self._range(self.lists.get(key, []), start, end)
+        return self._result(True)
+
+    def lrange(self, key, start, end):
+        return self._result(self._range(self.lists.get(key, []), start, end))
+
+    def delete(self, key):
+        return self._result(int(self.lists.pop(key, None) is not None))
+
+
+class LaunchTraceTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch(
+            'service.cache.redis_connection', return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def _record(self, alias, seconds, **details):
+        for stage, offset in zip(
+            (REQUESTED, VALIDATED, LAUNCHED, NETWORKING, DEPLOYED), seconds
+        ):
+            launch_trace.record_stage(
+                alias, stage, self.start + timedelta(seconds=offset), **details
+            )
+
+    def test_flush_merges_the_stages(self):
+        launch_trace.record_stage(
+            "alias-1", LAUNCHED, self.start, image="image-1", size="small"
+        )
+        launch_trace.record_stage(
+            "alias-1",
+            REQUESTED,
+            self.start - timedelta(seconds=5),
+            username="user-1",
+            size="ignored"
+        )
+        self.assertEqual(launch_trace.flush(), 2)
+        self.assertEqual(launch_trace.flush(), 0)
+
+        launch_trace.record_stage(
+            "alias-1", NETWORKING, self.start + timedelta(seconds=30)
+        )
+        # The first time a stage is reached wins
+        launch_trace.record_stage(
+            "alias-1", LAUNCHED, self.start + timedelta(seconds=60)
+        )
+        with self.assertNumQueries(2):
+            launch_trace.flush()
+
+        trace = LaunchTrace.objects.get(instance_alias="alias-1")
+        self.assertEqual(trace.username, "user-1")
+        self.assertEqual(trace.image, "image-1")
+        self.assertEqual(trace.size, "small")
+        self.assertEqual(trace.requested, self.start - timedelta(seconds=5))
+        self.assertEqual(trace.launched, self.start)
+        self.assertEqual(trace.networking, self.start + timedelta(seconds=30))
+        self.assertIsNone(trace.deployed)
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            launch_trace.record_stage("alias-1", "booted")
+
+    def test_redis_errors_do_not_raise(self):
+        with mock.patch.object(
+            self.redis,
+            'execute',
+            side_effect=redis.exceptions.TimeoutError("Timeout")
+        ):
+            launch_trace.record_stage("alias-1", REQUESTED)
+
+    def test_buffer_is_capped(self):
+        with self.settings(LAUNCH_TRACE_BUFFER_SIZE=3):
+            for index in range(5):
+                launch_trace.record_stage("alias-%s" % index, REQUESTED)
+        self.assertEqual(launch_trace.flush(), 3)
+        aliases = LaunchTrace.objects.values_list('instance_alias', flat=True)
+        self.assertEqual(sorted(aliases), ["alias-2", "alias-3", "alias-4"])
+
+    def test_latency_percentiles(self):
+        for index in range(10):
+            self._record(
+                "small-%s" % index, (0, 1, 10, 20, 100 + index), size="small"
+            )
+        # Not deployed yet
+        self._record("large-0", (0, 2, 30), size="large")
+        launch_trace.flush()
+
+        results = launch_trace.latency_percentiles(
+            "size", percentiles=(50, 100)
+        )
+        self.assertEqual(
+            [result["size"] for result in results], ["large", "small"]
+        )
+        large, small = results
+        self.assertEqual(large["launches"], 1)
+        self.assertEqual(large["request_to_launch"]["p50"], 30)
+        self.assertEqual(large["request_to_deploy"]["count"], 0)
+        self.assertIsNone(large["request_to_deploy"]["p50"])
+        self.assertEqual(small["launches"], 10)
+        self.assertEqual(small["request_to_validate"]["p100"], 1)
+        self.assertEqual(small["launch_to_networking"]["p50"], 10)
+        self.assertEqual(small["request_to_deploy"]["count"], 10)
+        self.assertEqual(small["request_to_deploy"]["p100"], 109)
+
+        since = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(launch_trace.latency_percentiles(since=since), [])
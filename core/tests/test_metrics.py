@@ -0,0 +1,99 @@
+import json
+
+from django.test import TestCase
+import mock
+
+from core.metrics import instance as instance_metrics
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def expire(self, key, ttl):
+        pass
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+class InstanceMetricsTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch(
+            "service.cache.redis_connection", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.instances = [
+            mock.Mock(provider_alias="uuid-%s" % index) for index in range(3)
+        ]
+
+    def _series(self, uuids, fields, timeout=None):
+        return dict(
+            (uuid, [{
+                "target": "stats.cpu.%s.cpu" % uuid
+            }]) for uuid in uuids
+        )
+
+    def test_misses_are_fetched_in_batches(self):
+        with mock.patch.object(instance_metrics, "BATCH_SIZE", 2), \
+                mock.patch.object(
+                    instance_metrics, "request_metrics_batch",
+                    side_effect=self._series
+                ) as request_batch:
+            metrics = instance_metrics.get_instances_metrics(self.instances)
+            self.assertEqual(request_batch.call_count, 2)
+            self.assertEqual(sorted(metrics), ["uuid-0", "uuid-1", "uuid-2"])
+
+            # Served from the cache afterwards
+            instance_metrics.get_instances_metrics(self.instances)
+            self.assertEqual(request_batch.call_count, 2)
+
+    def test_metrics_fetched_by_another_request_are_awaited(self):
+        fields = instance_metrics.params_to_fields(None)
+        key = instance_metrics._to_instance_key("uuid-0", fields)
+        self.redis.set(key + ":lock", "other-request")
+
+        def other_request_finishes(seconds):
+            self.redis.set(key, json.dumps([{"target": "uuid-0"}]))
+
+        with mock.patch.object(
+            instance_metrics, "request_metrics_batch", side_effect=self._series
+        ) as request_batch, mock.patch(
+            "core.metrics.instance.time.sleep",
+            side_effect=other_request_finishes
+        ):
+            metrics = instance_metrics.get_instances_metrics(self.instances)
+        self.assertEqual(request_batch.call_args[0][0], ["uuid-1", "uuid-2"])
+        self.assertEqual(metrics["uuid-0"], [{"target": "uuid-0"}])
+
+    def test_cache_key_depends_on_params(self):
+        cpu = instance_metrics.params_to_fields({"field": "cpu"})
+        mem = instance_metrics.params_to_fields({"field": "mem"})
+        self.assertNotEqual(
+            instance_metrics._to_instance_key("uuid-0", cpu),
+            instance_metrics._to_instance_key("uuid-0", mem)
+        )
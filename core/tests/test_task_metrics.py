@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+import time
+
+from django.test import TestCase, override_settings
+import mock
+
+from core import task_metrics
+
+
+class FakeRedis(object):
+    """
+    The hash commands used by core.task_metrics
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.results = []
+
+    def pipeline(self, transaction=True):
+        self.results = []
+        return self
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        self.results.append(int(values[field]))
+
+    def hincrbyfloat(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(float(values.get(field, 0)) + amount)
+        self.results.append(float(values[field]))
+
+    def hgetall(self, key):
+        self.results.append(dict(self.hashes.get(key, {})))
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+
+@override_settings(
+    CELERYBEAT_SCHEDULE={
+        "monitor_instances":
+            {
+                "task": "monitor_instances",
+                "schedule": timedelta(minutes=15)
+            }
+    }
+)
+class TaskMetricsTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch(
+            'service.cache.redis_connection', return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _task(self, name, sent_at=None, eta=None):
+        task = mock.Mock(ignore_result=False)
+        task.name = name
+        task.request = mock.Mock(is_eager=False, eta=eta)
+        setattr(task.request, task_metrics.SENT_AT_HEADER, sent_at)
+        return task
+
+    def test_published_tasks_carry_their_sent_time(self):
+        headers = {}
+        task_metrics._task_published(headers=headers)
+        self.assertAlmostEqual(
+            headers[task_metrics.SENT_AT_HEADER], time.time(), delta=5
+        )
+
+    def test_signals_record_the_task_run(self):
+        task = self._task("monitor_instances_for", sent_at=time.time() - 20)
+        task_metrics._task_started(task_id="id-1", task=task)
+        task_metrics._task_failed(sender=task, task_id="id-1")
+        task_metrics._task_finished(
+            task_id="id-1", task=task, retval=None, state="FAILURE"
+        )
+        task = self._task("monitor_instances_for")
+        task_metrics._task_started(task_id="id-2", task=task)
+        task_metrics._task_retried(sender=task, request=task.request)
+        task_metrics._task_finished(
+            task_id="id-2", task=task, retval=[1, 2, 3], state="SUCCESS"
+        )
+
+        result, = task_metrics.task_report()
+        self.assertEqual(result["task"], "monitor_instances_for")
+        self.assertEqual(result["runs"], 2)
+        self.assertEqual(result["retries"], 1)
+        self.assertEqual(result["failures"], 1)
+        self.assertGreater(result["result_size"], 0)
+        self.assertEqual(result["wait"]["count"], 1)
+        self.assertEqual(result["wait"]["p50"], 30)
+        self.assertEqual(result["runtime"]["count"], 2)
+        self.assertEqual(result["runtime"]["p99"], 0.1)
+        # Fanned out by the periodic "monitor_instances"
+        self.assertEqual(result["interval"], 15 * 60)
+        self.assertFalse(result["overrun"])
+
+    def test_tasks_that_never_finish_are_forgotten(self):
+        self.addCleanup(task_metrics._started.clear)
+        task = self._task("monitor_instances_for")
+        with mock.patch('core.task_metrics.time') as mock_time:
+            mock_time.time.return_value = 1000
+            task_metrics._task_started(task_id="killed", task=task)
+            mock_time.time.return_value = 1000 + task_metrics.STARTED_TTL + 1
+            task_metrics._task_started(task_id="id-1", task=task)
+        self.assertEqual(list(task_metrics._started), ["id-1"])
+
+        with mock.patch.object(task_metrics, 'STARTED_SIZE', 3):
+            for index in range(5):
+                task_metrics._task_started(task_id="id-%s" % index, task=task)
+        self.assertEqual(len(task_metrics._started), 3)
+        self.assertIn("id-4", task_metrics._started)
+
+    def test_eager_tasks_are_not_recorded(self):
+        task = self._task("monitor_instances")
+        task.request.is_eager = True
+        task_metrics._task_started(task_id="id-1", task=task)
+        task_metrics._task_finished(task_id="id-1", task=task)
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_report_merges_hours_and_flags_overruns(self):
+        now = datetime.utcnow()
+        with mock.patch('core.task_metrics.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = now - timedelta(hours=1)
+            task_metrics.record(
+                "monitor_instances", timings={"runtime": 20 * 60}, runs=1
+            )
+            mock_datetime.utcnow.return_value = now
+            for _ in range(3):
+                task_metrics.record(
+                    "monitor_instances", timings={"runtime": 2 * 60}, runs=1
+                )
+            task_metrics.record("send_email", timings={"runtime": 2}, runs=1)
+
+        current, = [
+            result for result in task_metrics.task_report(now=now)
+            if result["task"] == "monitor_instances"
+        ]
+        self.assertEqual(current["runs"], 3)
+        self.assertEqual(current["runtime"]["p99"], 5 * 60)
+        self.assertFalse(current["overrun"])
+
+        overrun, email = task_metrics.task_report(hours=2, now=now)
+        self.assertEqual(overrun["runs"], 4)
+        self.assertEqual(overrun["runtime"]["p50"], 5 * 60)
+        self.assertEqual(overrun["runtime"]["p99"], 30 * 60)
+        self.assertEqual(overrun["runtime"]["mean"], (20 + 3 * 2) * 60 / 4.0)
+        self.assertTrue(overrun["overrun"])
+        self.assertIsNone(email["interval"])
+        self.assertFalse(email["overrun"])
+
+    def test_counters_are_reported_apart_from_tasks(self):
+        now = datetime.utcnow()
+        with mock.patch('core.task_metrics.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = now
+            task_metrics.record("send_email", timings={"runtime": 2}, runs=1)
+            task_metrics.count("network_sessions", authentications=1)
+            task_metrics.count("network_sessions", reused=1)
+            task_metrics.count("network_sessions", reused=1)
+
+        self.assertEqual(
+            [result["task"] for result in task_metrics.task_report(now=now)],
+            ["send_email"]
+        )
+        counters = task_metrics.counter_report(now=now)
+        self.assertEqual(list(counters), ["network_sessions"])
+        self.assertEqual(
+            counters["network_sessions"], {
+                "authentications": 1,
+                "reused": 2
+            }
+        )
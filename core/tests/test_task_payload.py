@@ -0,0 +1,74 @@
+import base64
+import cPickle as pickle
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import task_payload
+from core.management.commands.audit_task_payloads import audit_messages
+from core.models.status_type import StatusType
+
+
+class TaskPayloadTest(TestCase):
+    def setUp(self):
+        self.statuses = [
+            StatusType.objects.create(name="status-%s" % index)
+            for index in range(3)
+        ]
+
+    def test_models_are_loaded_in_order_with_one_query(self):
+        ids = task_payload.model_ids(reversed(self.statuses))
+        deleted = StatusType.objects.create(name="deleted")
+        ids.append(deleted.id)
+        deleted.delete()
+        with self.assertNumQueries(1):
+            loaded = task_payload.load_models(StatusType, ids)
+        self.assertEqual(loaded, list(reversed(self.statuses)))
+
+    def test_model_instances_are_passed_through(self):
+        with self.assertNumQueries(0):
+            loaded = task_payload.load_models(StatusType, self.statuses)
+        self.assertEqual(loaded, self.statuses)
+
+    def test_model_reference(self):
+        reference = task_payload.model_reference(self.statuses[0])
+        reference = json.loads(json.dumps(reference))
+        self.assertEqual(
+            task_payload.load_reference(reference), self.statuses[0]
+        )
+
+    def test_datetimes(self):
+        now = timezone.now()
+        encoded = json.loads(json.dumps(task_payload.encode_datetime(now)))
+        self.assertEqual(task_payload.decode_datetime(encoded), now)
+        self.assertIsNone(task_payload.decode_datetime(None))
+
+    def test_ids_are_smaller_than_pickled_models(self):
+        pickled = task_payload.payload_size(
+            (self.statuses, ), serializer="pickle"
+        )
+        compact = task_payload.payload_size(
+            (task_payload.model_ids(self.statuses), ), serializer="json"
+        )
+        self.assertLess(compact, pickled)
+
+    def test_audit_messages(self):
+        body = pickle.dumps(((self.statuses[0], ), {}, {}), 2)
+        message = json.dumps(
+            {
+                "body": base64.b64encode(body),
+                "content-type": "application/x-python-serialize",
+                "headers": {
+                    "task": "close_request"
+                },
+                "properties": {
+                    "body_encoding": "base64"
+                }
+            }
+        )
+        stats = audit_messages([message, message, "not json"])
+        entry = stats[("close_request", "application/x-python-serialize")]
+        self.assertEqual(entry["count"], 2)
+        self.assertEqual(entry["max"], len(body))
+        self.assertIn("django.db.models.base.model_unpickle", entry["classes"])
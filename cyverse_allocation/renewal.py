@@ -0,0 +1,172 @@
+"""
+Batch evaluation of the renewal strategies of allocation sources.
+
+Evaluates the same conditions as the `cyverse_rules` of the rules engine
+(see `cyverse_rules_engine_setup`), for many allocation sources at once:
+the last renewal dates come from one grouped query and the conditions of
+each strategy are evaluated over arrays, instead of building rule
+variables/actions and running the rules engine once per source.
+"""
+import pprint
+
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.db.models import Max
+from django.utils import timezone
+import numpy as np
+import pytz
+
+from core.models import EventTable
+from core.models.allocation_source import AllocationSourceSnapshot
+from cyverse_allocation.cyverse_rules_engine_setup import renewal_strategies
+
+RENEWAL_EVENT = 'allocation_source_created_or_renewed'
+
+_EPOCH = timezone.datetime(1970, 1, 1, tzinfo=pytz.utc)
+_DAY = 24 * 60 * 60
+
+
+def last_renewal_dates(source_names):
+    """
+    Returns:
+        dict: allocation source name -> timestamp of its last
+        'allocation_source_created_or_renewed' event
+    """
+    return dict(
+        EventTable.objects.filter(name=RENEWAL_EVENT).annotate(
+            source_name=KeyTextTransform('allocation_source_name', 'payload')
+        ).filter(source_name__in=list(source_names)
+                ).order_by().values('source_name').annotate(
+                    last_renewal=Max('timestamp')
+                ).values_list('source_name', 'last_renewal')
+    )
+
+
+def _seconds(value):
+    return (value - _EPOCH).total_seconds() if value else np.nan
+
+
+def due_renewals(
+    allocation_sources,
+    current_time,
+    last_renewals,
+    strategies=renewal_strategies
+):
+    """
+    Args:
+        allocation_sources (list): allocation sources to evaluate
+        current_time (datetime): time of the evaluation
+        last_renewals (dict): allocation source name -> date the source was
+            last renewed. Sources without a date are not renewed.
+        strategies (dict): renewal strategy configuration
+
+    Returns:
+        list: (allocation source, strategy name, compute allowed) of the
+        allocation sources that should be renewed
+    """
+    sources = [
+        source
+        for source in allocation_sources if last_renewals.get(source.name)
+    ]
+    if not sources:
+        return []
+    source_strategies = np.array(
+        [source.renewal_strategy for source in sources], dtype=object
+    )
+    end_dates = np.array([_seconds(source.end_date) for source in sources])
+    renewal_dates = np.array(
+        [_seconds(last_renewals[source.name]) for source in sources]
+    )
+    now = _seconds(current_time)
+    days_since_renewed = np.floor((now - renewal_dates) / _DAY)
+    is_valid = np.isnan(end_dates) | (end_dates > now)
+
+    renewals = []
+    for strategy_name, config in sorted(strategies.items()):
+        period_type = config.get('period_type')
+        period_param = config.get('period_param')
+        if not period_type:
+            # Strategies without a period are never renewed automatically
+            continue
+        due = (source_strategies == strategy_name) & is_valid
+        if period_type == 'on_calendar_day':
+            due &= days_since_renewed >= 1
+            due &= current_time.day == period_param
+        elif period_type == 'days':
+            due &= days_since_renewed >= period_param
+        for index in np.flatnonzero(due):
+            renewals.append(
+                (
+                    sources[index], strategy_name,
+                    config.get('compute_allowed', 0)
+                )
+            )
+    return renewals
+
+
+def create_renewal_events(renewals, current_time, dry_run=False):
+    """
+    Fire the 'allocation_source_created_or_renewed' event of every renewal
+    of `renewals` with one insert, or only print them when `dry_run`.
+
+    Returns:
+        list: the payloads of the events
+    """
+    events = [
+        EventTable(
+            name=RENEWAL_EVENT,
+            entity_id=source.name,
+            timestamp=current_time,
+            payload={
+                "uuid": str(source.uuid),
+                "renewal_strategy": strategy_name,
+                "allocation_source_name": source.name,
+                "compute_allowed": compute_allowed
+            }
+        ) for source, strategy_name, compute_allowed in renewals
+    ]
+    if dry_run:
+        for event in events:
+            print(
+                '''EventTable.objects.create(name='{}',
+                              payload={},
+                              entity_id='{}',
+                              timestamp={})
+        '''.format(
+                    event.name, pprint.pformat(event.payload), event.entity_id,
+                    current_time
+                )
+            )
+    else:
+        EventTable.bulk_create_events(events)
+    return [event.payload for event in events]
+
+
+def forced_renewals(
+    allocation_sources, compute_allowed, ignore_current_compute_allowed=False
+):
+    """
+    Renew `allocation_sources` regardless of the strategy conditions, with
+    `compute_allowed` or, unless `ignore_current_compute_allowed`, their
+    current compute allowed when it is larger (read with one query).
+
+    Returns:
+        list: (allocation source, strategy name, compute allowed)
+    """
+    current = {}
+    if not ignore_current_compute_allowed:
+        current = dict(
+            AllocationSourceSnapshot.objects.filter(
+                allocation_source__in=allocation_sources
+            ).values_list('allocation_source_id', 'compute_allowed')
+        )
+    renewals = []
+    for source in allocation_sources:
+        total_compute_allowed = compute_allowed
+        if source.id in current:
+            snapshot_compute_allowed = float(current[source.id])
+            if snapshot_compute_allowed > compute_allowed:
+                total_compute_allowed = snapshot_compute_allowed
+        renewals.append(
+            (source, source.renewal_strategy, total_compute_allowed)
+        )
+    return renewals
@@ -1,34 +1,39 @@
-import pprint
-
-from business_rules import run_all
 from celery.decorators import task
 from django.conf import settings
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.db.models import ExpressionWrapper, F, FloatField
 from django.utils import timezone
 from django.utils.timezone import datetime
 from threepio import celery_logger as logger
 
 from core.models import EventTable
+from core.task_payload import (
+    COMPACT_SERIALIZER, decode_datetime, encode_datetime, load_models, model_ids
+)
 from core.models.allocation_source import AllocationSourceSnapshot, AllocationSource, UserAllocationSnapshot, \
     total_usage
-from cyverse_allocation.cyverse_rules_engine_setup import CyverseTestRenewalVariables, CyverseTestRenewalActions, \
-    cyverse_rules, renewal_strategies
+from cyverse_allocation.cyverse_rules_engine_setup import renewal_strategies
+from cyverse_allocation.renewal import (
+    create_renewal_events, due_renewals, forced_renewals, last_renewal_dates
+)
 
 
 @task(name="update_snapshot_cyverse")
 def update_snapshot_cyverse(start_date=None, end_date=None):
     all_sources = AllocationSource.objects.order_by('name')
     n = settings.ALLOC_SNAPSHOT_SIZE
-    num_sources = len(all_sources)
+    num_sources = all_sources.count()
     if num_sources > n:
-        for i in range(0, len(all_sources), n):
+        source_ids = model_ids(all_sources)
+        for i in range(0, len(source_ids), n):
             logger.debug(
                 "Updating {} of {} allocation sources ".format(n, num_sources)
             )
             update_snapshot_cyverse_for.apply_async(
-                args=(all_sources[i:i + n], ),
+                args=(source_ids[i:i + n], ),
                 kwargs={
-                    'start_date': start_date,
-                    'end_date': end_date
+                    'start_date': encode_datetime(start_date),
+                    'end_date': encode_datetime(end_date)
                 },
                 expires=15 * 60
             )
@@ -43,40 +48,49 @@ def update_snapshot_cyverse(start_date=None, end_date=None):
         )
 
 
-@task(name="update_snapshot_cyverse_for")
+@task(name="update_snapshot_cyverse_for", serializer=COMPACT_SERIALIZER)
 def update_snapshot_cyverse_for(
     allocation_sources, start_date=None, end_date=None
 ):
+    """
+    allocation_sources: ids of the allocation sources to snapshot
+    start_date, end_date: datetimes or ISO 8601 strings
+    """
     logger.debug("update_snapshot_cyverse task started at %s." % datetime.now())
+    allocation_sources = load_models(AllocationSource, allocation_sources)
+    start_date = decode_datetime(start_date)
+    end_date = decode_datetime(end_date)
     end_date = timezone.now().replace(
         microsecond=0
     ) if not end_date else end_date
 
+    last_renewals = last_renewal_dates(
+        [str(source.name) for source in allocation_sources]
+    )
+    renewal_dates = {}
     for allocation_source in allocation_sources:
         # calculate and save snapshots here
         allocation_source_name = allocation_source.name
-        last_renewal_event = EventTable.objects.filter(
-            name='allocation_source_created_or_renewed',
-            payload__allocation_source_name__exact=str(allocation_source_name)
-        ).order_by('timestamp')
+        last_renewal = last_renewals.get(str(allocation_source_name))
 
-        if not last_renewal_event:
+        if not last_renewal:
             logger.info(
                 'Allocation Source %s Create/Renewal event missing',
                 allocation_source_name
             )
             continue
 
-        start_date = last_renewal_event.last().timestamp.replace(
+        source_start_date = last_renewal.replace(
             microsecond=0
         ) if not start_date else start_date
+        renewal_dates[allocation_source_name] = source_start_date
 
         total_compute_used = 0
         total_burn_rate = 0
         for user in allocation_source.all_users:
             compute_used, burn_rate = total_usage(
                 user.username,
-                start_date=start_date,
+                start_date=source_start_date,
                 end_date=end_date,
                 allocation_source_name=allocation_source_name,
                 burn_rate=True
@@ -100,17 +114,10 @@ def update_snapshot_cyverse_for(
             }
         )
 
-        run_all(
-            rule_list=cyverse_rules,
-            defined_variables=CyverseTestRenewalVariables(
-                allocation_source,
-                current_time=end_date,
-                last_renewal_event_date=start_date
-            ),
-            defined_actions=CyverseTestRenewalActions(
-                allocation_source, current_time=end_date
-            )
-        )
+    # Renew the sources whose renewal strategy is due, all at once
+    create_renewal_events(
+        due_renewals(allocation_sources, end_date, renewal_dates), end_date
+    )
     # At the end of the task, fire-off an allocation threshold check
     logger.debug(
         "update_snapshot_cyverse task finished at %s." % datetime.now()
@@ -118,6 +125,12 @@ def update_snapshot_cyverse_for(
     allocation_threshold_check.apply_async()
 
 
+#: Usage percentages for which an 'allocation_source_threshold_met' event
+#: is fired
+THRESHOLDS = [50.0, 90.0]
+THRESHOLD_MET_EVENT = 'allocation_source_threshold_met'
+
+
 @task(name="allocation_threshold_check")
 def allocation_threshold_check():
     logger.debug(
@@ -130,44 +143,76 @@ def allocation_threshold_check():
         )
         return
 
-    for allocation_source in AllocationSource.objects.filter(
-        compute_allowed__gte=0
-    ).all():
-        snapshot = allocation_source.snapshot
-        percentage_used = (
-            snapshot.compute_used / snapshot.compute_allowed
-        ) * 100
-        # check if percentage more than threshold
-        THRESHOLD = [50.0, 90.0]
-        for threshold in THRESHOLD:
-            if percentage_used > threshold:
-                allocation_source_name = allocation_source.name
-
-                # check if event has been fired
-                prev_event = EventTable.objects.filter(
-                    name='allocation_source_threshold_met',
-                    payload__allocation_source_name=allocation_source_name,
-                    payload__threshold=threshold
-                ).last()
-                if prev_event:
-                    continue
-
-                payload = {}
-                payload['allocation_source_name'] = allocation_source_name
-                payload['threshold'] = threshold
-                payload['usage_percentage'] = float(percentage_used)
-
-                EventTable.objects.create(
-                    name='allocation_source_threshold_met',
-                    payload=payload,
-                    entity_id=payload['allocation_source_name']
-                )
-                break
+    crossings = threshold_crossings(THRESHOLDS)
+    _create_threshold_events(crossings)
+    logger.debug(
+        "allocation_threshold_check: %s new threshold(s) met", len(crossings)
+    )
     logger.debug(
         "allocation_threshold_check task finished at %s." % datetime.now()
     )
 
 
+def threshold_crossings(thresholds):
+    """
+    Find the allocation sources whose usage crossed one of `thresholds`
+    (percentages) for which no 'allocation_source_threshold_met' event was
+    fired yet, with one query for the usage and one for the fired events.
+
+    Returns:
+        list: (allocation source name, threshold, usage percentage), at most
+        one per source: the lowest threshold not fired yet
+    """
+    thresholds = sorted(thresholds)
+    usages = AllocationSourceSnapshot.objects.filter(
+        allocation_source__compute_allowed__gte=0, compute_allowed__gt=0
+    ).annotate(
+        percentage_used=ExpressionWrapper(
+            F('compute_used') * 100 / F('compute_allowed'),
+            output_field=FloatField()
+        )
+    ).filter(percentage_used__gt=thresholds[0]
+            ).values_list('allocation_source__name', 'percentage_used')
+    usages = dict(usages)
+    if not usages:
+        return []
+    fired = set(
+        (source_name, float(threshold)) for source_name, threshold in
+        EventTable.objects.filter(name=THRESHOLD_MET_EVENT).annotate(
+            source_name=KeyTextTransform('allocation_source_name', 'payload'),
+            threshold=KeyTextTransform('threshold', 'payload')
+        ).filter(source_name__in=list(usages)
+                ).values_list('source_name', 'threshold')
+    )
+    crossings = []
+    for source_name, percentage_used in sorted(usages.items()):
+        for threshold in thresholds:
+            if percentage_used <= threshold:
+                break
+            if (source_name, threshold) not in fired:
+                crossings.append(
+                    (source_name, threshold, float(percentage_used))
+                )
+                break
+    return crossings
+
+
+def _create_threshold_events(crossings):
+    return EventTable.bulk_create_events(
+        [
+            EventTable(
+                name=THRESHOLD_MET_EVENT,
+                entity_id=source_name,
+                payload={
+                    'allocation_source_name': source_name,
+                    'threshold': threshold,
+                    'usage_percentage': percentage_used
+                }
+            ) for source_name, threshold, percentage_used in crossings
+        ]
+    )
+
+
 # Renew all allocation sources or a specific renewal strategy without waiting for rules engine
 def renew_allocation_sources(
     renewal_strategy=False,
@@ -175,20 +220,27 @@ def renew_allocation_sources(
     ignore_current_compute_allowed=False,
     dry_run=False
 ):
+    """
+    Returns:
+        list: payloads of the renewal events (printed only when `dry_run`)
+    """
     current_time = timezone.now() if not current_time else current_time
 
+    renewals = []
     for strategy, args in renewal_strategies.iteritems():
 
         if renewal_strategy and (str(renewal_strategy) != str(strategy)):
             continue
-        compute_allowed = args['compute_allowed']
-        for allocation_source in AllocationSource.objects.filter(
-            renewal_strategy=str(strategy)
-        ):
-            renew_allocation_source_for(
-                compute_allowed, allocation_source, current_time,
-                ignore_current_compute_allowed, dry_run
+        renewals.extend(
+            forced_renewals(
+                list(
+                    AllocationSource.objects.filter(
+                        renewal_strategy=str(strategy)
+                    )
+                ), args['compute_allowed'], ignore_current_compute_allowed
             )
+        )
+    return create_renewal_events(renewals, current_time, dry_run=dry_run)
 
 
 def renew_allocation_source_for(
@@ -198,42 +250,10 @@ def renew_allocation_source_for(
     ignore_current_compute_allowed=False,
     dry_run=False
 ):
-    total_compute_allowed = compute_allowed
-    if not ignore_current_compute_allowed:
-        source_snapshot = AllocationSourceSnapshot.objects.filter(
-            allocation_source=allocation_source
-        ).last()
-        if source_snapshot:
-            snapshot_compute_allowed = float(source_snapshot.compute_allowed)
-            if snapshot_compute_allowed > compute_allowed:
-                total_compute_allowed = snapshot_compute_allowed
-
-    # fire renewal event
-
-    renewal_strategy = allocation_source.renewal_strategy
-    allocation_source_name = allocation_source.name
-    allocation_source_uuid = allocation_source.uuid
-
-    payload = {
-        "uuid": str(allocation_source_uuid),
-        "renewal_strategy": renewal_strategy,
-        "allocation_source_name": allocation_source_name,
-        "compute_allowed": total_compute_allowed
-    }
-
-    if dry_run:
-        dry_run_text = '''EventTable.objects.create(name='allocation_source_created_or_renewed',
-                              payload={},
-                              entity_id='{}',
-                              timestamp={})
-        '''.format(
-            pprint.pformat(payload), allocation_source_name, current_time
-        )
-        print(dry_run_text)
-    else:
-        EventTable.objects.create(
-            name='allocation_source_created_or_renewed',
-            payload=payload,
-            entity_id=allocation_source_name,
-            timestamp=current_time
-        )
+    return create_renewal_events(
+        forced_renewals(
+            [allocation_source], compute_allowed, ignore_current_compute_allowed
+        ),
+        current_time,
+        dry_run=dry_run
+    )
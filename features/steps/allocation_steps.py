@@ -98,10 +98,13 @@ def allocation_source_overage_enforcement_for_user_called(context):
     for call in allocation_source_overage_enforcement_for_user.method_calls:
         context.test.assertEqual(len(call), 3)
         context.test.assertEqual(len(call[2]['args']), 2)
-        allocation_source = call[2]['args'][0]
-        context.test.assertIsInstance(allocation_source, AllocationSource)
-        user = call[2]['args'][1]
-        context.test.assertIsInstance(user, AtmosphereUser)
+        allocation_source_id, user_id = call[2]['args']
+        context.test.assertIsInstance(allocation_source_id, (int, long))
+        context.test.assertIsInstance(user_id, (int, long))
+        allocation_source = AllocationSource.objects.get(
+            id=allocation_source_id
+        )
+        user = AtmosphereUser.objects.get(id=user_id)
         method_calls.append(
             {
                 'username': user.username,
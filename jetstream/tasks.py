@@ -202,10 +202,10 @@ def update_snapshot(start_date=None, end_date=None):
             if not allocation_source:
                 continue
 
-            created_or_updated_event = EventTable.objects.filter(
-                name='allocation_source_created_or_renewed',
-                payload__allocation_source_name=allocation_source.name
-            ).order_by('timestamp').last()
+            created_or_updated_event = EventTable.latest_for(
+                'allocation_source_created_or_renewed',
+                allocation_source_name=allocation_source.name
+            )
 
             if created_or_updated_event:
                 # if renewed, change ignore old allocation usage
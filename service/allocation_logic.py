@@ -143,25 +143,25 @@ def map_events_to_histories(filtered_instance_histories, event_instance_dict):
 def get_allocation_source_name_from_event(
     username, report_start_date, instance_id, instance_history_start_date
 ):
-    events = EventTable.objects.filter(
+    event = EventTable.filter_for(
+        "instance_allocation_source_changed", instance_id=instance_id
+    ).filter(
         Q(
             Q(timestamp__lt=report_start_date) |
             Q(timestamp__gte=report_start_date
              ) & Q(timestamp__lt=instance_history_start_date)
-        ) & Q(name__exact="instance_allocation_source_changed") &
-        Q(Q(payload__username__exact=username) |
-          Q(entity_id=username)) & Q(payload__instance_id__exact=instance_id)
-    ).order_by('timestamp')
-    if not events:
+        ) & Q(Q(payload__username__exact=username) | Q(entity_id=username))
+    ).order_by('timestamp').last()
+    if not event:
         return False
     else:
         try:
             allocation_source_object = AllocationSource.objects.get(
-                name=events.last().payload['allocation_source_name']
+                name=event.payload['allocation_source_name']
             )
         except KeyError:
             allocation_source_object = AllocationSource.objects.get(
-                uuid=events.last().payload['allocation_source_id']
+                uuid=event.payload['allocation_source_id']
             )
         return allocation_source_object.name
 
@@ -2,6 +2,7 @@
 Common component for Argo
 """
 
+import copy
 import os
 import yaml
 from django.conf import settings
@@ -153,6 +154,34 @@ def _find_workflow_file(provider_dir_path, filename, provider_uuid):
         raise ProviderWorkflowDirNotExist(provider_uuid)
 
 
+_yaml_cache = {}
+
+
+def _load_yaml_file(file_path):
+    """
+    Read and parse a yaml file.
+    Parsed content is cached until the modification time of the file changes,
+    a copy is returned so callers are free to modify it.
+
+    Args:
+        file_path (str): path to the yaml file
+
+    Raises:
+        IOError: unable to open/read the file
+        yaml.YAMLError: unable to parse the file as YAML
+
+    Returns:
+        object: parsed content of the file
+    """
+    mtime = os.stat(file_path).st_mtime
+    cached = _yaml_cache.get(file_path)
+    if not cached or cached[0] != mtime:
+        with open(file_path, "r") as yaml_file:
+            cached = (mtime, yaml.safe_load(yaml_file.read()))
+        _yaml_cache[file_path] = cached
+    return copy.deepcopy(cached[1])
+
+
 def argo_lookup_workflow(base_directory, filename, provider_uuid):
     """
     Lookup workflow by name and cloud provider
@@ -176,11 +205,10 @@ def argo_lookup_workflow(base_directory, filename, provider_uuid):
 
     try:
         # read workflow definition
-        with open(wf_file_path, "r") as wf_file:
-            wf_def = yaml.safe_load(wf_file.read())
+        wf_def = _load_yaml_file(wf_file_path)
     except yaml.YAMLError:
         raise WorkflowFileNotYAML(wf_file_path)
-    except IOError:
+    except (IOError, OSError):
         raise WorkflowFileNotExist(wf_file_path)
 
     return wf_def
@@ -209,11 +237,10 @@ def argo_lookup_yaml_file(base_directory, filename, provider_uuid):
 
     try:
         # read workflow definition
-        with open(wf_file_path, "r") as wf_file:
-            wf_def = yaml.safe_load(wf_file.read())
+        wf_def = _load_yaml_file(wf_file_path)
     except yaml.YAMLError:
         raise WorkflowFileNotYAML(wf_file_path)
-    except IOError:
+    except (IOError, OSError):
         raise WorkflowFileNotExist(wf_file_path)
 
     return wf_def
@@ -243,8 +270,7 @@ def read_argo_config(config_file_path=None, provider_uuid=None):
             config_file_path = settings.ARGO_CONFIG_FILE_PATH
 
         # read config file
-        with open(settings.ARGO_CONFIG_FILE_PATH, "r") as config_file:
-            all_config = yaml.safe_load(config_file.read())
+        all_config = _load_yaml_file(config_file_path)
 
         # validate config
         if not isinstance(all_config, dict):
@@ -265,7 +291,7 @@ def read_argo_config(config_file_path=None, provider_uuid=None):
             return all_config[default_provider_uuid]
 
         return all_config[provider_uuid]
-    except IOError:
+    except (IOError, OSError):
         raise ArgoConfigFileNotExist(config_file_path)
     except yaml.YAMLError:
         raise ArgoConfigFileNotYAML(config_file_path)
@@ -8,6 +8,7 @@ from django.conf import settings
 from threepio import celery_logger
 import atmosphere
 
+from service.argo import watcher
 from service.argo.wf_call import argo_workflow_exec
 from service.argo.common import argo_context_from_config, read_argo_config
 from service.argo.exception import WorkflowFailed, WorkflowErrored
@@ -63,6 +64,57 @@ def argo_deploy_instance(
         raise exc
 
 
+def argo_deploy_instance_async(
+    provider_uuid,
+    instance_uuid,
+    server_ip,
+    username,
+    timezone,
+    callbacks=None,
+    errbacks=None,
+    attempts_left=0
+):
+    """
+    Submit the Argo workflow to deploy an instance without waiting for it.
+    The workflow is handed to the Argo watcher, which applies `callbacks`
+    once it succeed, or `errbacks` once it fails `attempts_left` + 1 times.
+
+    Args:
+        provider_uuid (str): provider uuid
+        instance_uuid (str): instance uuid
+        server_ip (str): ip of the server instance
+        username (str): username
+        timezone (str): timezone of the provider, e.g. America/Arizona
+        callbacks (list, optional): signatures to apply on success
+        errbacks (list, optional): signatures to apply on failure
+        attempts_left (int, optional): number of times to resubmit a failed workflow
+
+    Returns:
+        ArgoWorkflow: the submitted workflow
+    """
+    wf_data = _get_workflow_data(
+        provider_uuid, instance_uuid, server_ip, username, timezone
+    )
+    resubmit = {
+        "workflow_filename": "instance_deploy.yml",
+        "provider_uuid": provider_uuid,
+        "workflow_data": wf_data,
+        "config_file_path": settings.ARGO_CONFIG_FILE_PATH,
+    }
+    wf, _ = argo_workflow_exec(wait=False, **resubmit)
+    watcher.register(
+        provider_uuid,
+        wf.wf_name,
+        callbacks=callbacks,
+        errbacks=errbacks,
+        resubmit=resubmit,
+        attempts_left=attempts_left,
+        log_owner=(username, instance_uuid)
+    )
+    celery_logger.debug("ARGO, workflow {} submitted".format(wf.wf_name))
+    return wf
+
+
 def _get_workflow_data(
     provider_uuid, instance_uuid, server_ip, username, timezone
 ):
@@ -58,14 +58,27 @@ class ArgoAPIClient:
 
         return json_resp
 
-    def list_workflow(self):
+    def list_workflow(self, fields="", label_selector=""):
         """
         Endpoint for fetching a list of workflows
 
+        Args:
+            fields (str, optional): fields to be included in the response,
+                e.g. "items.metadata.name,items.status.phase"
+            label_selector (str, optional): only list workflows with these
+                labels, e.g. "username=user1"
+
         Returns:
             dict: response text as JSON object
         """
         api_url = "/api/v1/workflows/" + self._namespace
+        query = []
+        if fields:
+            query.append("fields={}".format(fields))
+        if label_selector:
+            query.append("listOptions.labelSelector={}".format(label_selector))
+        if query:
+            api_url = "{}?{}".format(api_url, "&".join(query))
 
         json_resp = self._req("get", api_url)
 
@@ -345,24 +358,47 @@ class ArgoAPIClient:
         return self._verify
 
 
+_session = None
+
+
+def _http_session():
+    """
+    Session shared by all the API clients in this process, so that
+    connections to the Argo server are pooled and kept alive.
+
+    Returns:
+        requests.Session: the shared session
+    """
+    global _session
+    if not _session:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=16
+        )
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
 def _http_method(method_str):
     """
-    Return function for given HTTP Method from requests library
+    Return function for given HTTP Method from the shared requests session
 
     Args:
         method_str (str): HTTP method, "get", "post", etc.
 
     Returns:
-        function: requests.get, requests.post, etc. None if no match
+        function: session.get, session.post, etc. None if no match
     """
+    session = _http_session()
     if method_str == "get":
-        return requests.get
+        return session.get
     if method_str == "post":
-        return requests.post
+        return session.post
     if method_str == "delete":
-        return requests.delete
+        return session.delete
     if method_str == "put":
-        return requests.put
+        return session.put
     if method_str == "options":
-        return requests.options
+        return session.options
     return None
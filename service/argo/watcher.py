@@ -0,0 +1,144 @@
+"""
+Watch in-flight Argo workflows.
+
+Instead of blocking a celery worker while polling a single workflow, the
+workflow is registered here along with the tasks to run once it completes.
+A single watcher per provider lists all workflows with one request and
+resumes the registered tasks.
+"""
+import cPickle as pickle
+import time
+
+from service.cache import acquire_lock, redis_connection, release_lock
+
+PENDING_KEY = "argo_watcher.pending.{0}"
+WATCHER_LOCK_KEY = "argo_watcher.watcher.{0}"
+
+# Matches the (10sec * 18) + (60sec * 1440) window of create_n_watch()
+DEFAULT_TIMEOUT = 10 * 18 + 60 * 1440
+# Poll quickly at first, most deployments finish within a few minutes
+SHORT_POLL_DELAY = 10
+SHORT_POLL_PERIOD = 10 * 18
+LONG_POLL_DELAY = 60
+WATCHER_LOCK_TTL = LONG_POLL_DELAY * 3
+
+
+def register(
+    provider_uuid,
+    wf_name,
+    callbacks=None,
+    errbacks=None,
+    resubmit=None,
+    attempts_left=0,
+    log_owner=None,
+    timeout=DEFAULT_TIMEOUT
+):
+    """
+    Register a workflow to be watched
+
+    Args:
+        provider_uuid (str): uuid of the provider the workflow runs for
+        wf_name (str): name of the workflow
+        callbacks (list, optional): signatures to apply when the workflow succeed
+        errbacks (list, optional): signatures to apply when the workflow fails,
+            they are called with (context, exception message, traceback)
+        resubmit (dict, optional): arguments to argo_workflow_exec() to
+            resubmit the workflow with if it fails
+        attempts_left (int, optional): number of times the workflow is resubmitted
+        log_owner (tuple, optional): (username, instance_uuid) to dump logs for
+        timeout (int, optional): seconds until the workflow is considered failed
+
+    Returns:
+        dict: the registered entry
+    """
+    entry = {
+        "callbacks": callbacks or [],
+        "errbacks": errbacks or [],
+        "resubmit": resubmit,
+        "attempts_left": attempts_left,
+        "log_owner": log_owner,
+        "registered_at": time.time(),
+        "timeout": timeout,
+    }
+    redis_connection().hset(
+        PENDING_KEY.format(provider_uuid), wf_name, pickle.dumps(entry)
+    )
+    return entry
+
+
+def pending(provider_uuid):
+    """
+    Returns:
+        dict: workflow name -> entry for the provider
+    """
+    entries = redis_connection().hgetall(PENDING_KEY.format(provider_uuid))
+    return {wf_name: pickle.loads(entry) for wf_name, entry in entries.items()}
+
+
+def remove(provider_uuid, wf_name):
+    redis_connection().hdel(PENDING_KEY.format(provider_uuid), wf_name)
+
+
+def is_expired(entry, now=None):
+    if not now:
+        now = time.time()
+    return now - entry["registered_at"] > entry["timeout"]
+
+
+def next_poll_delay(entries, now=None):
+    """
+    Returns:
+        int: seconds until the next poll, short while any workflow is recent
+    """
+    if not now:
+        now = time.time()
+    youngest = min(now - entry["registered_at"] for entry in entries)
+    if youngest < SHORT_POLL_PERIOD:
+        return SHORT_POLL_DELAY
+    return LONG_POLL_DELAY
+
+
+def acquire_watcher(provider_uuid, token=None):
+    """
+    Only one watcher may run per provider. See `service.cache.acquire_lock`
+    """
+    return acquire_lock(
+        WATCHER_LOCK_KEY.format(provider_uuid), WATCHER_LOCK_TTL, token
+    )
+
+
+def release_watcher(provider_uuid, token):
+    release_lock(WATCHER_LOCK_KEY.format(provider_uuid), token)
+
+
+def providers_with_pending():
+    """
+    Returns:
+        list: uuids of the providers that have workflows being watched
+    """
+    prefix = PENDING_KEY.format("")
+    return [
+        key[len(prefix):]
+        for key in redis_connection().scan_iter(match=prefix + "*")
+    ]
+
+
+def list_workflow_phases(context):
+    """
+    Phase of every workflow in the namespace of the context, using a single request
+
+    Args:
+        context (ArgoContext): context to list the workflows in
+
+    Returns:
+        dict: workflow name -> phase
+    """
+    json_resp = context.client().list_workflow(
+        fields="items.metadata.name,items.status.phase"
+    )
+    phases = {}
+    for item in json_resp.get("items") or []:
+        name = item.get("metadata", {}).get("name")
+        if name:
+            phases[name] = item.get("status", {}).get("phase")
+    return phases
@@ -99,31 +99,10 @@ class ArgoWorkflow:
                 self._last_status = ArgoWorkflowStatus(complete=False)
                 return self._last_status
 
-            phase = json_obj["status"]["phase"]
-
-            if phase == "Running":
-                self._last_status = ArgoWorkflowStatus(complete=False)
-                return self._last_status
-
-            if phase == "Succeeded":
-                self._last_status = ArgoWorkflowStatus(
-                    complete=True, success=True
-                )
-                return self._last_status
-
-            if phase == "Failed":
-                self._last_status = ArgoWorkflowStatus(
-                    complete=True, success=False
-                )
-                return self._last_status
-
-            if phase == "Error":
-                self._last_status = ArgoWorkflowStatus(
-                    complete=True, success=False, error=True
-                )
-                return self._last_status
-
-            return ArgoWorkflowStatus()
+            status = ArgoWorkflowStatus.from_phase(json_obj["status"]["phase"])
+            if status.complete is not None:
+                self._last_status = status
+            return status
         except Exception as exc:
             raise exc
 
@@ -272,6 +251,28 @@ class ArgoWorkflowStatus:
         self._success = success
         self._error = error
 
+    @staticmethod
+    def from_phase(phase):
+        """
+        Status of a workflow from the phase reported by Argo
+
+        Args:
+            phase (str): phase of the workflow, e.g. "Running", "Succeeded"
+
+        Returns:
+            ArgoWorkflowStatus: status of the workflow, all fields are None
+                if the phase is unknown
+        """
+        if phase == "Running":
+            return ArgoWorkflowStatus(complete=False)
+        if phase == "Succeeded":
+            return ArgoWorkflowStatus(complete=True, success=True)
+        if phase == "Failed":
+            return ArgoWorkflowStatus(complete=True, success=False)
+        if phase == "Error":
+            return ArgoWorkflowStatus(complete=True, success=False, error=True)
+        return ArgoWorkflowStatus()
+
     @property
     def complete(self):
         """
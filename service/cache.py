@@ -1,4 +1,6 @@
 import cPickle as pickle
+import uuid
+
 import redis
 from threepio import logger
 
@@ -14,6 +16,8 @@ VOLUMES_KEY_PROVIDER = "volumes.{0}"
 VOLUMES_KEY_IDENTITY = "volumes.{0}.{1}"
 MACHINES_KEY_PROVIDER = "machines.{0}"
 MACHINES_KEY_IDENTITY = "machines.{0}.{1}"
+# Incremented every time the data cached under {0} is refreshed
+VERSION_KEY = "{0}.version"
 
 
 def _get_cached_admin_driver(provider, force=True):
@@ -37,6 +41,32 @@ def redis_connection():
     return connection
 
 
+def acquire_lock(key, ttl, token=None):
+    """
+    Hold a lock in redis for `ttl` seconds.
+
+    Without a `token`, try to take the lock and return a new token (or None
+    if the lock is already held). With a `token`, refresh the lock and return
+    the token (or None if the lock was lost).
+    """
+    r = redis_connection()
+    if not token:
+        token = uuid.uuid4().hex
+        if r.set(key, token, nx=True, ex=ttl):
+            return token
+        return None
+    if r.get(key) != token:
+        return None
+    r.expire(key, ttl)
+    return token
+
+
+def release_lock(key, token):
+    r = redis_connection()
+    if r.get(key) == token:
+        r.delete(key)
+
+
 def _invalidate(key):
     r = redis_connection()
     if key:
@@ -65,6 +95,7 @@ def _get_cached(key, data_method, scrub_method, force=False):
         )
         r.set(key, pickle.dumps(data))
         r.expire(key, 30)
+        r.incr(VERSION_KEY.format(key))
         return data
     logger.debug("Actual type {0}".format(type(data)))
     return pickle.loads(data)
@@ -108,20 +139,30 @@ def get_cached_instances(provider=None, identity=None, force=False):
     else:
         instances_method = cached_driver.list_instances
 
-    if provider:
-        key = INSTANCES_KEY_PROVIDER.format(provider.id)
-    else:
-        key = INSTANCES_KEY_IDENTITY.format(
-            identity.created_by.username, identity.id
-        )
+    key = _instances_key(provider, identity)
     return _get_cached(key, instances_method, _scrub, force=force)
 
 
-def invalidate_cached_instances(provider=None, identity=None):
+def get_cached_instances_version(provider=None, identity=None):
+    """
+    Return the version of the cached instance listing, it changes every time
+    the listing is refreshed. Returns None if redis is unavailable.
+    """
+    _validate_parameters(provider, identity)
+    key = _instances_key(provider, identity)
+    try:
+        return redis_connection().get(VERSION_KEY.format(key)) or "0"
+    except redis.exceptions.ConnectionError:
+        return None
+
+
+def _instances_key(provider=None, identity=None):
     if provider:
-        key = INSTANCES_KEY_PROVIDER.format(provider.id)
-    else:
-        key = INSTANCES_KEY_IDENTITY.format(
-            identity.created_by.username, identity.id
-        )
-    _invalidate(key)
+        return INSTANCES_KEY_PROVIDER.format(provider.id)
+    return INSTANCES_KEY_IDENTITY.format(
+        identity.created_by.username, identity.id
+    )
+
+
+def invalidate_cached_instances(provider=None, identity=None):
+    _invalidate(_instances_key(provider, identity))
@@ -5,6 +5,8 @@ import os
 import re
 import json
 import subprocess
+import tempfile
+import time
 from threepio import logger, deploy_logger
 from django.conf import settings
 from atmosphere.settings import secrets
@@ -31,16 +33,7 @@ def ansible_deployment(
     """
     if not check_ansible():
         return []
-    # Expecting to be path-relative to the playbook path, so use basename
-    if type(limit_playbooks) == str:
-        limit_playbooks = limit_playbooks.split(",")
-    if type(limit_playbooks) != list:
-        raise Exception(
-            "Invalid 'limit_playbooks' argument (%s). Expected List" %
-            limit_playbooks
-        )
-    if limit_playbooks == []:
-        limit_playbooks = sorted(os.listdir(playbooks_dir))
+    limit_playbooks = _select_playbooks(playbooks_dir, limit_playbooks)
     logger = create_instance_logger(
         deploy_logger, instance_ip, username, instance_id
     )
@@ -52,30 +45,8 @@ def ansible_deployment(
         else:
             limit_hosts = instance_ip
     host_file = settings.ANSIBLE_HOST_FILE
-    identity = Identity.find_instance(instance_id)
-    if identity:
-        time_zone = identity.provider.timezone
-        extra_vars.update({
-            "TIMEZONE": time_zone,
-        })
-    shared_users = list(
-        AtmosphereUser.users_for_instance(instance_id).values_list(
-            'username', flat=True
-        )
-    )
-    if not shared_users:
-        shared_users = [username]
-    if username not in shared_users:
-        shared_users.append(username)
-    extra_vars.update({
-        "SHARED_USERS": shared_users,
-    })
-    extra_vars.update({
-        "ATMOUSERNAME": username,
-    })
-    extra_vars.update({
-        "INSTANCE_UUID": instance_id,
-    })
+    extra_vars = dict(extra_vars)
+    extra_vars.update(_instance_deploy_vars(username, instance_id))
     playbook_results = execute_playbooks(
         playbooks_dir,
         host_file,
@@ -91,6 +62,108 @@ def ansible_deployment(
     return playbook_results
 
 
+def ansible_batch_deployment(
+    deployments, playbooks_dir, limit_playbooks=[], extra_vars={}, debug=False
+):
+    """
+    Deploy the same playbooks to several instances at once.
+
+    `deployments` is a list of (instance_ip, username, instance_id,
+    host_vars) tuples. `host_vars` and the variables every deployment
+    expects are set on the host in a temporary inventory, `extra_vars` are
+    shared by every host. Unlike `extra_vars`, host variables are overridden
+    by the `vars` of a play.
+
+    Returns a dict of instance_id -> playbook results. Each value can be
+    passed to `raise_playbook_errors`/`execution_has_failures`.
+    """
+    if not check_ansible() or not deployments:
+        return {}
+    limit_playbooks = _select_playbooks(playbooks_dir, limit_playbooks)
+    configure_ansible(debug=debug)
+    host_vars = {}
+    host_deployments = {}
+    for instance_ip, username, instance_id, instance_vars in deployments:
+        hostname = build_host_name(instance_id, instance_ip) or instance_ip
+        host_vars[hostname] = dict(instance_vars)
+        host_vars[hostname].update(_instance_deploy_vars(username, instance_id))
+        host_deployments[hostname] = (instance_ip, username, instance_id)
+    host_results = execute_playbooks_for_hosts(
+        playbooks_dir, extra_vars, host_vars, limit_playbooks=limit_playbooks
+    )
+    results = {}
+    for hostname, (instance_ip, username, instance_id) in \
+            host_deployments.items():
+        create_instance_logger(
+            deploy_logger, instance_ip, username, instance_id
+        ).info(
+            "playbooks {} result {} (batch of {} hosts)".format(
+                limit_playbooks, host_results[hostname], len(host_results)
+            )
+        )
+        results[instance_id] = [host_results[hostname]]
+    return results
+
+
+def _select_playbooks(playbooks_dir, limit_playbooks):
+    # Expecting to be path-relative to the playbook path, so use basename
+    if type(limit_playbooks) == str:
+        limit_playbooks = limit_playbooks.split(",")
+    if type(limit_playbooks) != list:
+        raise Exception(
+            "Invalid 'limit_playbooks' argument (%s). Expected List" %
+            limit_playbooks
+        )
+    if limit_playbooks == []:
+        limit_playbooks = list_playbooks(playbooks_dir)
+    return limit_playbooks
+
+
+_playbook_listings = {}
+
+
+def list_playbooks(playbooks_dir):
+    """
+    Return the sorted playbook filenames found in `playbooks_dir`.
+
+    Listings are kept in memory and only re-read when the modification
+    time of the directory changes.
+    """
+    mtime = os.stat(playbooks_dir).st_mtime
+    cached = _playbook_listings.get(playbooks_dir)
+    if not cached or cached[0] != mtime:
+        cached = (mtime, sorted(os.listdir(playbooks_dir)))
+        _playbook_listings[playbooks_dir] = cached
+    return list(cached[1])
+
+
+def _instance_deploy_vars(username, instance_id):
+    """
+    Variables that every deployment to `instance_id` expects.
+    """
+    deploy_vars = {}
+    identity = Identity.find_instance(instance_id)
+    if identity:
+        deploy_vars["TIMEZONE"] = identity.provider.timezone
+    shared_users = list(
+        AtmosphereUser.users_for_instance(instance_id).values_list(
+            'username', flat=True
+        )
+    )
+    if not shared_users:
+        shared_users = [username]
+    if username not in shared_users:
+        shared_users.append(username)
+    deploy_vars.update(
+        {
+            "SHARED_USERS": shared_users,
+            "ATMOUSERNAME": username,
+            "INSTANCE_UUID": instance_id,
+        }
+    )
+    return deploy_vars
+
+
 def ready_to_deploy(instance_ip, username, instance_id):
     """
     Use service.ansible to deploy to an instance.
@@ -227,6 +300,58 @@ def user_deploy(instance_ip, username, instance_id, first_deploy=True):
     """
     playbooks_dir = settings.ANSIBLE_PLAYBOOKS_DIR
     playbooks_dir = os.path.join(playbooks_dir, 'user_deploy')
+    extra_vars = _user_deploy_vars(instance_id, first_deploy)
+    playbook_results = ansible_deployment(
+        instance_ip,
+        username,
+        instance_id,
+        playbooks_dir,
+        extra_vars=extra_vars,
+        raise_exception=False
+    )
+    hostname = build_host_name(instance_id, instance_ip)
+    # An error has occurred during deployment!
+    # If the failure was not related to users boot-scripts,
+    # handle as a generic ansible failure.
+    return raise_playbook_errors(
+        playbook_results, instance_id, instance_ip, hostname
+    )
+
+
+def user_batch_deploy(deployments):
+    """
+    Run the user deployment of several instances with one `ansible-playbook`
+    process per playbook.
+
+    `deployments` is a list of (instance_ip, username, instance_id,
+    first_deploy) tuples.
+
+    Returns a dict of instance_id -> playbook results (see `user_deploy`),
+    or the exception raised while preparing the deployment of the instance.
+    """
+    playbooks_dir = settings.ANSIBLE_PLAYBOOKS_DIR
+    playbooks_dir = os.path.join(playbooks_dir, 'user_deploy')
+    errors = {}
+    host_deployments = []
+    for instance_ip, username, instance_id, first_deploy in deployments:
+        try:
+            host_vars = _user_deploy_vars(instance_id, first_deploy)
+        except Exception as exc:
+            logger.exception(
+                "Could not prepare the deployment of %s" % instance_id
+            )
+            errors[instance_id] = exc
+            continue
+        host_deployments.append((instance_ip, username, instance_id, host_vars))
+    results = ansible_batch_deployment(host_deployments, playbooks_dir)
+    results.update(errors)
+    return results
+
+
+def _user_deploy_vars(instance_id, first_deploy):
+    """
+    SSH keys and boot scripts of the user deployment of `instance_id`.
+    """
     instance = Instance.objects.get(provider_alias=instance_id)
     image_scripts = instance.source.providermachine.application_version.boot_scripts.all(
     )
@@ -253,26 +378,11 @@ def user_deploy(instance_ip, username, instance_id, first_deploy=True):
             async_scripts.append(script)
 
     format_script = lambda s: {"name": s.get_title_slug(), "text": s.get_text()}
-    extra_vars = {
+    return {
         "USERSSHKEYS": user_keys,
         "ASYNC_SCRIPTS": map(format_script, async_scripts),
         "DEPLOY_SCRIPTS": map(format_script, deploy_scripts)
     }
-    playbook_results = ansible_deployment(
-        instance_ip,
-        username,
-        instance_id,
-        playbooks_dir,
-        extra_vars=extra_vars,
-        raise_exception=False
-    )
-    hostname = build_host_name(instance_id, instance_ip)
-    # An error has occurred during deployment!
-    # If the failure was not related to users boot-scripts,
-    # handle as a generic ansible failure.
-    return raise_playbook_errors(
-        playbook_results, instance_id, instance_ip, hostname
-    )
 
 
 def run_utility_playbooks(
@@ -330,36 +440,154 @@ def user_deploy_install(
 def execute_playbooks(
     playbook_dir, host_file, extra_vars, host, logger=None, limit_playbooks=[]
 ):
+    """
+    Run every playbook in `limit_playbooks` against `host` with one
+    `ansible-playbook` process. Ansible skips the remaining playbooks for
+    the host once it fails, which matches running the playbooks one after
+    another.
+
+    Returns a list with the result code of the run (0 success, 2 failure,
+    4 unreachable).
+    """
     # Force requirement of a logger for 2.0 playbook runs
     if not logger:
         logger = deploy_logger
 
     inventory_dir = os.path.join(settings.ANSIBLE_ROOT, "ansible", "inventory")
+    pb_paths = [os.path.join(playbook_dir, pb) for pb in limit_playbooks]
+    logger.info("Executing playbooks {}".format(pb_paths))
+
+    args = [
+        "ansible-playbook", "--inventory={}".format(inventory_dir),
+        "--limit={}".format(host),
+        "--extra-vars={}".format(json.dumps(extra_vars))
+    ] + pb_paths
+    logger.info("args to ansible-playbook: {}".format(args))
+
+    start = time.time()
+    proc = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    ansible_output, ansible_errors = proc.communicate()    # capture output
+    logger.debug(ansible_output)
+    if ansible_errors:
+        if proc.returncode:
+            logger.warn(ansible_errors)
+        else:
+            logger.debug(ansible_errors)
 
-    # Run playbooks
-    results = []
-    for pb in limit_playbooks:
-        pb_path = os.path.join(playbook_dir, pb)
-        logger.info("Executing playbook {}".format(pb_path))
-
-        args = [
-            "ansible-playbook", "--inventory={}".format(inventory_dir),
-            "--limit={}".format(host),
-            "--extra-vars={}".format(json.dumps(extra_vars)), pb_path
-        ]
-        logger.info("args to ansible-playbook: {}".format(args))
-
-        proc = subprocess.Popen(
-            args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    logger.info(
+        "playbooks {} result {} in {:.2f}s".format(
+            limit_playbooks, proc.returncode,
+            time.time() - start
         )
-        ansible_output, _ = proc.communicate()    # capture output
-        logger.debug(ansible_output)
+    )
+    return [proc.returncode]
+
+
+def execute_playbooks_for_hosts(
+    playbook_dir, extra_vars, host_vars, logger=None, limit_playbooks=[]
+):
+    """
+    Run each playbook in `limit_playbooks` against every host in `host_vars`
+    with one `ansible-playbook` process per playbook, timing each of them.
+
+    `host_vars` maps hostname -> dict of variables for that host only.
+    Hosts that fail a playbook are left out of the next ones, which matches
+    running every playbook in one process.
+
+    Returns a dict of hostname -> result code (0 success, 2 failure,
+    4 unreachable).
+    """
+    # Force requirement of a logger for 2.0 playbook runs
+    if not logger:
+        logger = deploy_logger
 
-        logger.info("playbook {} result {}".format(pb, proc.returncode))
-        results.append(proc.returncode)
+    inventory_dir = os.path.join(settings.ANSIBLE_ROOT, "ansible", "inventory")
+    results = dict.fromkeys(host_vars, 0)
+    host_inventory = _write_host_inventory(host_vars)
+    shared_args = [
+        "ansible-playbook", "--inventory={}".format(inventory_dir),
+        "--inventory={}".format(host_inventory),
+        "--extra-vars={}".format(json.dumps(extra_vars))
+    ]
+    try:
+        for playbook in limit_playbooks:
+            hosts = sorted(host for host, rc in results.items() if not rc)
+            if not hosts:
+                break
+            args = shared_args + [
+                "--limit={}".format(",".join(hosts)),
+                os.path.join(playbook_dir, playbook)
+            ]
+            logger.info("args to ansible-playbook: {}".format(args))
+
+            start = time.time()
+            proc = subprocess.Popen(
+                args, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            ansible_output, ansible_errors = proc.communicate()
+            logger.debug(ansible_output)
+            if ansible_errors:
+                if proc.returncode:
+                    logger.warn(ansible_errors)
+                else:
+                    logger.debug(ansible_errors)
+
+            recap = parse_play_recap(ansible_output)
+            for host in hosts:
+                # Hosts missing from the recap were never run against, they
+                # get the code of the run or are unreachable if it succeeded
+                results[host] = recap.get(host, proc.returncode or 4)
+            logger.info(
+                "playbook {} result {} on {} hosts in {:.2f}s".format(
+                    playbook, proc.returncode, len(hosts),
+                    time.time() - start
+                )
+            )
+    finally:
+        os.remove(host_inventory)
+    logger.info("playbooks {} results {}".format(limit_playbooks, results))
+    return results
+
+
+def _write_host_inventory(host_vars):
+    """
+    Write `host_vars` to a temporary JSON (YAML) inventory and return the
+    path. The caller is responsible for removing the file.
+    """
+    inventory = {"all": {"hosts": host_vars}}
+    fd, path = tempfile.mkstemp(prefix="atmo-hosts-", suffix=".json")
+    with os.fdopen(fd, "w") as inventory_file:
+        json.dump(inventory, inventory_file)
+    return path
 
-        if results[-1] != 0:
-            break
+
+_recap_line = re.compile(
+    r"^(?P<host>\S+)\s+:\s+ok=\d+\s+changed=\d+\s+"
+    r"unreachable=(?P<unreachable>\d+)\s+failed=(?P<failed>\d+)"
+)
+
+
+def parse_play_recap(ansible_output):
+    """
+    Parse the PLAY RECAP printed by the default stdout callback.
+
+    Returns a dict of hostname -> result code (0 success, 2 failure,
+    4 unreachable).
+    """
+    results = {}
+    recap = ansible_output.rpartition("PLAY RECAP")[2]
+    for line in recap.splitlines():
+        match = _recap_line.match(line.strip())
+        if not match:
+            continue
+        if int(match.group("unreachable")):
+            results[match.group("host")] = 4
+        elif int(match.group("failed")):
+            results[match.group("host")] = 2
+        else:
+            results[match.group("host")] = 0
     return results
 
 
@@ -384,6 +612,15 @@ def configure_ansible(debug=False):
     """
 
     os.environ["ANSIBLE_DEBUG"] = "true" if debug else "false"
+    # Opt-in: pipelining overrides ansible.cfg and breaks `become` on
+    # images that set `requiretty` in sudoers.
+    if getattr(settings, 'ANSIBLE_SSH_PIPELINING', False):
+        os.environ["ANSIBLE_PIPELINING"] = "true"
+    control_persist = getattr(settings, 'ANSIBLE_SSH_CONTROL_PERSIST', None)
+    if control_persist:
+        os.environ["ANSIBLE_SSH_ARGS"] = (
+            "-C -o ControlMaster=auto -o ControlPersist=%s" % control_persist
+        )
     if settings.ANSIBLE_CONFIG_FILE:
         os.environ["ANSIBLE_CONFIG"] = settings.ANSIBLE_CONFIG_FILE
         os.environ[
@@ -0,0 +1,71 @@
+"""
+Batch the user deployments of instances launched together.
+
+Rather than starting one `ansible-playbook` per instance, a deploy chain
+registers its instance here along with the tasks to run once the user
+deployment is done. A batch task started a few seconds later takes every
+pending instance and deploys to all of them at once.
+"""
+import cPickle as pickle
+import time
+
+from service.cache import redis_connection
+
+PENDING_KEY = "deploy_batcher.pending"
+
+
+def register(
+    instance_id,
+    instance_ip,
+    username,
+    first_deploy=True,
+    callbacks=None,
+    errbacks=None,
+    attempts_left=0
+):
+    """
+    Register the user deployment of an instance
+
+    Args:
+        instance_id (str): alias of the instance
+        instance_ip (str): ip address of the instance
+        username (str): owner of the instance
+        first_deploy (bool, optional): run the boot scripts that only run
+            on the first deployment
+        callbacks (list, optional): signatures to apply when the deployment succeed
+        errbacks (list, optional): signatures to apply when the deployment fails,
+            they are called with (context, exception message, traceback)
+        attempts_left (int, optional): number of times the deployment is retried
+
+    Returns:
+        dict: the registered entry
+    """
+    entry = {
+        "instance_ip": instance_ip,
+        "username": username,
+        "first_deploy": first_deploy,
+        "callbacks": callbacks or [],
+        "errbacks": errbacks or [],
+        "attempts_left": attempts_left,
+        "registered_at": time.time(),
+    }
+    redis_connection().hset(PENDING_KEY, instance_id, pickle.dumps(entry))
+    return entry
+
+
+def take():
+    """
+    Remove and return every pending entry. Concurrent batches never get the
+    same instance.
+
+    Returns:
+        dict: instance_id -> entry
+    """
+    pipe = redis_connection().pipeline()
+    pipe.hgetall(PENDING_KEY)
+    pipe.delete(PENDING_KEY)
+    entries, _ = pipe.execute()
+    return {
+        instance_id: pickle.loads(entry)
+        for instance_id, entry in entries.items()
+    }
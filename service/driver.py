@@ -1,5 +1,8 @@
+from collections import OrderedDict
+import hashlib
 import uuid
 
+from core import task_metrics
 from core.exceptions import ProviderNotActive
 from core.models import AtmosphereUser as User
 from core.models.identity import Identity as CoreIdentity
@@ -39,25 +42,71 @@ class AtmosphereNetworkManager(NetworkManager):
                 **all_creds
             )
             return network_driver
-        elif 'ex_force_auth_token' in all_creds:
-            auth_token = all_creds['ex_force_auth_token']
-            (auth, sess, token) = _token_to_keystone_scoped_project(
-                auth_url, auth_token, project_name, domain_name
-            )
-        else:
-            username = all_creds.get('key', '')
-            password = all_creds.get('secret', '')
-            (auth, sess, token) = _connect_to_keystone_v3(
-                auth_url,
-                username,
-                password,
-                project_name,
-                domain_name=domain_name
-            )
+        sess = _get_network_session(
+            core_identity, all_creds, auth_url, project_name, domain_name
+        )
         network_driver = NetworkManager(session=sess)
         return network_driver
 
 
+# Keystone sessions for network drivers: identity uuid -> (credentials
+# hash, auth, session), least recently used first
+_network_sessions = OrderedDict()
+# Re-authenticate when the scoped token expires within this many seconds
+NETWORK_SESSION_STALE_DURATION = 60
+# Most sessions kept by a process
+NETWORK_SESSION_CACHE_SIZE = 256
+# Authentications and reused sessions are counted in `core.task_metrics`
+NETWORK_SESSION_COUNTER = "network_sessions"
+
+
+def _get_network_session(
+    core_identity, all_creds, auth_url, project_name, domain_name
+):
+    """
+    Return a keystone session scoped to the identity's project.
+
+    Sessions are reused until their token is about to expire, so that
+    repeated network operations for an identity only authenticate once.
+    One session is kept per identity, replaced when its credentials change,
+    and the least recently used sessions are dropped past
+    NETWORK_SESSION_CACHE_SIZE identities.
+    """
+    creds_hash = hashlib.sha1(
+        repr((sorted(all_creds.items()), auth_url, project_name, domain_name))
+    ).hexdigest()
+    key = str(core_identity.uuid)
+    cached = _network_sessions.pop(key, None)
+    if cached and cached[0] == creds_hash:
+        (_, auth, sess) = cached
+        auth_ref = getattr(auth, 'auth_ref', None)
+        if auth_ref and not auth_ref.will_expire_soon(
+            NETWORK_SESSION_STALE_DURATION
+        ):
+            task_metrics.count(NETWORK_SESSION_COUNTER, reused=1)
+            _network_sessions[key] = cached
+            return sess
+    if 'ex_force_auth_token' in all_creds:
+        auth_token = all_creds['ex_force_auth_token']
+        (auth, sess, token) = _token_to_keystone_scoped_project(
+            auth_url, auth_token, project_name, domain_name
+        )
+    else:
+        username = all_creds.get('key', '')
+        password = all_creds.get('secret', '')
+        (auth, sess, token) = _connect_to_keystone_v3(
+            auth_url, username, password, project_name, domain_name=domain_name
+        )
+    task_metrics.count(NETWORK_SESSION_COUNTER, authentications=1)
+    logger.debug(
+        "Keystone authentication for network driver of %s" % core_identity
+    )
+    _network_sessions[key] = (creds_hash, auth, sess)
+    while len(_network_sessions) > NETWORK_SESSION_CACHE_SIZE:
+        _network_sessions.popitem(last=False)
+    return sess
+
+
 #TODO: Remove these ASAP -- Once we determine it will not be a problem.
 EucaProvider.set_meta()
 AWSProvider.set_meta()
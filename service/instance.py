@@ -4,6 +4,7 @@ import json
 import uuid
 
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.timezone import datetime
 
@@ -41,6 +42,9 @@ from core.models.machine import ProviderMachine
 from core.models.volume import convert_esh_volume
 from core.models.provider import AccountProvider, Provider, ProviderInstanceAction
 from core.exceptions import ProviderNotActive
+from core.launch_trace import record_stage
+from core.models.launch_trace import REQUESTED, VALIDATED
+from core.task_payload import driver_spec
 
 from django.conf import settings
 from atmosphere.settings import secrets
@@ -768,6 +772,7 @@ def launch_instance(
     5. Return CORE Instance with new 'esh' objects attached OR a list of
     CORE instances if instance_count is passed in via launch_kwargs
     """
+    requested = timezone.now()
     now_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     status_logger.debug(
         "%s,%s,%s,%s,%s,%s" % (
@@ -793,15 +798,28 @@ def launch_instance(
         del launch_kwargs['instance_count']
         logger.debug(launch_kwargs)
 
-        return _launch_multiple_instances(
+        core_instances = _launch_multiple_instances(
             user, esh_driver, identity_uuid, boot_source, size, name, deploy,
             instance_count, launch_kwargs
         )
+        launched = core_instances
     else:
-        return _launch_one_instance(
+        core_instances = _launch_one_instance(
             user, esh_driver, identity_uuid, boot_source, size, name, deploy,
             launch_kwargs
         )
+        launched = [core_instances]
+    for core_instance in launched:
+        record_stage(
+            core_instance.provider_alias,
+            REQUESTED,
+            requested,
+            username=user.username,
+            provider_id=provider.id,
+            image=source_alias,
+            size=size_alias
+        )
+    return core_instances
 
 
 def _launch_multiple_instances(
@@ -822,6 +840,7 @@ def _launch_multiple_instances(
         launch_kwargs.get('allocation_source'),
         instance_count=instance_count
     )
+    validated = timezone.now()
 
     # checking boot source
     if boot_source.is_volume():
@@ -845,6 +864,8 @@ def _launch_multiple_instances(
         instance_count=instance_count,
         **launch_kwargs
     )
+    for core_instance in core_instances:
+        record_stage(core_instance.provider_alias, VALIDATED, validated)
     return core_instances
 
 
@@ -860,6 +881,7 @@ def _launch_one_instance(
         user.username, esh_driver, identity_uuid, boot_source, size,
         launch_kwargs.get('allocation_source')
     )
+    validated = timezone.now()
 
     core_instance = _select_and_launch_source(
         user,
@@ -871,6 +893,7 @@ def _launch_one_instance(
         deploy=deploy,
         **launch_kwargs
     )
+    record_stage(core_instance.provider_alias, VALIDATED, validated)
 
     return core_instance
 
@@ -2037,8 +2060,7 @@ def _repair_instance_networking(
     # Custom task-chain.. Wait for active then redeploy scripts
     #(Adding IP is done).. Then remove metadata
     init_task = wait_for_instance.s(
-        esh_instance.id, esh_driver.__class__, esh_driver.provider,
-        esh_driver.identity, "active"
+        esh_instance.id, driver_spec(core_identity), None, None, "active"
     )
 
     deploy_task = deploy_init_to.si(
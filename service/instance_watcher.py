@@ -0,0 +1,112 @@
+"""
+Keep track of the instances that deploy chains are waiting on.
+
+Rather than running one `wait_for_instance` task (and one cloud lookup)
+per launching instance, a deploy chain registers the instance here along
+with the tasks to start once it is ready. A single watcher per provider
+then checks every pending instance with one `list_all_instances` call.
+"""
+import cPickle as pickle
+import time
+
+from service.cache import acquire_lock, redis_connection, release_lock
+
+PENDING_KEY = "instance_watcher.pending.{0}"
+WATCHER_LOCK_KEY = "instance_watcher.watcher.{0}"
+
+# Matches the 250 attempts * 15sec window of `wait_for_instance`
+DEFAULT_TIMEOUT = 250 * 15
+# Instances can take a moment to show up in the listing after a launch
+MISSING_GRACE_PERIOD = 60
+MIN_POLL_DELAY = 5
+MAX_POLL_DELAY = 60
+WATCHER_LOCK_TTL = MAX_POLL_DELAY * 3
+
+
+def register(
+    provider_uuid,
+    instance_alias,
+    status_query,
+    callbacks,
+    tasks_allowed=False,
+    test_tmp_status=False,
+    timeout=DEFAULT_TIMEOUT
+):
+    """
+    Wait for `instance_alias` to match `status_query`, then apply every
+    signature in `callbacks`.
+    """
+    entry = {
+        'status_query': status_query,
+        'callbacks': callbacks,
+        'tasks_allowed': tasks_allowed,
+        'test_tmp_status': test_tmp_status,
+        'registered_at': time.time(),
+        'timeout': timeout,
+    }
+    redis_connection().hset(
+        PENDING_KEY.format(provider_uuid), instance_alias, pickle.dumps(entry)
+    )
+    return entry
+
+
+def pending(provider_uuid):
+    """
+    Return a dict of instance_alias -> entry for `provider_uuid`
+    """
+    entries = redis_connection().hgetall(PENDING_KEY.format(provider_uuid))
+    return {
+        instance_alias: pickle.loads(entry)
+        for instance_alias, entry in entries.items()
+    }
+
+
+def remove(provider_uuid, instance_alias):
+    redis_connection().hdel(PENDING_KEY.format(provider_uuid), instance_alias)
+
+
+def is_expired(entry, now=None):
+    if not now:
+        now = time.time()
+    return now - entry['registered_at'] > entry['timeout']
+
+
+def is_missing_too_long(entry, now=None):
+    if not now:
+        now = time.time()
+    return now - entry['registered_at'] > MISSING_GRACE_PERIOD
+
+
+def next_poll_delay(entries, now=None):
+    """
+    Poll often while an instance has just been launched and back off
+    as the youngest pending instance gets older.
+    """
+    if not now:
+        now = time.time()
+    youngest = min(now - entry['registered_at'] for entry in entries)
+    return int(min(max(youngest / 10, MIN_POLL_DELAY), MAX_POLL_DELAY))
+
+
+def acquire_watcher(provider_uuid, token=None):
+    """
+    Only one watcher may run per provider. See `service.cache.acquire_lock`
+    """
+    return acquire_lock(
+        WATCHER_LOCK_KEY.format(provider_uuid), WATCHER_LOCK_TTL, token
+    )
+
+
+def release_watcher(provider_uuid, token):
+    release_lock(WATCHER_LOCK_KEY.format(provider_uuid), token)
+
+
+def providers_with_pending():
+    """
+    Return the provider uuids that have instances waiting.
+    """
+    prefix = PENDING_KEY.format("")
+    return [
+        key[len(prefix):]
+        for key in redis_connection().scan_iter(match=prefix + "*")
+    ]
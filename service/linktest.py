@@ -0,0 +1,182 @@
+"""
+Concurrent instance link tests.
+
+Probes the web endpoints of instances (vnc, shell and web desktop, see
+`endpoints`) with non-blocking sockets multiplexed with `select()`: up to
+`concurrency` probes are in flight at once, each with a short timeout, so a
+sweep of a provider takes about (probes / concurrency) * timeout at worst
+rather than the sum of every probe.
+
+Like `rtwo.linktest.test_link`, an endpoint is up when it answers an HTTP
+HEAD request with a 200 or 302 status.
+"""
+from collections import OrderedDict, deque
+import errno
+import select
+import socket
+import time
+
+from django.conf import settings
+
+#: Instance field -> port probed by default
+DEFAULT_ENDPOINTS = OrderedDict([("vnc", 5904), ("shell", 4200)])
+
+#: Seconds before a probe is considered failed
+DEFAULT_TIMEOUT = 3.0
+
+#: Probes in flight at once, kept well below the FD_SETSIZE of select()
+DEFAULT_CONCURRENCY = 200
+
+UP_STATUSES = ("200", "302")
+
+_CONNECTING = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+
+
+def endpoints():
+    """
+    Returns:
+        OrderedDict: instance field (vnc, shell or web_desktop) -> port,
+        from settings.LINK_TEST_ENDPOINTS
+    """
+    return OrderedDict(
+        sorted(
+            getattr(settings, 'LINK_TEST_ENDPOINTS', DEFAULT_ENDPOINTS).items()
+        )
+    )
+
+
+class _Probe(object):
+    """
+    HTTP HEAD request to one endpoint, driven by `probe_endpoints`
+    """
+
+    def __init__(self, key, host, port, deadline):
+        self.key = key
+        self.deadline = deadline
+        self.success = False
+        self.done = False
+        self.connected = False
+        self.request = (
+            "HEAD / HTTP/1.0\r\nHost: %s:%s\r\nConnection: close\r\n\r\n" %
+            (host, port)
+        )
+        self.response = ""
+        self.sock = None
+        family, socktype, proto, _, address = socket.getaddrinfo(
+            host, port, 0, socket.SOCK_STREAM
+        )[0]
+        self.sock = socket.socket(family, socktype, proto)
+        self.sock.setblocking(0)
+        error = self.sock.connect_ex(address)
+        if error and error not in _CONNECTING:
+            self.finish(False)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    @property
+    def wants_write(self):
+        return bool(self.request)
+
+    def on_writable(self):
+        if not self.connected:
+            error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                return self.finish(False)
+            self.connected = True
+        sent = self.sock.send(self.request)
+        self.request = self.request[sent:]
+
+    def on_readable(self):
+        data = self.sock.recv(1024)
+        self.response += data
+        if "\r\n" in self.response or not data:
+            status_line = self.response.split("\r\n", 1)[0].split()
+            self.finish(
+                len(status_line) > 1 and status_line[0].startswith("HTTP/")
+                and status_line[1] in UP_STATUSES
+            )
+
+    def finish(self, success):
+        self.success = success
+        self.done = True
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+
+
+def probe_endpoints(targets, timeout=None, concurrency=None):
+    """
+    Args:
+        targets: iterable of (key, host, port) to probe
+        timeout (float, optional): seconds before a probe fails
+        concurrency (int, optional): probes in flight at once
+
+    Returns:
+        dict: key -> whether the endpoint is up
+    """
+    timeout = timeout or getattr(settings, 'LINK_TEST_TIMEOUT', DEFAULT_TIMEOUT)
+    concurrency = concurrency or getattr(
+        settings, 'LINK_TEST_CONCURRENCY', DEFAULT_CONCURRENCY
+    )
+    pending = deque(targets)
+    active = {}
+    results = {}
+    while pending or active:
+        while pending and len(active) < concurrency:
+            key, host, port = pending.popleft()
+            try:
+                probe = _Probe(key, host, port, time.time() + timeout)
+            except (socket.error, TypeError, UnicodeError):
+                results[key] = False
+                continue
+            active[probe.fileno()] = probe
+        waiting = [each for each in active.values() if not each.done]
+        if waiting:
+            deadline = min(each.deadline for each in waiting)
+            wait = max(0, deadline - time.time())
+            readable, writable, _ = select.select(
+                [each for each in waiting if not each.wants_write],
+                [each for each in waiting if each.wants_write], [], wait
+            )
+            for probe in writable + readable:
+                try:
+                    if probe in writable:
+                        probe.on_writable()
+                    else:
+                        probe.on_readable()
+                except socket.error:
+                    probe.finish(False)
+        now = time.time()
+        for fileno, probe in active.items():
+            if probe.done or probe.deadline <= now:
+                results[probe.key] = probe.success
+                probe.close()
+                del active[fileno]
+    return results
+
+
+def test_instance_links(instances, timeout=None, concurrency=None):
+    """
+    Args:
+        instances: iterable of (alias, ip) of the instances to test
+
+    Returns:
+        dict: alias -> {endpoint: whether it is up} for each of `endpoints`.
+        Instances without an ip have every endpoint down.
+    """
+    ports = endpoints()
+    tested = {}
+    targets = []
+    for alias, ip in instances:
+        tested[alias] = dict((name, False) for name in ports)
+        if ip:
+            targets.extend(
+                ((alias, name), ip, port) for name, port in ports.items()
+            )
+    for (alias, name), success in probe_endpoints(
+        targets, timeout=timeout, concurrency=concurrency
+    ).items():
+        tested[alias][name] = success
+    return tested
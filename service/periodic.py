@@ -0,0 +1,267 @@
+"""
+Overlap-safe scheduling of the periodic tasks that run once per provider.
+
+On each beat tick, the periodic task (e.g. `monitor_instances`) asks
+`should_dispatch` before queueing the task of each provider (e.g.
+`monitor_instances_for`), which is skipped when:
+
+- a run for the provider is in progress (it holds a lock). With the
+  COALESCE policy, the running task is asked to run once more when it is
+  done, however many ticks it missed; with SKIP the tick is dropped.
+- a run for the provider is already queued.
+- the last run was slow: the next one does not start before
+  `backoff` times the duration of the last run has passed since it
+  started, so the interval adapts to the runtime.
+
+The provider tasks are wrapped with `provider_run`, which holds the lock
+while they run and records the start, duration and outcome of each run
+(and each skipped tick) in a capped history per (task, provider). Only the
+runs queued by `dispatch_for_providers` (marked with RUN_HEADER) are
+checked: other calls, e.g. from `monitor_resources_for` or a script, run
+as is.
+"""
+from functools import wraps
+import json
+import time
+
+from celery import current_app, current_task
+from django.conf import settings
+import redis
+from threepio import celery_logger
+
+from service.cache import acquire_lock, redis_connection, release_lock
+
+LOCK_KEY = "periodic.lock.{0}.{1}"
+QUEUED_KEY = "periodic.queued.{0}.{1}"
+PENDING_KEY = "periodic.pending.{0}.{1}"
+LAST_RUN_KEY = "periodic.last.{0}.{1}"
+HISTORY_KEY = "periodic.history.{0}.{1}"
+
+#: Message header marking the runs queued by `dispatch_for_providers`
+RUN_HEADER = "atmo_periodic_run"
+
+SKIP = "skip"
+COALESCE = "coalesce"
+
+#: Run statuses recorded in the history
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+COALESCED = "coalesced"
+DEFERRED = "deferred"
+LOCKED = "locked"
+
+#: Entries kept in the history of each (task, provider)
+HISTORY_SIZE = 100
+
+DEFAULT_POLICY = {
+    "policy": SKIP,
+    # Longest a run holds its lock, in case the worker dies
+    "lock_ttl": 60 * 60,
+    # Longest a run waits in its queue (the `expires` of the beat entries)
+    "queued_ttl": 10 * 60,
+    "backoff": 1.5,
+}
+
+#: task name -> policy, overridden by settings.PERIODIC_RUN_POLICIES
+POLICIES = {
+    "monitor_instances_for": {
+        "policy": COALESCE,
+        "lock_ttl": 30 * 60
+    },
+    "monitor_volumes_for": {},
+    "monitor_sizes_for": {},
+    "monitor_machines_for": {},
+    "prune_machines_for": {},
+}
+
+
+def policy_for(task_name):
+    policy = dict(DEFAULT_POLICY)
+    policy.update(POLICIES.get(task_name, {}))
+    policy.update(
+        getattr(settings, 'PERIODIC_RUN_POLICIES', {}).get(task_name, {})
+    )
+    return policy
+
+
+def _record(task_name, provider_id, status, started=None, duration=None):
+    entry = json.dumps(
+        {
+            "status": status,
+            "started": started or time.time(),
+            "duration": duration
+        }
+    )
+    key = HISTORY_KEY.format(task_name, provider_id)
+    pipe = redis_connection().pipeline()
+    pipe.rpush(key, entry)
+    pipe.ltrim(key, -HISTORY_SIZE, -1)
+    if duration is not None:
+        pipe.set(LAST_RUN_KEY.format(task_name, provider_id), entry)
+    pipe.execute()
+
+
+def last_run(task_name, provider_id):
+    """
+    Returns:
+        dict: status, started and duration of the last completed run, or
+        None
+    """
+    entry = redis_connection().get(LAST_RUN_KEY.format(task_name, provider_id))
+    return json.loads(entry) if entry else None
+
+
+def run_history(task_name, provider_id, limit=HISTORY_SIZE):
+    """
+    Returns:
+        list: the last `limit` entries (status, started, duration) of the
+        history of `task_name` for `provider_id`, oldest first
+    """
+    return [
+        json.loads(entry) for entry in redis_connection().
+        lrange(HISTORY_KEY.format(task_name, provider_id), -limit, -1)
+    ]
+
+
+def should_dispatch(task_name, provider_id, now=None):
+    """
+    Returns:
+        bool: whether a run of `task_name` for `provider_id` should be
+        queued now (see the module documentation)
+    """
+    now = now or time.time()
+    policy = policy_for(task_name)
+    r = redis_connection()
+    if r.exists(LOCK_KEY.format(task_name, provider_id)):
+        if policy["policy"] == COALESCE:
+            r.set(
+                PENDING_KEY.format(task_name, provider_id),
+                now,
+                ex=policy["lock_ttl"]
+            )
+            _record(task_name, provider_id, COALESCED, now)
+        else:
+            _record(task_name, provider_id, SKIPPED, now)
+        return False
+    last = last_run(task_name, provider_id)
+    if last and now - last["started"] < last["duration"] * policy["backoff"]:
+        _record(task_name, provider_id, DEFERRED, now)
+        return False
+    # Only one run waits in the queue at a time
+    return bool(
+        r.set(
+            QUEUED_KEY.format(task_name, provider_id),
+            now,
+            nx=True,
+            ex=policy["queued_ttl"]
+        )
+    )
+
+
+def dispatch_for_providers(task, providers):
+    """
+    Queue `task` for each of `providers` that `should_dispatch`. Without
+    redis, every provider is queued.
+    """
+    for provider in providers:
+        try:
+            dispatch = should_dispatch(task.name, provider.id)
+        except redis.exceptions.ConnectionError:
+            celery_logger.warn(
+                "Could not reach redis, queueing %s for %s without checks",
+                task.name, provider.id
+            )
+            dispatch = True
+        if dispatch:
+            task.apply_async(args=[provider.id], headers={RUN_HEADER: True})
+
+
+def _dispatched():
+    """
+    Returns:
+        bool: whether the running task was queued by `dispatch_for_providers`
+    """
+    request = getattr(current_task, 'request', None)
+    if request is None:
+        return False
+    return bool(
+        getattr(request, RUN_HEADER, None)
+        or (getattr(request, 'headers', None) or {}).get(RUN_HEADER)
+    )
+
+
+def provider_run(task_name):
+    """
+    Decorate the task `task_name` that runs for the provider id passed as
+    its first argument (or `provider_id`). When the run was queued by
+    `dispatch_for_providers`: hold a lock while it runs (or skip the run if
+    another one holds it), record the run in the history, and run once more
+    for the whole provider if ticks were coalesced meanwhile. Other calls,
+    and every call without redis, run unchecked.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _dispatched():
+                return func(*args, **kwargs)
+            provider_id = kwargs.get('provider_id', args[0] if args else None)
+            policy = policy_for(task_name)
+            lock_key = LOCK_KEY.format(task_name, provider_id)
+            try:
+                redis_connection().delete(
+                    QUEUED_KEY.format(task_name, provider_id)
+                )
+                token = acquire_lock(lock_key, policy["lock_ttl"])
+            except redis.exceptions.ConnectionError:
+                celery_logger.warn(
+                    "Could not reach redis, running %s for %s without a lock",
+                    task_name, provider_id
+                )
+                return func(*args, **kwargs)
+            if not token:
+                celery_logger.info(
+                    "%s is already running for provider %s, skipping",
+                    task_name, provider_id
+                )
+                _record(task_name, provider_id, LOCKED)
+                return None
+            started = time.time()
+            status = FAILED
+            try:
+                result = func(*args, **kwargs)
+                status = SUCCEEDED
+                return result
+            finally:
+                _finish_run(
+                    task_name, provider_id, lock_key, token, status, started
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def _finish_run(task_name, provider_id, lock_key, token, status, started):
+    try:
+        _record(task_name, provider_id, status, started, time.time() - started)
+        release_lock(lock_key, token)
+        r = redis_connection()
+        # Unless a tick queued a run since
+        rerun = r.delete(PENDING_KEY.format(task_name, provider_id)) and r.set(
+            QUEUED_KEY.format(task_name, provider_id),
+            time.time(),
+            nx=True,
+            ex=policy_for(task_name)["queued_ttl"]
+        )
+    except redis.exceptions.ConnectionError:
+        celery_logger.warn(
+            "Could not reach redis to record the run of %s for %s", task_name,
+            provider_id
+        )
+        return
+    if rerun:
+        current_app.tasks[task_name].apply_async(
+            args=[provider_id], headers={RUN_HEADER: True}
+        )
@@ -7,6 +7,7 @@ import operator
 
 from django.db.models import Q
 
+from core.models.application_search import search_query
 from core.models.machine import ProviderMachine
 from core.query import only_current_source
 from functools import reduce
@@ -37,23 +38,21 @@ class CoreSearchProvider(BaseSearchProvider):
 
     @classmethod
     def search(cls, identity, query):
+        # query matches the search document of the application (name,
+        # description, tags...), see core.models.application_search
+        terms = [
+            search_query(term, prefix='application_version__application__')
+            for term in query.split()
+        ]
         return ProviderMachine.objects.filter(
         # Privately owned OR public machines
             Q(
-                application__private=True,
+                application_version__application__private=True,
                 instance_source__created_by_identity=identity
             ) | Q(
-                application__private=False,
+                application_version__application__private=False,
                 instance_source__provider=identity.provider
             ),
-        # AND query matches on:
-        # app tag name OR
-        # app tag desc OR
-        # app name OR
-        # app desc
-            Q(application__tags__name__icontains=query) |
-            Q(application__tags__description__icontains=query) |
-            Q(application__name__icontains=query) |
-            Q(application__description__icontains=query),
-            *only_current_source()
+            only_current_source(),
+            *terms
         )
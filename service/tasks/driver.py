@@ -20,16 +20,22 @@ from neutronclient.common.exceptions import IpAddressGenerationFailureClient
 from threepio import celery_logger, status_logger, logger
 
 from celery import current_app as app
+from celery import signature
 
 from core.email import send_instance_email
+from core.launch_trace import record_stage
+from core.models.launch_trace import DEPLOYED, LAUNCHED, NETWORKING
 from core.models.instance import Instance
 from core.models.identity import Identity
 from core.models.profile import UserProfile
+from core.task_payload import driver_from_spec, driver_spec, is_driver_spec
 
 from service.deploy import (
-    user_deploy, build_host_name, ready_to_deploy as ansible_ready_to_deploy,
-    run_utility_playbooks, execution_has_failures, execution_has_unreachable
+    user_deploy, user_batch_deploy, build_host_name, raise_playbook_errors,
+    ready_to_deploy as ansible_ready_to_deploy, run_utility_playbooks,
+    execution_has_failures, execution_has_unreachable
 )
+from service import deploy_batcher, instance_watcher
 from service.driver import get_driver, get_account_driver
 from service.exceptions import AnsibleDeployException
 from service.instance import _update_instance_metadata
@@ -43,15 +49,41 @@ def _update_status_log(instance, status_update):
     try:
         user = instance._node.extra['metadata']['creator']
     except KeyError:
-        user = "Unknown -- Metadata missing"
+        user = None
     size_alias = instance._node.extra['flavorId']
     machine_alias = instance._node.extra['imageId']
     status_logger.debug(
         "%s,%s,%s,%s,%s,%s" % (
-            now_time, user, instance.alias, machine_alias, size_alias,
-            status_update
+            now_time, user or "Unknown -- Metadata missing", instance.alias,
+            machine_alias, size_alias, status_update
         )
     )
+    stage = _launch_stage(status_update)
+    if stage:
+        record_stage(
+            instance.alias,
+            stage,
+            username=user,
+            image=machine_alias,
+            size=size_alias
+        )
+
+
+def _launch_stage(status_update):
+    """
+    Returns:
+        str: the launch stage (see core.models.launch_trace) reached with
+        `status_update`, if any
+    """
+    if status_update == "Launching Instance":
+        return LAUNCHED
+    if status_update == "Networking Complete":
+        return NETWORKING
+    if status_update.startswith(
+        ("Ansible Finished for", "ARGO, Ansible Finished for")
+    ):
+        return DEPLOYED
+    return None
 
 
 @task(name="print_debug")
@@ -111,10 +143,16 @@ def wait_for_instance(
 
     status_query = "active" Match only one value, active
     status_query = ["active","suspended"] or match multiple values.
+
+    driverCls may be a `core.task_payload.driver_spec` (provider and
+    identity are then None).
     """
     try:
         celery_logger.debug("wait_for task started at %s." % datetime.now())
-        driver = get_driver(driverCls, provider, identity)
+        if is_driver_spec(driverCls):
+            driver = driver_from_spec(driverCls)
+        else:
+            driver = get_driver(driverCls, provider, identity)
         instance = driver.get_instance(instance_alias)
         if not instance:
             celery_logger.debug(
@@ -133,6 +171,117 @@ def wait_for_instance(
         wait_for_instance.retry(exc=exc)
 
 
+@task(name="wait_for_instance_event", ignore_result=True)
+def wait_for_instance_event(
+    provider_uuid,
+    instance_alias,
+    status_query,
+    callbacks,
+    tasks_allowed=False,
+    test_tmp_status=False
+):
+    """
+    Register 'instance_alias' with the instance watcher. Once the instance
+    matches 'status_query', each signature in 'callbacks' is applied.
+    Unlike 'wait_for_instance', this task returns right away.
+    """
+    instance_watcher.register(
+        provider_uuid,
+        instance_alias,
+        status_query,
+        callbacks,
+        tasks_allowed=tasks_allowed,
+        test_tmp_status=test_tmp_status
+    )
+    watch_pending_instances.apply_async(args=[provider_uuid])
+
+
+@task(name="watch_pending_instances", ignore_result=True)
+def watch_pending_instances(provider_uuid, token=None):
+    """
+    Check every instance waiting on 'provider_uuid' with a single cloud
+    listing, start the chains of the instances that are ready and
+    reschedule itself until nothing is left waiting.
+    """
+    token = instance_watcher.acquire_watcher(provider_uuid, token)
+    if not token:
+        # Another watcher is already polling this provider
+        return
+    try:
+        remaining = _check_pending_instances(provider_uuid)
+    except Exception:
+        celery_logger.exception(
+            "Could not check pending instances for provider %s" % provider_uuid
+        )
+        remaining = instance_watcher.pending(provider_uuid).values()
+    if remaining:
+        watch_pending_instances.apply_async(
+            args=[provider_uuid, token],
+            countdown=instance_watcher.next_poll_delay(remaining)
+        )
+        return
+    instance_watcher.release_watcher(provider_uuid, token)
+    # Catch instances registered while the lock was being released
+    if instance_watcher.pending(provider_uuid):
+        watch_pending_instances.apply_async(args=[provider_uuid])
+
+
+def _check_pending_instances(provider_uuid):
+    from core.models.provider import Provider
+    from service.cache import get_cached_driver
+    entries = instance_watcher.pending(provider_uuid)
+    if not entries:
+        return []
+    provider = Provider.objects.get(uuid=provider_uuid)
+    driver = get_cached_driver(identity=provider.admin, force=False)
+    cloud_instances = {
+        instance.id: instance
+        for instance in driver.list_all_instances()
+    }
+    now = time.time()
+    remaining = []
+    for instance_alias, entry in entries.items():
+        instance = cloud_instances.get(instance_alias)
+        if not instance:
+            if instance_watcher.is_missing_too_long(entry, now):
+                celery_logger.debug(
+                    "Instance has been terminated: %s." % instance_alias
+                )
+                instance_watcher.remove(provider_uuid, instance_alias)
+            else:
+                remaining.append(entry)
+            continue
+        try:
+            _is_instance_ready(
+                instance, entry['status_query'], entry['tasks_allowed'],
+                entry['test_tmp_status']
+            )
+        except Exception:
+            if instance_watcher.is_expired(entry, now):
+                celery_logger.error(
+                    "Instance %s did not reach status %s in time" %
+                    (instance_alias, entry['status_query'])
+                )
+                instance_watcher.remove(provider_uuid, instance_alias)
+            else:
+                remaining.append(entry)
+            continue
+        instance_watcher.remove(provider_uuid, instance_alias)
+        for callback in entry['callbacks']:
+            signature(callback).apply_async()
+    return remaining
+
+
+@task(name="watch_all_pending_instances", ignore_result=True)
+def watch_all_pending_instances():
+    """
+    Restart the watcher of any provider that still has pending instances.
+    (Ex: the worker running the watcher was restarted)
+    """
+    for provider_uuid in instance_watcher.providers_with_pending():
+        watch_pending_instances.apply_async(args=[provider_uuid])
+
+
 def _is_instance_ready(
     instance,
     status_query,
@@ -312,6 +461,169 @@ def clear_empty_ips_for(username, core_provider_id, core_identity_uuid):
     _remove_ips_from_inactive_instances(driver, instances, core_identity)
 
 
+def _floating_ip_project(floating_ip):
+    return floating_ip.get('tenant_id') or floating_ip.get('project_id')
+
+
+def _identities_by_project(account_driver, identities):
+    """
+    Returns:
+        dict: id of each project of `identities` -> one of its identities
+    """
+    by_name = {}
+    for identity in identities:
+        by_name.setdefault(identity.project_name(), identity)
+    return dict(
+        (project.id, by_name[project.name])
+        for project in account_driver.list_projects() if project.name in by_name
+    )
+
+
+def _floating_ips_to_release(
+    floating_ips, ports, instances, is_inactive, project_ids
+):
+    """
+    Compute which floating IPs of a provider can be released.
+
+    Args:
+        floating_ips (list): every floating IP of the provider (neutron dicts)
+        ports (list): every port of the provider (neutron dicts)
+        instances (list): every instance of the provider
+        is_inactive (callable): returns True if an instance is inactive
+        project_ids: ids of the projects managed by Atmosphere, the floating
+            IPs of other projects are left alone
+
+    Returns:
+        tuple: (unattached floating IPs,
+                list of (floating IP, instance) attached to inactive instances)
+    """
+    device_by_port = {port['id']: port.get('device_id') for port in ports}
+    instances_by_id = {instance.id: instance for instance in instances}
+    unattached = []
+    inactive = []
+    for fip in floating_ips:
+        if _floating_ip_project(fip) not in project_ids:
+            continue
+        if not fip.get('port_id'):
+            unattached.append(fip)
+            continue
+        instance = instances_by_id.get(device_by_port.get(fip['port_id']))
+        if instance and is_inactive(instance):
+            inactive.append((fip, instance))
+    return unattached, inactive
+
+
+def _release_floating_ips(neutron, floating_ips, concurrency):
+    """
+    Delete `floating_ips`, at most `concurrency` requests at a time.
+
+    Returns:
+        int: number of floating IPs released
+    """
+    from multiprocessing.dummy import Pool as ThreadPool
+
+    def _release(fip):
+        try:
+            neutron.delete_floatingip(fip['id'])
+            return True
+        except Exception:
+            celery_logger.exception(
+                "Could not release floating IP %s" %
+                fip.get('floating_ip_address')
+            )
+            return False
+
+    if not floating_ips:
+        return 0
+    pool = ThreadPool(max(1, min(concurrency, len(floating_ips))))
+    try:
+        return sum(pool.map(_release, floating_ips))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _remove_floating_ips_of_instances(inactive, identities_by_project):
+    """
+    Remove the floating IPs of inactive instances with the driver of their
+    project's identity, like `clear_empty_ips_for`, so that the metadata of
+    the instances is updated too.
+
+    Args:
+        inactive (list): (floating IP, instance) attached to inactive instances
+        identities_by_project (dict): id of a project -> Identity
+
+    Returns:
+        int: number of floating IPs removed
+    """
+    from service import instance as instance_service
+    from service.driver import get_esh_driver
+    drivers = {}
+    removed = 0
+    for fip, instance in inactive:
+        identity = identities_by_project[_floating_ip_project(fip)]
+        try:
+            if identity.id not in drivers:
+                drivers[identity.id] = get_esh_driver(identity)
+            instance_service.remove_floating_ip(
+                drivers[identity.id], instance, str(identity.uuid)
+            )
+            removed += 1
+        except Exception:
+            celery_logger.exception(
+                "Could not remove floating IP %s of instance %s" %
+                (fip.get('floating_ip_address'), instance.id)
+            )
+    return removed
+
+
+@task(name="clear_empty_ips_for_provider")
+def clear_empty_ips_for_provider(core_provider_id):
+    """
+    Release the floating IPs of the projects of the provider's identities
+    that are not attached to a port, and remove the ones attached to an
+    inactive instance. Floating IPs, ports and instances are listed once
+    with the admin drivers; the floating IPs of projects Atmosphere does
+    not manage are left alone.
+
+    RETURN: number_ips_removed
+    """
+    from core.models.provider import Provider
+    from service.driver import get_account_driver, get_admin_driver
+    provider = Provider.objects.get(id=core_provider_id)
+    admin_driver = get_admin_driver(provider)
+    account_driver = get_account_driver(provider)
+    if not admin_driver or not account_driver:
+        celery_logger.warn(
+            "Could not create the admin drivers for Provider %s" % provider
+        )
+        return -404
+    identities_by_project = _identities_by_project(
+        account_driver, Identity.objects.filter(provider=provider)
+    )
+    neutron = account_driver.network_manager.neutron
+    floating_ips = neutron.list_floatingips()['floatingips']
+    ports = neutron.list_ports()['ports']
+    instances = admin_driver.list_all_instances()
+    unattached, inactive = _floating_ips_to_release(
+        floating_ips, ports, instances, admin_driver._is_inactive_instance,
+        identities_by_project
+    )
+    concurrency = getattr(settings, 'CLEAR_EMPTY_IPS_CONCURRENCY', 8)
+    num_ips_removed = _release_floating_ips(neutron, unattached, concurrency)
+    num_ips_removed += _remove_floating_ips_of_instances(
+        inactive, identities_by_project
+    )
+    celery_logger.info(
+        "Removed %s of %s floating ips (%s unattached, %s on inactive"
+        " instances) from the %s projects of Provider %s" % (
+            num_ips_removed, len(floating_ips), len(unattached), len(inactive),
+            len(identities_by_project), provider
+        )
+    )
+    return num_ips_removed
+
+
 @task(name="clear_empty_ips")
 def clear_empty_ips():
     celery_logger.debug("clear_empty_ips task started at %s." % datetime.now())
@@ -320,6 +632,20 @@ def clear_empty_ips():
             "clear_empty_ips task SKIPPED at %s." % datetime.now()
         )
         return
+    if getattr(settings, 'CLEAR_EMPTY_IPS_BY_PROVIDER', True):
+        from core.models.provider import Provider
+        providers = Provider.objects.filter(
+            type__name__iexact='openstack', active=True
+        )
+        for provider in providers:
+            try:
+                clear_empty_ips_for_provider.apply_async(args=[provider.id])
+            except Exception as exc:
+                celery_logger.exception(exc)
+        celery_logger.debug(
+            "clear_empty_ips task finished at %s." % datetime.now()
+        )
+        return
     identities = current_openstack_identities()
     for core_identity in identities:
         try:
@@ -705,16 +1031,7 @@ def get_chain_from_build(
     THEN Initialize the networking for the instance
     THEN deploy to the box.
     """
-    wait_active_task = wait_for_instance.s(
-        instance.id, driverCls, provider, identity, "active"
-    )
     has_secret = core_identity.get_credential('secret') is not None
-    if not has_secret:
-        add_security_group = add_security_group_task.si(
-            driverCls, provider, core_identity, instance.id
-        )
-        wait_active_task.link(add_security_group)
-    start_chain = wait_active_task
     network_start = get_chain_from_active_no_ip(
         driverCls,
         provider,
@@ -726,10 +1043,25 @@ def get_chain_from_build(
         redeploy=redeploy,
         deploy=deploy
     )
+    on_active = []
     if not has_secret:
+        add_security_group = add_security_group_task.si(
+            driverCls, provider, core_identity, instance.id
+        )
         add_security_group.link(network_start)
-    start_chain.link(network_start)
-    return start_chain
+        on_active.append(add_security_group)
+    on_active.append(network_start)
+    if getattr(settings, 'ENABLE_INSTANCE_WATCHER', True):
+        # The watcher starts 'on_active' once the instance is active
+        return wait_for_instance_event.si(
+            str(core_identity.provider.uuid), instance.id, "active", on_active
+        )
+    wait_active_task = wait_for_instance.s(
+        instance.id, driver_spec(core_identity), None, None, "active"
+    )
+    for next_task in on_active:
+        wait_active_task.link(next_task)
+    return wait_active_task
 
 
 def print_chain(start_task, idx=0):
@@ -1105,6 +1437,24 @@ def _deploy_instance_for_user(
         # would miss out on scripts that require first_deploy == True..
         # This will work for initial testing.
         first_deploy = not redeploy
+        batch_window = getattr(settings, 'USER_DEPLOY_BATCH_WINDOW', 10)
+        if batch_window:
+            # The batch deploys every instance registered within the window
+            # and applies the rest of the chain once it is done.
+            deploy_batcher.register(
+                instance_id,
+                instance.ip,
+                username,
+                first_deploy=first_deploy,
+                callbacks=current.request.callbacks,
+                errbacks=current.request.errbacks,
+                attempts_left=_deploy_instance_for_user.max_retries -
+                current.request.retries
+            )
+            current.request.callbacks = None
+            run_user_deploy_batch.apply_async(countdown=batch_window)
+            _update_status_log(instance, "Ansible queued for %s." % instance.ip)
+            return
         user_deploy(
             instance.ip, username, instance_id, first_deploy=first_deploy
         )
@@ -1120,6 +1470,70 @@ def _deploy_instance_for_user(
         _deploy_instance_for_user.retry(exc=exc)
 
 
+@task(
+    name="run_user_deploy_batch",
+    time_limit=32 * 60,    # Same limit as _deploy_instance_for_user
+    ignore_result=True
+)
+def run_user_deploy_batch():
+    """
+    Run the user deployment of every instance registered with the deploy
+    batcher at once, then resume or retry the chain of each instance.
+    """
+    entries = deploy_batcher.take()
+    if not entries:
+        return
+    celery_logger.info("User deploy batch of %s instances" % len(entries))
+    try:
+        results = user_batch_deploy(
+            [
+                (
+                    entry['instance_ip'], entry['username'], instance_id,
+                    entry['first_deploy']
+                ) for instance_id, entry in entries.items()
+            ]
+        )
+    except Exception as exc:
+        celery_logger.exception("User deploy batch failed")
+        results = dict.fromkeys(entries, exc)
+    for instance_id, entry in entries.items():
+        result = results.get(instance_id, [])
+        try:
+            if isinstance(result, Exception):
+                raise result
+            raise_playbook_errors(
+                result, instance_id, entry['instance_ip'], None
+            )
+        except Exception as exc:
+            _retry_user_deploy(instance_id, entry, exc)
+            continue
+        celery_logger.debug("Ansible Finished for %s." % entry['instance_ip'])
+        record_stage(instance_id, DEPLOYED, username=entry['username'])
+        for callback in entry['callbacks']:
+            signature(callback).apply_async((None, ))
+
+
+def _retry_user_deploy(instance_id, entry, exc):
+    message = "User deploy of %s failed: %s" % (instance_id, exc)
+    celery_logger.error(message)
+    if entry['attempts_left'] > 0:
+        deploy_batcher.register(
+            instance_id,
+            entry['instance_ip'],
+            entry['username'],
+            first_deploy=entry['first_deploy'],
+            callbacks=entry['callbacks'],
+            errbacks=entry['errbacks'],
+            attempts_left=entry['attempts_left'] - 1
+        )
+        run_user_deploy_batch.apply_async(
+            countdown=_deploy_instance_for_user.default_retry_delay
+        )
+        return
+    for errback in entry['errbacks']:
+        signature(errback).apply_async(({'instance': instance_id}, message, ""))
+
+
 @task(
     name="_deploy_instance",
     default_retry_delay=124,
@@ -1137,7 +1551,9 @@ def _deploy_instance(
     redeploy=False,
     **celery_task_args
 ):
-    from service.argo.instance_deploy import argo_deploy_instance
+    from service.argo.instance_deploy import (
+        argo_deploy_instance, argo_deploy_instance_async
+    )
     from service.argo.exception import ArgoBaseException
     try:
         celery_logger.debug(
@@ -1170,12 +1586,33 @@ def _deploy_instance(
         provider = Identity.find_instance(instance_id).provider
         # Argo workflow instead of service.deploy.instance_deploy()
         # TODO: use provider.location until there is short name for provider
-        argo_deploy_instance(
-            provider.uuid, instance_id, instance.ip, username, provider.timezone
-        )
-        _update_status_log(
-            instance, "ARGO, Ansible Finished for %s." % instance.ip
-        )
+        if getattr(settings, 'ENABLE_ARGO_WATCHER', True):
+            # The argo watcher applies the rest of the chain once the
+            # workflow completes, so this worker is not held while it runs.
+            argo_deploy_instance_async(
+                str(provider.uuid),
+                instance_id,
+                instance.ip,
+                username,
+                provider.timezone,
+                callbacks=current.request.callbacks,
+                errbacks=current.request.errbacks,
+                attempts_left=_deploy_instance.max_retries -
+                current.request.retries
+            )
+            current.request.callbacks = None
+            watch_argo_workflows.apply_async(args=[str(provider.uuid)])
+            _update_status_log(
+                instance, "ARGO, Workflow submitted for %s." % instance.ip
+            )
+        else:
+            argo_deploy_instance(
+                provider.uuid, instance_id, instance.ip, username,
+                provider.timezone
+            )
+            _update_status_log(
+                instance, "ARGO, Ansible Finished for %s." % instance.ip
+            )
         celery_logger.debug(
             "ARGO, _deploy_instance task finished at %s." % datetime.now()
         )
@@ -1188,6 +1625,112 @@ def _deploy_instance(
         _deploy_instance.retry(exc=exc)
 
 
+@task(name="watch_argo_workflows", ignore_result=True)
+def watch_argo_workflows(provider_uuid, token=None):
+    """
+    Check every workflow watched for 'provider_uuid' with a single
+    request, resume the chains of the completed ones and reschedule
+    itself until nothing is left to watch.
+    """
+    from service.argo import watcher as argo_watcher
+    token = argo_watcher.acquire_watcher(provider_uuid, token)
+    if not token:
+        # Another watcher is already polling this provider
+        return
+    try:
+        remaining = _check_argo_workflows(provider_uuid)
+    except Exception:
+        celery_logger.exception(
+            "ARGO, could not check workflows for provider %s" % provider_uuid
+        )
+        remaining = argo_watcher.pending(provider_uuid).values()
+    if remaining:
+        watch_argo_workflows.apply_async(
+            args=[provider_uuid, token],
+            countdown=argo_watcher.next_poll_delay(remaining)
+        )
+        return
+    argo_watcher.release_watcher(provider_uuid, token)
+    # Catch workflows registered while the lock was being released
+    if argo_watcher.pending(provider_uuid):
+        watch_argo_workflows.apply_async(args=[provider_uuid])
+
+
+def _check_argo_workflows(provider_uuid):
+    from service.argo import watcher as argo_watcher
+    from service.argo.common import ArgoContext, read_argo_config
+    from service.argo.instance_deploy import _dump_deploy_logs
+    from service.argo.wf import ArgoWorkflow, ArgoWorkflowStatus
+    from service.argo.wf_call import argo_workflow_exec
+    entries = argo_watcher.pending(provider_uuid)
+    if not entries:
+        return []
+    config = read_argo_config(
+        config_file_path=settings.ARGO_CONFIG_FILE_PATH,
+        provider_uuid=provider_uuid
+    )
+    phases = argo_watcher.list_workflow_phases(ArgoContext(config=config))
+    now = time.time()
+    remaining = []
+    for wf_name, entry in entries.items():
+        status = ArgoWorkflowStatus.from_phase(phases.get(wf_name))
+        if not status.complete:
+            if argo_watcher.is_expired(entry, now):
+                argo_watcher.remove(provider_uuid, wf_name)
+                _apply_errbacks(entry, wf_name, "did not complete in time")
+            else:
+                remaining.append(entry)
+            continue
+        argo_watcher.remove(provider_uuid, wf_name)
+        if entry['log_owner']:
+            username, instance_uuid = entry['log_owner']
+            _dump_deploy_logs(ArgoWorkflow(wf_name), username, instance_uuid)
+        if status.success:
+            celery_logger.debug("ARGO, workflow %s succeeded" % wf_name)
+            if entry['log_owner']:
+                record_stage(entry['log_owner'][1], DEPLOYED)
+            for callback in entry['callbacks']:
+                signature(callback).apply_async((None, ))
+        elif entry['resubmit'] and entry['attempts_left'] > 0:
+            celery_logger.info(
+                "ARGO, resubmitting failed workflow %s" % wf_name
+            )
+            wf, _ = argo_workflow_exec(wait=False, **entry['resubmit'])
+            new_entry = argo_watcher.register(
+                provider_uuid,
+                wf.wf_name,
+                callbacks=entry['callbacks'],
+                errbacks=entry['errbacks'],
+                resubmit=entry['resubmit'],
+                attempts_left=entry['attempts_left'] - 1,
+                log_owner=entry['log_owner'],
+                timeout=entry['timeout']
+            )
+            remaining.append(new_entry)
+        else:
+            _apply_errbacks(
+                entry, wf_name, "errored" if status.error else "failed"
+            )
+    return remaining
+
+
+def _apply_errbacks(entry, wf_name, reason):
+    message = "ARGO, workflow %s %s" % (wf_name, reason)
+    celery_logger.error(message)
+    for errback in entry['errbacks']:
+        signature(errback).apply_async(({'workflow': wf_name}, message, ""))
+
+
+@task(name="watch_all_argo_workflows", ignore_result=True)
+def watch_all_argo_workflows():
+    """
+    Restart the watcher of any provider that still has workflows to watch.
+    """
+    from service.argo import watcher as argo_watcher
+    for provider_uuid in argo_watcher.providers_with_pending():
+        watch_argo_workflows.apply_async(args=[provider_uuid])
+
+
 @task(name="check_web_desktop_task", max_retries=4, default_retry_delay=15)
 def check_web_desktop_task(
     driverCls, provider, identity, instance_alias, *args, **kwargs
@@ -1623,43 +2166,55 @@ def update_membership():
 
 
 def test_active_instances(instances):
-    tested_instances = {}
-    for instance in instances:
-        results = test_instance_links(instance.alias, instance.ip)
-        tested_instances.update(results)
-    return tested_instances
+    """
+    Test the links (see service.linktest) of `instances` concurrently.
+
+    Returns:
+        dict: instance alias -> {link: whether it is up}
+    """
+    from service.linktest import test_instance_links as test_links
+    return test_links([(instance.alias, instance.ip) for instance in instances])
 
 
 def test_instance_links(alias, uri):
-    from rtwo.linktest import test_link
-    vnc_address = 'http://%s:5904' % uri
-    try:
-        vnc_success = test_link(vnc_address)
-    except Exception:
-        celery_logger.exception("Bad vnc address: %s" % vnc_address)
-        vnc_success = False
-    return {alias: {'vnc': vnc_success}}
+    from service.linktest import test_instance_links as test_links
+    return test_links([(alias, uri)])
 
 
 def update_links(instances):
-    updated = []
+    """
+    Test the links of `instances` and update the link fields (vnc, shell...)
+    that changed, with one update per combination of values.
+
+    The fields are written with `QuerySet.update`, which skips
+    `Instance.save()` and its signals.
+
+    Returns:
+        list: the ids (not the Instance objects) of the updated instances
+    """
     linktest_results = test_active_instances(instances)
-    for (instance_id, link_results) in linktest_results.items():
-        try:
-            update = False
-            instance = Instance.objects.get(provider_alias=instance_id)
-            if link_results['vnc'] != instance.vnc:
-                celery_logger.debug(
-                    'Change Instance %s VNC %s-->%s' %
-                    (instance, instance.vnc, link_results['vnc'])
+    if not linktest_results:
+        return []
+    fields = sorted(next(iter(linktest_results.values())))
+    changes = {}
+    for row in Instance.objects.filter(
+        provider_alias__in=list(linktest_results)
+    ).values('id', 'provider_alias', *fields):
+        link_results = linktest_results[row['provider_alias']]
+        if any(row[field] != link_results[field] for field in fields):
+            celery_logger.debug(
+                'Change Instance %s links %s-->%s' % (
+                    row['provider_alias'],
+                    dict((field, row[field]) for field in fields), link_results
                 )
-                instance.vnc = link_results['vnc']
-                update = True
-            if update:
-                instance.save()
-                updated.append(instance)
-        except Instance.DoesNotExist:
-            continue
+            )
+            values = tuple(link_results[field] for field in fields)
+            changes.setdefault(values, []).append(row['id'])
+    updated = []
+    for values, instance_ids in changes.items():
+        Instance.objects.filter(id__in=instance_ids
+                               ).update(**dict(zip(fields, values)))
+        updated.extend(instance_ids)
     celery_logger.debug("Instances updated: %d" % len(updated))
     return updated
 
@@ -22,6 +22,8 @@ from core.models.machine_request import MachineRequest
 from core.models.application import Application, ApplicationMembership
 from core.models.allocation_source import AllocationSource
 from core.models.application_version import ApplicationVersion
+from core.models.user import AtmosphereUser
+from core.task_payload import COMPACT_SERIALIZER, load_model
 
 from service.machine import (
     update_db_membership_for_group, update_cloud_membership_for_machine,
@@ -33,6 +35,7 @@ from service.monitoring import (
 )
 from service.driver import get_account_driver
 from service.cache import get_cached_driver
+from service.periodic import dispatch_for_providers, provider_run
 from service.exceptions import TimeoutError
 from rtwo.models.size import OSSize
 from rtwo.exceptions import GlanceConflict, GlanceForbidden
@@ -87,11 +90,11 @@ def prune_machines():
     Query the cloud and remove any machines
     that exist in the DB but can no longer be found.
     """
-    for p in Provider.get_active():
-        prune_machines_for.apply_async(args=[p.id])
+    dispatch_for_providers(prune_machines_for, Provider.get_active())
 
 
 @task(name="prune_machines_for")
+@provider_run("prune_machines_for")
 def prune_machines_for(
     provider_id,
     print_logs=False,
@@ -176,11 +179,11 @@ def monitor_machines():
     """
     Update machines by querying the Cloud for each active provider.
     """
-    for p in Provider.get_active():
-        monitor_machines_for.apply_async(args=[p.id])
+    dispatch_for_providers(monitor_machines_for, Provider.get_active())
 
 
 @task(name="monitor_machines_for")
+@provider_run("monitor_machines_for")
 def monitor_machines_for(
     provider_id,
     limit_machines=[],
@@ -536,8 +539,35 @@ def monitor_instances():
     """
     Update instances for each active provider.
     """
-    for p in Provider.get_active():
-        monitor_instances_for.apply_async(args=[p.id])
+    dispatch_for_providers(monitor_instances_for, Provider.get_active())
+
+
+@task(name="refresh_application_metrics")
+def refresh_application_metrics(full=False):
+    """
+    Refresh the materialized metrics of every application.
+    """
+    from core.metrics.application import refresh_application_metrics as refresh
+    return refresh(full=full)
+
+
+@task(name="refresh_application_search")
+def refresh_application_search():
+    """
+    Refresh the full-text search document of every application, catching
+    changes that signals do not (tag renames, provider locations...).
+    """
+    from core.models.application_search import refresh_search_documents
+    return refresh_search_documents()
+
+
+@task(name="flush_launch_traces")
+def flush_launch_traces():
+    """
+    Move the launch stages recorded in redis into the launch trace table.
+    """
+    from core.launch_trace import flush
+    return flush()
 
 
 @task(name="monitor_allocation_sources")
@@ -598,12 +628,20 @@ def monitor_allocation_sources(usernames=()):
                     user
                 )
                 allocation_source_overage_enforcement_for_user.apply_async(
-                    args=(allocation_source, user)
+                    args=(allocation_source.id, user.id)
                 )
 
 
-@task(name="allocation_source_overage_enforcement_for_user")
+@task(
+    name="allocation_source_overage_enforcement_for_user",
+    serializer=COMPACT_SERIALIZER
+)
 def allocation_source_overage_enforcement_for_user(allocation_source, user):
+    """
+    allocation_source, user: ids of the allocation source and the user
+    """
+    allocation_source = load_model(AllocationSource, allocation_source)
+    user = load_model(AtmosphereUser, user)
     celery_logger.debug(
         'allocation_source_overage_enforcement_for_user - allocation_source: %s, user: %s',
         allocation_source, user
@@ -628,6 +666,7 @@ def allocation_source_overage_enforcement_for_user(allocation_source, user):
 
 
 @task(name="monitor_instances_for")
+@provider_run("monitor_instances_for")
 def monitor_instances_for(
     provider_id, users=None, print_logs=False, start_date=None, end_date=None
 ):
@@ -686,11 +725,11 @@ def monitor_volumes():
     """
     Update volumes for each active provider.
     """
-    for p in Provider.get_active():
-        monitor_volumes_for.apply_async(args=[p.id])
+    dispatch_for_providers(monitor_volumes_for, Provider.get_active())
 
 
 @task(name="monitor_volumes_for")
+@provider_run("monitor_volumes_for")
 def monitor_volumes_for(provider_id, print_logs=False):
     """
     Run the set of tasks related to monitoring sizes for a provider.
@@ -768,11 +807,11 @@ def monitor_sizes():
     """
     Update sizes for each active provider.
     """
-    for p in Provider.get_active():
-        monitor_sizes_for.apply_async(args=[p.id])
+    dispatch_for_providers(monitor_sizes_for, Provider.get_active())
 
 
 @task(name="monitor_sizes_for")
+@provider_run("monitor_sizes_for")
 def monitor_sizes_for(provider_id, print_logs=False):
     """
     Run the set of tasks related to monitoring sizes for a provider.
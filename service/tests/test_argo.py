@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+import mock
+
+from service.argo import common, watcher
+from service.argo.wf import ArgoWorkflowStatus
+
+
+class ArgoWorkflowStatusTest(TestCase):
+    def test_from_phase(self):
+        status = ArgoWorkflowStatus.from_phase("Running")
+        self.assertFalse(status.complete)
+        status = ArgoWorkflowStatus.from_phase("Succeeded")
+        self.assertTrue(status.complete)
+        self.assertTrue(status.success)
+        status = ArgoWorkflowStatus.from_phase("Error")
+        self.assertTrue(status.complete)
+        self.assertFalse(status.success)
+        self.assertTrue(status.error)
+        status = ArgoWorkflowStatus.from_phase(None)
+        self.assertIsNone(status.complete)
+
+
+class LoadYAMLFileTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "workflow.yml")
+        with open(self.file_path, "w") as yaml_file:
+            yaml_file.write("spec:\n  arguments: {}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parsed_file_is_cached_until_modified(self):
+        with mock.patch(
+            "service.argo.common.yaml.safe_load", wraps=common.yaml.safe_load
+        ) as safe_load:
+            first = common._load_yaml_file(self.file_path)
+            second = common._load_yaml_file(self.file_path)
+            self.assertEqual(first, second)
+            self.assertEqual(safe_load.call_count, 1)
+
+            # callers get their own copy
+            first["spec"]["arguments"]["parameters"] = []
+            self.assertEqual(
+                common._load_yaml_file(self.file_path)["spec"]["arguments"], {}
+            )
+
+            mtime = os.stat(self.file_path).st_mtime
+            os.utime(self.file_path, (mtime + 10, mtime + 10))
+            common._load_yaml_file(self.file_path)
+            self.assertEqual(safe_load.call_count, 2)
+
+
+class ArgoWatcherTest(TestCase):
+    def test_list_workflow_phases_uses_one_request(self):
+        context = mock.Mock()
+        context.client().list_workflow.return_value = {
+            "items":
+                [
+                    {
+                        "metadata": {
+                            "name": "deploy-1"
+                        },
+                        "status": {
+                            "phase": "Running"
+                        }
+                    },
+                    {
+                        "metadata": {
+                            "name": "deploy-2"
+                        },
+                        "status": {
+                            "phase": "Succeeded"
+                        }
+                    }
+                ]
+        }
+        phases = watcher.list_workflow_phases(context)
+        self.assertEqual(
+            phases, {
+                "deploy-1": "Running",
+                "deploy-2": "Succeeded"
+            }
+        )
+        self.assertEqual(context.client().list_workflow.call_count, 1)
+
+    def test_poll_delay(self):
+        entry = {"registered_at": 0}
+        self.assertEqual(
+            watcher.next_poll_delay([entry], now=30), watcher.SHORT_POLL_DELAY
+        )
+        self.assertEqual(
+            watcher.next_poll_delay([entry], now=600), watcher.LONG_POLL_DELAY
+        )
@@ -0,0 +1,119 @@
+from django.test import TestCase
+import mock
+
+from service.tasks import driver as driver_tasks
+
+
+class FloatingIpsToReleaseTest(TestCase):
+    def _instance(self, alias, inactive):
+        instance = mock.Mock()
+        instance.id = alias
+        instance.inactive = inactive
+        return instance
+
+    def test_unattached_and_inactive_floating_ips(self):
+        floating_ips = [
+            {
+                'id': 'fip-unattached',
+                'port_id': None
+            },
+            {
+                'id': 'fip-active',
+                'port_id': 'port-active'
+            },
+            {
+                'id': 'fip-inactive',
+                'port_id': 'port-inactive'
+            },
+            {
+                'id': 'fip-router',
+                'port_id': 'port-router'
+            },
+            {
+                'id': 'fip-other-project',
+                'port_id': None,
+                'tenant_id': 'other-project'
+            },
+        ]
+        for fip in floating_ips[:4]:
+            fip['tenant_id'] = 'atmo-project'
+        ports = [
+            {
+                'id': 'port-active',
+                'device_id': 'instance-active'
+            },
+            {
+                'id': 'port-inactive',
+                'device_id': 'instance-inactive'
+            },
+            {
+                'id': 'port-router',
+                'device_id': 'router'
+            },
+        ]
+        active = self._instance('instance-active', False)
+        inactive = self._instance('instance-inactive', True)
+        unattached, on_inactive = driver_tasks._floating_ips_to_release(
+            floating_ips, ports, [active, inactive],
+            lambda instance: instance.inactive, {'atmo-project'}
+        )
+        self.assertEqual([fip['id'] for fip in unattached], ['fip-unattached'])
+        self.assertEqual(on_inactive, [(floating_ips[2], inactive)])
+
+
+class IdentitiesByProjectTest(TestCase):
+    def test_only_projects_of_identities(self):
+        identity = mock.Mock()
+        identity.project_name.return_value = 'atmo'
+        projects = []
+        for project_id, name in [('id-1', 'atmo'), ('id-2', 'other')]:
+            project = mock.Mock(id=project_id)
+            project.name = name
+            projects.append(project)
+        account_driver = mock.Mock()
+        account_driver.list_projects.return_value = projects
+        self.assertEqual(
+            driver_tasks._identities_by_project(account_driver, [identity]),
+            {'id-1': identity}
+        )
+
+
+class RemoveFloatingIpsOfInstancesTest(TestCase):
+    def test_removed_with_the_identity_driver(self):
+        identity = mock.Mock(id=1, uuid='identity-uuid')
+        instance = mock.Mock(id='instance-inactive')
+        with mock.patch('service.driver.get_esh_driver') as get_esh_driver, \
+                mock.patch('service.instance.remove_floating_ip') as remove:
+            removed = driver_tasks._remove_floating_ips_of_instances(
+                [({
+                    'id': 'fip',
+                    'project_id': 'atmo-project'
+                }, instance)], {'atmo-project': identity}
+            )
+        self.assertEqual(removed, 1)
+        get_esh_driver.assert_called_once_with(identity)
+        remove.assert_called_once_with(
+            get_esh_driver.return_value, instance, 'identity-uuid'
+        )
+
+
+class ReleaseFloatingIpsTest(TestCase):
+    def test_failures_are_not_counted(self):
+        neutron = mock.Mock()
+
+        def delete_floatingip(fip_id):
+            if fip_id == 'fip-2':
+                raise Exception("Conflict")
+
+        neutron.delete_floatingip.side_effect = delete_floatingip
+        floating_ips = [{'id': 'fip-%s' % index} for index in range(5)]
+        released = driver_tasks._release_floating_ips(
+            neutron, floating_ips, concurrency=2
+        )
+        self.assertEqual(released, 4)
+        self.assertEqual(neutron.delete_floatingip.call_count, 5)
+
+    def test_nothing_to_release(self):
+        neutron = mock.Mock()
+        self.assertEqual(driver_tasks._release_floating_ips(neutron, [], 4), 0)
+        self.assertFalse(neutron.delete_floatingip.called)
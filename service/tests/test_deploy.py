@@ -1,3 +1,5 @@
+import os
+
 from django.test import TestCase
 import mock
 
@@ -38,3 +40,176 @@ class UserDeployTests(TestCase):
             }
             self.assertIn(instance_script.get_title_slug(), script_titles)
             self.assertIn(image_script.get_title_slug(), script_titles)
+
+
+class ExecutePlaybooksTests(TestCase):
+    def _execute(self, returncode, stderr=""):
+        from service.deploy import execute_playbooks
+        logger = mock.Mock()
+        with mock.patch('service.deploy.subprocess.Popen') as popen:
+            popen.return_value.communicate.return_value = (
+                "PLAY RECAP\nvm1.example.com : ok=3 failed=0", stderr
+            )
+            popen.return_value.returncode = returncode
+            results = execute_playbooks(
+                "/playbooks",
+                None, {"ATMOUSERNAME": "user1"},
+                "vm1.example.com",
+                logger=logger,
+                limit_playbooks=["a.yml", "b.yml"]
+            )
+        return popen, logger, results
+
+    def test_all_playbooks_run_in_one_process(self):
+        popen, logger, results = self._execute(0)
+        self.assertEqual(results, [0])
+        self.assertEqual(popen.call_count, 1)
+        args = popen.call_args[0][0]
+        self.assertIn("--limit=vm1.example.com", args)
+        self.assertEqual(args[-2:], ["/playbooks/a.yml", "/playbooks/b.yml"])
+        # The readable output of the default callback goes to the deploy log
+        self.assertNotIn('env', popen.call_args[1])
+        logger.debug.assert_any_call(
+            "PLAY RECAP\nvm1.example.com : ok=3 failed=0"
+        )
+
+    def test_errors_of_failed_runs_are_warnings(self):
+        _, logger, results = self._execute(2, stderr="ERROR! it broke")
+        self.assertEqual(results, [2])
+        logger.warn.assert_called_once_with("ERROR! it broke")
+
+    def test_playbook_listing_is_cached(self):
+        from service.deploy import list_playbooks, _playbook_listings
+        _playbook_listings.clear()
+        with mock.patch('service.deploy.os.stat') as stat, \
+                mock.patch('service.deploy.os.listdir') as listdir:
+            stat.return_value.st_mtime = 1
+            listdir.return_value = ["b.yml", "a.yml"]
+            self.assertEqual(list_playbooks("/playbooks"), ["a.yml", "b.yml"])
+            self.assertEqual(list_playbooks("/playbooks"), ["a.yml", "b.yml"])
+            self.assertEqual(listdir.call_count, 1)
+            stat.return_value.st_mtime = 2
+            list_playbooks("/playbooks")
+            self.assertEqual(listdir.call_count, 2)
+
+
+RECAP = """PLAY [all] *****
+
+PLAY RECAP *********************************************************************
+vm1.example.com            : ok=3    changed=1    unreachable=0    failed=0
+vm2.example.com            : ok=1    changed=0    unreachable=0    failed=1
+vm3.example.com            : ok=0    changed=0    unreachable=1    failed=0
+"""
+
+
+class ExecutePlaybooksForHostsTests(TestCase):
+    def test_play_recap_gives_the_result_of_each_host(self):
+        from service.deploy import parse_play_recap
+        self.assertEqual(
+            parse_play_recap(RECAP), {
+                "vm1.example.com": 0,
+                "vm2.example.com": 2,
+                "vm3.example.com": 4
+            }
+        )
+
+    def test_each_playbook_runs_once_for_the_remaining_hosts(self):
+        from service.deploy import execute_playbooks_for_hosts
+        host_vars = {
+            "vm%s.example.com" % i: {
+                "ATMOUSERNAME": "user%s" % i
+            }
+            for i in range(1, 5)
+        }
+        logger = mock.Mock()
+        with mock.patch('service.deploy.subprocess.Popen') as popen:
+            popen.return_value.communicate.return_value = (RECAP, "")
+            popen.return_value.returncode = 2
+            results = execute_playbooks_for_hosts(
+                "/playbooks", {},
+                host_vars,
+                logger=logger,
+                limit_playbooks=["a.yml", "b.yml"]
+            )
+            first_args = popen.call_args_list[0][0][0]
+            last_args = popen.call_args_list[1][0][0]
+        self.assertEqual(popen.call_count, 2)
+        self.assertIn(
+            "--limit=vm1.example.com,vm2.example.com,"
+            "vm3.example.com,vm4.example.com", first_args
+        )
+        # Hosts that failed the first playbook are left out of the next one
+        self.assertIn("--limit=vm1.example.com", last_args)
+        self.assertEqual(last_args[-1], "/playbooks/b.yml")
+        # vm4 is missing from the recap of a failed run
+        self.assertEqual(
+            results, {
+                "vm1.example.com": 0,
+                "vm2.example.com": 2,
+                "vm3.example.com": 4,
+                "vm4.example.com": 2
+            }
+        )
+        # The host inventory is removed after the run
+        inventory = [
+            arg for arg in first_args if arg.startswith("--inventory=")
+        ][-1]
+        self.assertFalse(os.path.exists(inventory[len("--inventory="):]))
+
+
+class UserDeployBatchTests(TestCase):
+    def _entry(self, attempts_left):
+        return {
+            "instance_ip": "10.0.0.1",
+            "username": "user1",
+            "first_deploy": True,
+            "callbacks": ["callback"],
+            "errbacks": ["errback"],
+            "attempts_left": attempts_left,
+        }
+
+    def _run(self, entries, results):
+        from service.tasks import driver
+        with mock.patch.object(driver.deploy_batcher, 'take') as take, \
+                mock.patch.object(driver.deploy_batcher, 'register') as register, \
+                mock.patch.object(driver, 'user_batch_deploy') as batch_deploy, \
+                mock.patch.object(driver, 'record_stage'), \
+                mock.patch.object(driver, 'signature') as signature, \
+                mock.patch.object(driver.run_user_deploy_batch, 'apply_async'):
+            take.return_value = entries
+            batch_deploy.return_value = results
+            driver.run_user_deploy_batch()
+        return batch_deploy, register, signature
+
+    def test_instances_are_deployed_together(self):
+        batch_deploy, register, signature = self._run(
+            {
+                "vm1": self._entry(3),
+                "vm2": self._entry(3)
+            }, {
+                "vm1": [0],
+                "vm2": [0]
+            }
+        )
+        self.assertEqual(batch_deploy.call_count, 1)
+        self.assertEqual(len(batch_deploy.call_args[0][0]), 2)
+        self.assertEqual(signature.call_count, 2)
+        signature.return_value.apply_async.assert_called_with((None, ))
+        register.assert_not_called()
+
+    def test_failed_instances_are_retried_then_errbacks_applied(self):
+        _, register, signature = self._run(
+            {
+                "vm1": self._entry(1),
+                "vm2": self._entry(0)
+            }, {
+                "vm1": [2],
+                "vm2": ValueError("no project")
+            }
+        )
+        self.assertEqual(register.call_count, 1)
+        self.assertEqual(register.call_args[0][0], "vm1")
+        self.assertEqual(register.call_args[1]['attempts_left'], 0)
+        signature.assert_called_once_with("errback")
+        context = signature.return_value.apply_async.call_args[0][0][0]
+        self.assertEqual(context, {'instance': 'vm2'})
@@ -0,0 +1,86 @@
+from django.test import TestCase
+import mock
+
+from service import driver as service_driver
+
+
+class NetworkSessionCacheTest(TestCase):
+    def setUp(self):
+        service_driver._network_sessions.clear()
+        self.identity = mock.Mock(uuid='identity-uuid')
+        self.creds = {'key': 'user', 'secret': 'pass'}
+        patcher = mock.patch.object(service_driver.task_metrics, 'count')
+        self.count = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _auth(self, expiring=False):
+        auth = mock.Mock()
+        auth.auth_ref.will_expire_soon.return_value = expiring
+        return auth
+
+    def _connect(self, *args, **kwargs):
+        return (self._auth(), mock.Mock(), 'token')
+
+    def _get_session(self, creds=None):
+        return service_driver._get_network_session(
+            self.identity, creds or self.creds, 'https://keystone/v3',
+            'project', 'default'
+        )
+
+    def test_session_is_reused_for_identity(self):
+        auth, sess = self._auth(), mock.Mock()
+        with mock.patch.object(
+            service_driver,
+            '_connect_to_keystone_v3',
+            return_value=(auth, sess, 'token')
+        ) as connect:
+            self.assertIs(self._get_session(), sess)
+            self.assertIs(self._get_session(), sess)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(
+            self.count.call_args_list, [
+                mock.call("network_sessions", authentications=1),
+                mock.call("network_sessions", reused=1)
+            ]
+        )
+
+    def test_expiring_session_is_replaced(self):
+        auth, sess = self._auth(expiring=True), mock.Mock()
+        with mock.patch.object(
+            service_driver,
+            '_connect_to_keystone_v3',
+            return_value=(auth, sess, 'token')
+        ) as connect:
+            self._get_session()
+            self._get_session()
+        self.assertEqual(connect.call_count, 2)
+
+    def test_changed_credentials_authenticate_again(self):
+        auth, sess = self._auth(), mock.Mock()
+        with mock.patch.object(
+            service_driver,
+            '_connect_to_keystone_v3',
+            return_value=(auth, sess, 'token')
+        ) as connect:
+            self._get_session()
+            self._get_session({'key': 'user', 'secret': 'new-pass'})
+        self.assertEqual(connect.call_count, 2)
+        # The session of the old credentials is replaced
+        self.assertEqual(len(service_driver._network_sessions), 1)
+
+    def test_least_recently_used_sessions_are_dropped(self):
+        with mock.patch.object(
+            service_driver,
+            '_connect_to_keystone_v3',
+            side_effect=self._connect
+        ) as connect:
+            with mock.patch.object(
+                service_driver, 'NETWORK_SESSION_CACHE_SIZE', 2
+            ):
+                for uuid in ('uuid-1', 'uuid-2', 'uuid-1', 'uuid-3', 'uuid-1'):
+                    self.identity.uuid = uuid
+                    self._get_session()
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual(
+            list(service_driver._network_sessions), ['uuid-3', 'uuid-1']
+        )
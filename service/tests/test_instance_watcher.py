@@ -0,0 +1,80 @@
+import time
+
+from django.test import TestCase
+import mock
+
+from service import instance_watcher
+
+
+def _entry(registered_at, timeout=instance_watcher.DEFAULT_TIMEOUT):
+    return {'registered_at': registered_at, 'timeout': timeout}
+
+
+class NextPollDelayTest(TestCase):
+    def test_new_instances_are_polled_quickly(self):
+        delay = instance_watcher.next_poll_delay([_entry(100)], now=101)
+        self.assertEqual(delay, instance_watcher.MIN_POLL_DELAY)
+
+    def test_old_instances_back_off(self):
+        delay = instance_watcher.next_poll_delay([_entry(0)], now=300)
+        self.assertEqual(delay, 30)
+        delay = instance_watcher.next_poll_delay([_entry(0)], now=3000)
+        self.assertEqual(delay, instance_watcher.MAX_POLL_DELAY)
+
+    def test_youngest_instance_sets_the_pace(self):
+        entries = [_entry(0), _entry(2990)]
+        delay = instance_watcher.next_poll_delay(entries, now=3000)
+        self.assertEqual(delay, instance_watcher.MIN_POLL_DELAY)
+
+    def test_expired(self):
+        self.assertFalse(instance_watcher.is_expired(_entry(0, 60), now=60))
+        self.assertTrue(instance_watcher.is_expired(_entry(0, 60), now=61))
+
+
+class CheckPendingInstancesTest(TestCase):
+    def _cloud_instance(self, alias, status, task=None):
+        instance = mock.Mock()
+        instance.id = alias
+        instance._node.extra = {'status': status, 'task': task}
+        return instance
+
+    def test_ready_instances_start_their_chain(self):
+        from service.tasks import driver as driver_tasks
+        active_callback = mock.Mock()
+        building_callback = mock.Mock()
+        now = time.time()
+        entries = {
+            'active-instance':
+                dict(
+                    _entry(now),
+                    status_query='active',
+                    tasks_allowed=False,
+                    test_tmp_status=False,
+                    callbacks=[active_callback]
+                ),
+            'building-instance':
+                dict(
+                    _entry(now),
+                    status_query='active',
+                    tasks_allowed=False,
+                    test_tmp_status=False,
+                    callbacks=[building_callback]
+                ),
+        }
+        cloud_driver = mock.Mock()
+        cloud_driver.list_all_instances.return_value = [
+            self._cloud_instance('active-instance', 'ACTIVE'),
+            self._cloud_instance('building-instance', 'BUILD', 'spawning'),
+        ]
+        with mock.patch.object(instance_watcher, 'pending', return_value=entries), \
+                mock.patch.object(instance_watcher, 'remove') as remove, \
+                mock.patch('core.models.provider.Provider.objects'), \
+                mock.patch('service.cache.get_cached_driver', return_value=cloud_driver), \
+                mock.patch.object(driver_tasks, 'signature', side_effect=lambda sig: sig):
+            remaining = driver_tasks._check_pending_instances('provider-uuid')
+
+        self.assertEqual(cloud_driver.list_all_instances.call_count, 1)
+        active_callback.apply_async.assert_called_once_with()
+        self.assertFalse(building_callback.apply_async.called)
+        remove.assert_called_once_with('provider-uuid', 'active-instance')
+        self.assertEqual(remaining, [entries['building-instance']])
@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+import uuid
+
+from django.test import TestCase, override_settings
+import mock
+
+from api.tests.factories import InstanceFactory
+from core.models import Instance
+from service import linktest
+from service.tasks.driver import update_links
+
+
+class DummyServer(object):
+    """
+    Local socket that answers every connection with `response`, or keeps it
+    open without answering when `response` is None
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.connections = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(50)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.sock.accept()
+            except socket.error:
+                return
+            self.connections.append(connection)
+            if self.response is not None:
+                connection.recv(1024)
+                connection.sendall(self.response)
+                connection.close()
+
+    def close(self):
+        self.sock.close()
+        for connection in self.connections:
+            connection.close()
+
+
+def _closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class ProbeEndpointsTest(TestCase):
+    def setUp(self):
+        self.servers = {
+            "up": DummyServer("HTTP/1.1 200 OK\r\n\r\n"),
+            "redirect": DummyServer("HTTP/1.0 302 Found\r\n\r\n"),
+            "not_found": DummyServer("HTTP/1.1 404 Not Found\r\n\r\n"),
+            "not_http": DummyServer("RFB 003.008\n"),
+            "silent": DummyServer(None),
+        }
+        for server in self.servers.values():
+            self.addCleanup(server.close)
+
+    def test_endpoints(self):
+        targets = [
+            (name, "127.0.0.1", server.port)
+            for name, server in self.servers.items()
+        ]
+        targets.append(("refused", "127.0.0.1", _closed_port()))
+        results = linktest.probe_endpoints(targets, timeout=0.5)
+        self.assertEqual(
+            results, {
+                "up": True,
+                "redirect": True,
+                "not_found": False,
+                "not_http": False,
+                "silent": False,
+                "refused": False,
+            }
+        )
+
+    def test_probes_run_concurrently(self):
+        silent = self.servers["silent"]
+        targets = [(index, "127.0.0.1", silent.port) for index in range(20)]
+        started = time.time()
+        results = linktest.probe_endpoints(targets, timeout=0.5, concurrency=10)
+        # Two rounds of 10 probes timing out, rather than 20 in a row
+        self.assertLess(time.time() - started, 3)
+        self.assertEqual(results, dict((index, False) for index in range(20)))
+
+    def test_instance_links(self):
+        with override_settings(
+            LINK_TEST_ENDPOINTS={
+                "vnc": self.servers["up"].port,
+                "shell": self.servers["not_found"].port
+            }
+        ):
+            results = linktest.test_instance_links(
+                [("alias-1", "127.0.0.1"), ("alias-2", None)], timeout=0.5
+            )
+        self.assertEqual(
+            results, {
+                "alias-1": {
+                    "vnc": True,
+                    "shell": False
+                },
+                "alias-2": {
+                    "vnc": False,
+                    "shell": False
+                },
+            }
+        )
+
+
+class UpdateLinksTest(TestCase):
+    def test_changed_links_are_updated_in_bulk(self):
+        unchanged = InstanceFactory.create(provider_alias=uuid.uuid4())
+        changed = [
+            InstanceFactory.create(provider_alias=uuid.uuid4())
+            for _ in range(3)
+        ]
+        results = dict(
+            (str(instance.provider_alias), {
+                "vnc": True,
+                "shell": False
+            }) for instance in changed
+        )
+        results[str(unchanged.provider_alias)] = {"vnc": False, "shell": False}
+        results["deleted-instance"] = {"vnc": True, "shell": True}
+        with mock.patch(
+            'service.tasks.driver.test_active_instances', return_value=results
+        ), self.assertNumQueries(2):
+            updated = update_links([])
+        self.assertEqual(
+            sorted(updated), sorted(instance.id for instance in changed)
+        )
+        self.assertEqual(
+            Instance.objects.filter(vnc=True).count(), len(changed)
+        )
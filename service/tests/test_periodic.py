@@ -0,0 +1,201 @@
+from django.test import TestCase, override_settings
+import mock
+
+from service import periodic
+from service.periodic import _dispatched
+
+
+class FakeRedis(object):
+    """
+    The commands used by service.periodic and service.cache locks
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.results = None
+
+    def pipeline(self):
+        self.results = []
+        return self
+
+    def execute(self):
+        results, self.results = self.results, None
+        return results
+
+    def _result(self, value):
+        if self.results is None:
+            return value
+        self.results.append(value)
+        return self
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return self._result(None)
+        self.values[key] = str(value)
+        return self._result(True)
+
+    def exists(self, key):
+        return key in self.values
+
+    def expire(self, key, ttl):
+        return True
+
+    def delete(self, key):
+        return int(self.values.pop(key, None) is not None)
+
+    def rpush(self, key, value):
+        self.values.setdefault(key, []).append(value)
+        return self._result(len(self.values[key]))
+
+    def ltrim(self, key, start, end):
+        self.values[key] = self.values.get(key, [])[start:]
+        return self._result(True)
+
+    def lrange(self, key, start, end):
+        return self.values.get(key, [])[start:]
+
+
+class Request(object):
+    def __init__(self, **headers):
+        self.__dict__.update(headers)
+
+
+# Runs take no time here, do not let their duration defer the next ones
+@override_settings(
+    PERIODIC_RUN_POLICIES={
+        "monitor_volumes_for": {
+            "backoff": 0
+        },
+        "monitor_instances_for": {
+            "backoff": 0
+        }
+    }
+)
+class PeriodicTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        for target in [
+            'service.periodic.redis_connection',
+            'service.cache.redis_connection'
+        ]:
+            patcher = mock.patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Runs are queued by dispatch_for_providers unless a test says not
+        patcher = mock.patch('service.periodic._dispatched', return_value=True)
+        self.dispatched = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.task = mock.Mock()
+        self.task.name = "monitor_volumes_for"
+        self.provider = mock.Mock(id=1)
+
+    def _statuses(self, task_name="monitor_volumes_for"):
+        return [entry["status"] for entry in periodic.run_history(task_name, 1)]
+
+    def _run(self, task_name, func=None):
+        @periodic.provider_run(task_name)
+        def run(provider_id):
+            return func() if func else provider_id
+
+        return run
+
+    def test_only_one_run_is_queued(self):
+        periodic.dispatch_for_providers(self.task, [self.provider])
+        periodic.dispatch_for_providers(self.task, [self.provider])
+        self.task.apply_async.assert_called_once_with(
+            args=[1], headers={periodic.RUN_HEADER: True}
+        )
+
+        self.assertEqual(self._run("monitor_volumes_for")(1), 1)
+        periodic.dispatch_for_providers(self.task, [self.provider])
+        self.assertEqual(self.task.apply_async.call_count, 2)
+        self.assertEqual(self._statuses(), [periodic.SUCCEEDED])
+
+    def test_running_tasks_are_skipped(self):
+        def tick():
+            self.assertFalse(periodic.should_dispatch("monitor_volumes_for", 1))
+            # Another worker picking up a run does not run it either
+            self.assertIsNone(self._run("monitor_volumes_for")(1))
+            return "done"
+
+        self.assertEqual(self._run("monitor_volumes_for", tick)(1), "done")
+        self.assertEqual(
+            self._statuses(),
+            [periodic.SKIPPED, periodic.LOCKED, periodic.SUCCEEDED]
+        )
+
+    def test_direct_calls_are_not_checked(self):
+        def call():
+            self.dispatched.return_value = False
+            # e.g. monitor_resources_for calling monitor_volumes_for
+            self.assertEqual(self._run("monitor_volumes_for")(1), 1)
+            self.dispatched.return_value = True
+            return "done"
+
+        periodic.dispatch_for_providers(self.task, [self.provider])
+        self.assertEqual(self._run("monitor_volumes_for", call)(1), "done")
+        self.assertEqual(self._statuses(), [periodic.SUCCEEDED])
+
+        periodic.dispatch_for_providers(self.task, [self.provider])
+        self.dispatched.return_value = False
+        self._run("monitor_volumes_for")(1)
+        # The queued run is still queued
+        self.assertFalse(periodic.should_dispatch("monitor_volumes_for", 1))
+
+    def test_dispatched_runs_carry_the_header(self):
+        with mock.patch('service.periodic.current_task') as task:
+            task.request = Request(**{periodic.RUN_HEADER: True})
+            self.assertTrue(_dispatched())
+            task.request = Request()
+            self.assertFalse(_dispatched())
+
+    def test_coalesced_ticks_run_once_more(self):
+        def ticks():
+            for _ in range(3):
+                periodic.should_dispatch("monitor_instances_for", 1)
+
+        @periodic.provider_run("monitor_instances_for")
+        def run(provider_id, users=None):
+            ticks()
+
+        with mock.patch('service.periodic.current_app') as app:
+            run(1, users=["user-1"])
+            rerun = app.tasks["monitor_instances_for"].apply_async
+            # For the whole provider, not the users of the finishing run
+            rerun.assert_called_once_with(
+                args=[1], headers={periodic.RUN_HEADER: True}
+            )
+            self.assertFalse(
+                periodic.should_dispatch("monitor_instances_for", 1)
+            )
+        self.assertEqual(
+            self._statuses("monitor_instances_for"),
+            [periodic.COALESCED] * 3 + [periodic.SUCCEEDED]
+        )
+
+    def test_failed_runs_release_the_lock(self):
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self._run("monitor_volumes_for", fail)(1)
+        self.assertEqual(self._statuses(), [periodic.FAILED])
+        self.assertTrue(periodic.should_dispatch("monitor_volumes_for", 1))
+
+    @override_settings(PERIODIC_RUN_POLICIES={})
+    def test_slow_runs_defer_the_next_ones(self):
+        periodic._record(
+            "monitor_volumes_for", 1, periodic.SUCCEEDED, 1000, duration=100
+        )
+        self.assertFalse(
+            periodic.should_dispatch("monitor_volumes_for", 1, now=1120)
+        )
+        self.assertTrue(
+            periodic.should_dispatch("monitor_volumes_for", 1, now=1160)
+        )
+        self.assertEqual(
+            self._statuses(), [periodic.SUCCEEDED, periodic.DEFERRED]
+        )